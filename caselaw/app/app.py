@@ -1,13 +1,22 @@
 import os
+import time
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from app.config.config import get_config_by_name
-from app.initialize_functions import initialize_route, initialize_db, initialize_swagger
+from app.initialize_functions import initialize_cli, initialize_route, initialize_db, initialize_storage, initialize_swagger
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_principal import Principal
 # from flask_rbac import RBAC
 from flask_migrate import Migrate
+from app.services.passwords import password_hasher
+from app.services.lawyer_directory import lawyer_directory
+from app.services.principals import principal_cache
+from app.services.revocation import revocation_filter
+from app.services.compression import init_compression
+from app.services.json_provider import init_json_provider
+from app.services.metrics import init_metrics
+from app.services.uploads import UploadRequest
 
 bcrypt = Bcrypt()
 jwt = JWTManager()
@@ -29,6 +38,7 @@ def create_app(config=None) -> Flask:
     """
     
     app = Flask(__name__)
+    app.request_class = UploadRequest
    # Initialize extensions
     
     bcrypt.init_app(app)
@@ -40,16 +50,36 @@ def create_app(config=None) -> Flask:
 
     if config:
         app.config.from_object(get_config_by_name(config))
+
+    # orjson encoding and compressed responses
+    init_json_provider(app)
+    init_compression(app)
+
+    password_hasher.init_app(app)
+    principal_cache.init_app(app)
+    revocation_filter.init_app(app)
     # os.makedirs(os.path.join(app.root_path, app.config['UPLOAD_FOLDER']), exist_ok=True)
     # Initialize extensions
     initialize_db(app)
 
+    # Per-request SQL timing, Server-Timing and the Prometheus endpoint
+    init_metrics(app, db)
+
+    # Document blob storage
+    initialize_storage(app)
+
+    # In-memory lawyer directory
+    lawyer_directory.init_app(app)
+
     # Register blueprints
     initialize_route(app)
 
     # Initialize Swagger
     initialize_swagger(app)
 
+    # Register `flask caselaw ...` commands
+    initialize_cli(app)
+
     # Setup JWT error handlers and callbacks
     setup_jwt_callbacks(app)
 
@@ -59,7 +89,6 @@ def create_app(config=None) -> Flask:
 def setup_jwt_callbacks(app):
     """Setup JWT error handlers and callbacks"""
     from flask import jsonify
-    from app.db.models import User
     
     @jwt.user_identity_loader
     def user_identity_lookup(user):
@@ -69,14 +98,29 @@ def setup_jwt_callbacks(app):
         """
         return str(user.id)
     
-    @jwt.user_lookup_loader
-    def user_lookup_callback(_jwt_header, jwt_data):
+    @jwt.additional_claims_loader
+    def add_claims_to_access_token(user):
         """
-        Function that loads a user from your database whenever
-        a protected route is accessed.
+        Embed the user type and role names so that routes can be
+        authorized from the token alone, see roles_required.
         """
-        identity = jwt_data["sub"]
-        return User.query.filter_by(id=identity).one_or_none()
+        return {
+            'user_type': user.type,
+            'roles': user.get_role(),
+            'issued_at': time.time()
+        }
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return revocation_filter.is_revoked(jwt_payload)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'status': 'error',
+            'message': 'The token has been revoked',
+            'code': 'token_revoked'
+        }), 401
     
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -0,0 +1,176 @@
+import multiprocessing
+import signal
+import threading
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.db.models import User, db
+from app.services.aggregates import reconcile_counters
+from app.services.bulk_import import IMPORT_KINDS, INPUT_FORMATS, BulkImportError, run_import
+from app.services.case_search import rebuild_search_index
+from app.services.dashboard import rebuild_status_counts
+from app.services.document_blobs import move_inline_blobs, restore_inline_blobs
+from app.services.document_processing import enqueue_pending_documents
+from app.services.export import export_criteria, iter_ndjson
+from app.services.jobs import run_worker
+from app.services.lawyer_directory import lawyer_directory
+from app.services.revocation import revoke_user
+from app.services.roles import seed_roles
+
+caselaw_cli = AppGroup('caselaw', help='Caselaw maintenance commands.')
+
+
+@caselaw_cli.command('rebuild-lawyer-index')
+def rebuild_lawyer_index():
+    """Rebuild the lawyer directory snapshot from the database."""
+    lawyer_directory.rebuild()
+    click.echo(f'Lawyer directory rebuilt: {len(lawyer_directory.snapshot().ids)} lawyers')
+
+
+@caselaw_cli.command('rebuild-search-index')
+def rebuild_case_search_index():
+    """Re-index every case for full-text search."""
+    rebuild_search_index()
+    click.echo('Case search index rebuilt')
+
+
+@caselaw_cli.command('reconcile-counters')
+@click.option('--chunk-size', default=500, show_default=True, help='Lawyers checked per transaction.')
+@click.option('--dry-run', is_flag=True, help='Report drift without correcting it.')
+def reconcile_lawyer_counters(chunk_size, dry_run):
+    """Recompute lawyer active_cases and rating counters and report drift."""
+    report = reconcile_counters(chunk_size=chunk_size, dry_run=dry_run)
+    for drift in report['drift']:
+        click.echo(f"{drift['lawyer_id']} {drift['counter']}: stored {drift['stored']}, actual {drift['actual']}")
+    action = 'found' if dry_run else 'corrected'
+    click.echo(f"Checked {report['checked']} lawyers, {action} {len(report['drift'])} drifted counters")
+
+
+@caselaw_cli.command('rebuild-dashboard-counts')
+def rebuild_dashboard_counts():
+    """Recount every user's cases by status from the cases table."""
+    rebuild_status_counts()
+    click.echo('Dashboard status counts rebuilt')
+
+
+@caselaw_cli.command('seed-roles')
+def seed_role_rows():
+    """Create the admin, lawyer and client roles if they are missing."""
+    created = seed_roles()
+    click.echo(f"Created roles: {', '.join(created)}" if created else 'Roles already seeded')
+
+
+@caselaw_cli.command('revoke-tokens')
+@click.argument('email')
+@click.option('--type', 'token_type', type=click.Choice(['access', 'refresh']),
+              help='Only this token type; every token by default.')
+def revoke_user_tokens(email, token_type):
+    """Revoke the tokens issued so far to the user with EMAIL."""
+    user = User.query.filter_by(email=email).one_or_none()
+    if user is None:
+        raise click.ClickException(f'No user with email {email}')
+    revoke_user(user.id, token_type)
+    db.session.commit()
+    click.echo(f"Revoked {token_type or 'all'} tokens of {email}")
+
+
+@caselaw_cli.command('import')
+@click.argument('kind', type=click.Choice(IMPORT_KINDS))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'input_format', type=click.Choice(INPUT_FORMATS), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per transaction.')
+@click.option('--checkpoint', help='Name the progress is kept under to resume, defaults to the absolute PATH.')
+@click.option('--restart', is_flag=True, help='Ignore the progress of an earlier run and start over.')
+def import_rows(kind, path, input_format, chunk_size, checkpoint, restart):
+    """Bulk import clients, lawyers or cases from a CSV or JSON-lines file."""
+    progress = None
+    try:
+        for progress in run_import(kind, path, input_format, chunk_size, checkpoint, restart):
+            for line, error in progress['errors']:
+                click.echo(f'line {line}: {error}', err=True)
+            click.echo(f"{progress['rows']} rows read, {progress['imported']} imported, "
+                       f"{progress['rejected']} rejected ({progress['rows_per_second']:.0f} rows/s)")
+    except BulkImportError as e:
+        raise click.ClickException(str(e))
+
+    if progress is None:
+        click.echo('Nothing to import')
+        return
+    if progress['resumed_from']:
+        click.echo(f"Resumed after row {progress['resumed_from']}")
+
+    # Imported lawyers bypass the ORM events; case imports queue their
+    # directory patches like any other active_cases change
+    if kind == 'lawyers':
+        lawyer_directory.rebuild()
+    click.echo(f"Done: {progress['imported']} {kind} imported, {progress['rejected']} rejected")
+
+
+@caselaw_cli.command('export')
+@click.option('--client-id', help='Only cases of this client.')
+@click.option('--lawyer-id', help='Only cases of this lawyer.')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--batch-size', type=int, help='Cases per query, defaults to EXPORT_BATCH_SIZE.')
+@click.option('-o', '--output', type=click.File('wb'), default='-', help='Output file, stdout by default.')
+def export_cases(client_id, lawyer_id, compress, batch_size, output):
+    """Export cases with their document metadata as NDJSON."""
+    for chunk in iter_ndjson(export_criteria(client_id, lawyer_id), batch_size, compress):
+        output.write(chunk)
+
+
+def _work(app, burst, max_jobs):
+    # SIGTERM/SIGINT let the current job finish before the worker exits
+    stop = threading.Event()
+    previous = {signum: signal.signal(signum, lambda *args: stop.set()) for signum in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        with app.app_context():
+            return run_worker(burst=burst, max_jobs=max_jobs, stop=stop)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+@caselaw_cli.command('worker')
+@click.option('--processes', default=1, show_default=True, help='Worker processes to fork.')
+@click.option('--burst', is_flag=True, help='Exit once no job is due.')
+@click.option('--max-jobs', type=int, help='Exit after running this many jobs (per process).')
+def work(processes, burst, max_jobs):
+    """Run background jobs, e.g. document processing."""
+    app = current_app._get_current_object()
+    if processes == 1:
+        processed = _work(app, burst, max_jobs)
+        click.echo(f'Ran {processed} jobs')
+        return
+
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_work, args=(app, burst, max_jobs)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: [worker.terminate() for worker in workers if worker.is_alive()])
+    for worker in workers:
+        worker.join()
+    click.echo(f'{processes} workers stopped')
+
+
+@caselaw_cli.command('process-documents')
+def process_pending_documents():
+    """Queue processing jobs for documents that were never processed."""
+    queued = enqueue_pending_documents()
+    click.echo(f'Queued {queued} documents for processing')
+
+
+@caselaw_cli.command('move-document-blobs')
+@click.option('--batch-size', default=100, show_default=True, help='Documents per transaction.')
+@click.option('--restore', is_flag=True, help='Copy stored blobs back into documents.file_data, before a downgrade.')
+def move_document_blobs(batch_size, restore):
+    """Move document content from documents.file_data to the document storage."""
+    if restore:
+        try:
+            restored = restore_inline_blobs(batch_size=batch_size)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Restored {restored} documents into documents.file_data')
+        return
+    moved = move_inline_blobs(batch_size=batch_size)
+    click.echo(f'Moved {moved} documents to the document storage')
@@ -4,6 +4,33 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# SQLAlchemy engine options and the environment variables overriding them
+ENGINE_OPTION_ENV = {
+    'pool_size': ('DB_POOL_SIZE', int),
+    'max_overflow': ('DB_MAX_OVERFLOW', int),
+    'pool_timeout': ('DB_POOL_TIMEOUT', float),
+    'pool_recycle': ('DB_POOL_RECYCLE', int),
+    'pool_pre_ping': ('DB_POOL_PRE_PING', lambda value: value.lower() == 'true'),
+    # Compiled statement cache entries per engine
+    'query_cache_size': ('DB_QUERY_CACHE_SIZE', int),
+}
+
+
+def engine_options(**defaults):
+    """SQLALCHEMY_ENGINE_OPTIONS: the given defaults, overridden by DB_* variables"""
+    options = dict(defaults)
+    for name, (env, cast) in ENGINE_OPTION_ENV.items():
+        if os.getenv(env):
+            options[name] = cast(os.getenv(env))
+    return options
+
+
+def replica_binds():
+    """SQLALCHEMY_BINDS with the read replica, if DATABASE_REPLICA_URL is set"""
+    url = os.getenv('DATABASE_REPLICA_URL')
+    return {os.getenv('DATABASE_REPLICA_BIND', 'replica'): url} if url else {}
+
+
 class Config:
     """Base configuration class"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'my_precious_secret_key')
@@ -15,9 +42,111 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     DEFAULT_PROFILE_IMAGE = os.getenv("DEFAULT_PROFILE_IMAGE", "https://example.com/default-profile.png")  # Default fallback
     
+    # Password hashing (see app.services.passwords). A stored hash with a
+    # different cost is rehashed on the next successful login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # Hashes running at once across every worker of the host (0: one per
+    # core), and running plus waiting before logins get a 503. Both are
+    # host-wide because gunicorn preloads the app, see gunicorn.conf.py.
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', 0))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 64))
+    # 0 hashes in the request thread (bcrypt releases the GIL); above 0,
+    # in a process pool of this size per worker
+    PASSWORD_HASH_POOL_SIZE = int(os.getenv('PASSWORD_HASH_POOL_SIZE', 0))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # Authenticated user snapshots (see app.services.principals)
+    PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', 60))
+    PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', 10000))
+    
+    # Token revocation (see app.services.revocation)
+    REVOCATION_SYNC_INTERVAL = int(os.getenv('REVOCATION_SYNC_INTERVAL', 5))
+    REVOCATION_REBUILD_INTERVAL = int(os.getenv('REVOCATION_REBUILD_INTERVAL', 3600))
+    REVOCATION_FILTER_CAPACITY = int(os.getenv('REVOCATION_FILTER_CAPACITY', 100000))
+    
     # CORS Configuration
     CORS_HEADERS = 'Content-Type'
 
+    # Document storage (see app.services.storage). Relative paths are
+    # resolved against the Flask instance folder.
+    DOCUMENT_STORAGE_BACKEND = os.getenv('DOCUMENT_STORAGE_BACKEND', 'local')
+    DOCUMENT_STORAGE_PATH = os.getenv('DOCUMENT_STORAGE_PATH', 'documents')
+    DOCUMENT_STORAGE_CHUNK_SIZE = int(os.getenv('DOCUMENT_STORAGE_CHUNK_SIZE', 64 * 1024))
+    # Let a fronting nginx/apache serve document downloads via X-Sendfile
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+
+    # Upload limits (see app.services.uploads). MAX_CONTENT_LENGTH bounds a
+    # whole request, e.g. a case submission with all its attachments.
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_SUBMISSION_SIZE', 100 * 1024 * 1024))
+    MAX_DOCUMENT_SIZE = int(os.getenv('MAX_DOCUMENT_SIZE', 25 * 1024 * 1024))
+    MAX_DOCUMENTS_PER_REQUEST = int(os.getenv('MAX_DOCUMENTS_PER_REQUEST', 20))
+
+    # Profile images (see app.services.profile_images): square WebP
+    # variants by name and edge length. Relative paths are resolved against
+    # the Flask instance folder.
+    PROFILE_IMAGE_PATH = os.getenv('PROFILE_IMAGE_PATH', 'profile_images')
+    PROFILE_IMAGE_SIZES = {'thumb': 64, 'small': 160, 'large': 512}
+    PROFILE_IMAGE_DEFAULT_VARIANT = 'small'
+    PROFILE_IMAGE_QUALITY = int(os.getenv('PROFILE_IMAGE_QUALITY', 80))
+    PROFILE_IMAGE_MAX_PIXELS = int(os.getenv('PROFILE_IMAGE_MAX_PIXELS', 40_000_000))
+
+    # Lawyer directory snapshots (see app.services.lawyer_directory).
+    # Relative paths are resolved against the Flask instance folder.
+    LAWYER_INDEX_PATH = os.getenv('LAWYER_INDEX_PATH', 'lawyer_index')
+    LAWYER_INDEX_CHECK_INTERVAL = float(os.getenv('LAWYER_INDEX_CHECK_INTERVAL', 1))
+    # Lawyer changes are patched in by the job worker this many seconds
+    # after their commit; changes committed meanwhile share the patch.
+    LAWYER_INDEX_PATCH_DELAY = float(os.getenv('LAWYER_INDEX_PATCH_DELAY', 2))
+
+    # JSON encoding (see app.services.json_provider): 'orjson' or 'default'
+    JSON_ENCODER = os.getenv('JSON_ENCODER', 'orjson')
+
+    # Response compression (see app.services.compression), negotiated from
+    # Accept-Encoding: brotli when installed, else gzip
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+
+    # Per-request SQL and latency instrumentation (see app.services.metrics):
+    # a Server-Timing header, slow query logging and a Prometheus endpoint.
+    # Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory so
+    # that METRICS_PATH reports all workers.
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', 0.2))
+
+    # Case listing pagination
+    CASES_PAGE_SIZE = int(os.getenv('CASES_PAGE_SIZE', 50))
+    CASES_MAX_PAGE_SIZE = int(os.getenv('CASES_MAX_PAGE_SIZE', 200))
+
+    # Cases read per query by the NDJSON exports
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 500))
+
+    # Background jobs (see app.services.jobs). Times are in seconds; a job
+    # is retried after JOB_RETRY_BACKOFF * 2^(attempt - 1), capped.
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+    JOB_VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', 300))
+    JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', 30))
+    JOB_RETRY_BACKOFF_MAX = float(os.getenv('JOB_RETRY_BACKOFF_MAX', 3600))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1))
+    # Finished jobs are deleted this long after they ran; failed ones stay
+    JOB_RETENTION = int(os.getenv('JOB_RETENTION', 7 * 24 * 3600))
+
+    # Database engines (see app.db.routing). Reads of GET requests go to the
+    # DATABASE_REPLICA_BIND engine when SQLALCHEMY_BINDS has one; a client
+    # that wrote reads from the primary for REPLICA_STICKY_SECONDS.
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
+    SQLALCHEMY_BINDS = replica_binds()
+    DATABASE_REPLICA_BIND = os.getenv('DATABASE_REPLICA_BIND', 'replica')
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+    # Startup: create tables and seed roles at boot. Production gets its
+    # schema from migrations and its roles from `flask caselaw seed-roles`.
+    AUTO_CREATE_SCHEMA = os.getenv('AUTO_CREATE_SCHEMA', 'true').lower() == 'true'
+    SWAGGER_ENABLED = os.getenv('SWAGGER_ENABLED', 'true').lower() == 'true'
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -31,6 +160,8 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///test.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     PRESERVE_CONTEXT_ON_EXCEPTION = False
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_POOL_SIZE = 0
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -42,6 +173,18 @@ class ProductionConfig(Config):
     JWT_COOKIE_SECURE = True
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
 
+    # Per worker process: pool_size + max_overflow connections at most
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        query_cache_size=1200,
+    )
+
+    AUTO_CREATE_SCHEMA = os.getenv('AUTO_CREATE_SCHEMA', 'false').lower() == 'true'
+
 # Dictionary to map config names to config classes
 config_by_name = {
     'development': DevelopmentConfig,
@@ -1,13 +1,31 @@
-import os
+import mimetypes
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from datetime import datetime
 import uuid
 from flask import current_app, url_for
-from werkzeug.utils import secure_filename
+from app.db.routing import RoutingSession
+from app.services.passwords import password_hasher
+from app.services.profile_images import IMAGE_KEY, store_profile_image
+from app.services.storage import get_storage
 
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def profile_image_url(profile_image, variant=None):
+    """
+    Public URL of a stored profile image, or of the default image.
+
+    Processed images have one URL per variant (see PROFILE_IMAGE_SIZES),
+    PROFILE_IMAGE_DEFAULT_VARIANT when variant is omitted. Legacy uploads
+    only exist in their original size.
+    """
+    if not profile_image:
+        return url_for('static', filename=current_app.config['DEFAULT_PROFILE_IMAGE'], _external=True)
+
+    if IMAGE_KEY.match(profile_image):
+        variant = variant or current_app.config['PROFILE_IMAGE_DEFAULT_VARIANT']
+        return url_for('media_bp.get_profile_image', key=profile_image, variant=variant, _external=True)
+
+    return url_for('static', filename=f"uploads/{profile_image}", _external=True)
 
 # Association table for User-Role relationship
 user_roles = db.Table('user_roles',
@@ -44,10 +62,19 @@ class User(db.Model):
     
     @password.setter
     def password(self, password):
-        self._password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self._password = password_hasher.hash(password)
     
     def verify_password(self, password):
-        return bcrypt.check_password_hash(self._password, password)
+        return password_hasher.verify(self._password, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self._password)
+
+    def upgrade_password_hash(self, password):
+        """Re-hash the verified, unchanged password with the current cost"""
+        self._password = password_hasher.hash(password)
+        # Not a password change, so the user's tokens stay valid
+        self._password_rehashed = True
     
     def get_role(self):
         return [role.name for role in self.roles]
@@ -61,39 +88,20 @@ class User(db.Model):
             self.roles.remove(role)
 
     def update_profile_image(self, file):
-        """Update user profile image"""
-        if file:
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-
-            # Ensure upload folder exists
-            if not os.path.exists(upload_folder):
-                os.makedirs(upload_folder)
-
-            # Delete old profile image (if not the default)
-            if self.profile_image and self.profile_image != current_app.config['DEFAULT_PROFILE_IMAGE']:
-                old_file_path = os.path.join(upload_folder, self.profile_image)
-                if os.path.exists(old_file_path):
-                    os.remove(old_file_path)
-
-            # Generate unique filename
-            filename = secure_filename(f"profile_{self.id}_{file.filename}")
-            file_path = os.path.join(upload_folder, filename)
-
-            # Save file
-            file.save(file_path)
+        """
+        Replace the user's profile image with an upload, stored as resized
+        variants (see app.services.profile_images)
 
-            # Update database
-            self.profile_image = filename
+        Raises InvalidImage if the upload is not a usable image.
+        """
+        if file:
+            self.profile_image = store_profile_image(file.stream)
             db.session.commit()
-
             return True
         return False
 
-    def get_profile_image_url(self):
-        if not self.profile_image:
-            return url_for('static', filename=current_app.config['DEFAULT_PROFILE_IMAGE'], _external=True)
-
-        return url_for('static', filename=f"uploads/{self.profile_image}", _external=True)
+    def get_profile_image_url(self, variant=None):
+        return profile_image_url(self.profile_image, variant)
     
     def to_json(self):
         return {
@@ -161,7 +169,10 @@ class Lawyer(User):
     specialization = db.Column(db.String(100))
     bar_number = db.Column(db.String(50), unique=True, nullable=True)
     active_cases = db.Column(db.Integer, default=0)
+    # rating is the running average rating_sum / rating_count, see app.services.aggregates
     rating = db.Column(db.Float, default=0.0)
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     cases = db.relationship('Case', backref='lawyer', lazy='dynamic')
@@ -172,11 +183,8 @@ class Lawyer(User):
 
     
     def accept_case(self, case_id):
-        case = Case.query.get(case_id)
-        if case and case.status == 'Pending':
-            case.lawyer_id = self.id
-            case.status = 'Under Review'
-            self.active_cases += 1
+        from app.services.claims import claim_case
+        if claim_case(case_id, self.id):
             db.session.commit()
             return True
         return False
@@ -197,15 +205,10 @@ class Lawyer(User):
         return self
     
     def rate_lawyer(self, rating_value):
-        # Calculate new average rating
-        current_cases = self.cases.filter(Case.status == 'Closed').count()
-        if current_cases > 0:
-            self.rating = ((self.rating * (current_cases - 1)) + rating_value) / current_cases
-            db.session.commit()
-        else:
-            self.rating = rating_value
-            db.session.commit()
-        return self.rating
+        from app.services.aggregates import record_rating
+        rating = record_rating(self.id, rating_value)
+        db.session.commit()
+        return rating
     
     def to_json(self):
         base_json = super().to_json()
@@ -217,70 +220,83 @@ class Lawyer(User):
         }
         return {**base_json, **lawyer_json}
 
+CASE_STATUSES = ("Pending", "Under Review", "In Progress", "Resolved", "Closed")
+
+
 class Case(db.Model):
     __tablename__ = 'cases'
+    __table_args__ = (
+        # Keyset pagination indexes, see app.db.pagination
+        db.Index('ix_cases_status_created_at_id', 'status', 'created_at', 'id'),
+        db.Index('ix_cases_client_id_created_at_id', 'client_id', 'created_at', 'id'),
+        db.Index('ix_cases_lawyer_id_created_at_id', 'lawyer_id', 'created_at', 'id'),
+        # claim-next queue, see app.services.claims
+        db.Index('ix_cases_status_urgency_created_at', 'status', 'urgency', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    # Long text fields are only loaded by the detail projection
+    description = db.deferred(db.Column(db.Text, nullable=False), group='detail')
     category = db.Column(db.String(100), nullable=True)
-    status = db.Column(db.String(20), nullable=False, default='Pending')
+    # active_history keeps the previous value when an unloaded attribute is
+    # set, which the case_status_counts hooks need
+    status = db.column_property(db.Column(db.String(20), nullable=False, default='Pending'), active_history=True)
     urgency = db.Column(db.String(20), nullable=False, default='low')
     communication_method = db.Column(db.String(100), nullable=False, default='Email')
-    special_requirements = db.Column(db.Text, nullable=True)
+    special_requirements = db.deferred(db.Column(db.Text, nullable=True), group='detail')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign Keys
-    client_id = db.Column(db.String(36), db.ForeignKey('clients.id'), nullable=False)
-    lawyer_id = db.Column(db.String(36), db.ForeignKey('lawyers.id'), nullable=True)
+    client_id = db.column_property(db.Column(db.String(36), db.ForeignKey('clients.id'), nullable=False), active_history=True)
+    lawyer_id = db.column_property(db.Column(db.String(36), db.ForeignKey('lawyers.id'), nullable=True), active_history=True)
     
     # Relationships
     documents = db.relationship('Document', backref='case', lazy='dynamic')
     
     def assign_lawyer(self, lawyer_id):
-        lawyer = Lawyer.query.get(lawyer_id)
-        if lawyer:
-            self.lawyer_id = lawyer_id
-            self.status = 'Under Review'
-            lawyer.active_cases += 1
+        from app.services.claims import claim_case
+        if Lawyer.query.get(lawyer_id) and claim_case(self.id, lawyer_id):
             db.session.commit()
             return True
         return False
     
     def update_status(self, new_status):
-        valid_statuses = ["Pending", "Under Review", "In Progress", "Resolved", "Closed"]
-        if new_status in valid_statuses:
-            # If case is being closed, decrement lawyer's active_cases
-            if new_status == 'Closed' and self.status != 'Closed' and self.lawyer_id:
-                lawyer = Lawyer.query.get(self.lawyer_id)
-                if lawyer and lawyer.active_cases > 0:
-                    lawyer.active_cases -= 1
-            
-            self.status = new_status
+        if new_status in CASE_STATUSES:
+            # Also moves the lawyer's active_cases when the case is closed or reopened
+            from app.services.aggregates import change_case_status
+            changed = change_case_status(self.id, new_status)
             db.session.commit()
-            return True
+            return changed
         return False
     
-    def add_document(self, file_name, file_data, uploaded_by):
+    def add_document(self, file_name, stream, uploaded_by, mime_type=None):
         """
         Add a new document to the case
         
         Parameters:
         file_name (str): Name of the file
-        file_data (bytes): Binary data of the file
+        stream: Readable binary stream with the file content
         uploaded_by (str): ID of the user who uploaded the document
+        mime_type (str): MIME type of the file, guessed from the name if omitted
         
         Returns:
         Document: The newly created document
         """
+        sha256, size = get_storage().save(stream)
         new_document = Document(
             file_name=file_name,
-            file_data=file_data,
+            sha256=sha256,
+            size=size,
+            mime_type=mime_type or mimetypes.guess_type(file_name)[0] or 'application/octet-stream',
             case_id=self.id,
             uploaded_by=uploaded_by
         )
         db.session.add(new_document)
+        db.session.flush()
+        from app.services.document_processing import enqueue_document_processing
+        enqueue_document_processing([new_document.id])
         db.session.commit()
         return new_document
     
@@ -291,10 +307,15 @@ class Case(db.Model):
         Returns:
         dict: Case details with client, lawyer, and documents information
         """
+        client = self.get_client()
+        lawyer = self.get_lawyer()
         case_details = self.to_json()
-        case_details['client'] = self.get_client().to_json() if self.get_client() else None
-        case_details['lawyer'] = self.get_lawyer().to_json() if self.get_lawyer() else None
-        case_details['documents'] = [doc.to_json() for doc in self.documents]
+        case_details['client'] = client.to_json() if client else None
+        case_details['lawyer'] = lawyer.to_json() if lawyer else None
+        case_details['documents'] = [
+            doc.to_summary_json()
+            for doc in self.documents.options(db.load_only(*Document.summary_columns()))
+        ]
         return case_details
     
     def get_client(self):
@@ -304,7 +325,7 @@ class Case(db.Model):
         Returns:
         Client: The client object
         """
-        return Client.query.get(self.client_id)
+        return self.client
     
     def get_lawyer(self):
         """
@@ -314,39 +335,160 @@ class Case(db.Model):
         Lawyer: The lawyer object or None if no lawyer is assigned
         """
         if self.lawyer_id:
-            return Lawyer.query.get(self.lawyer_id)
+            return self.lawyer
         return None
     
-    def to_json(self):
+    @classmethod
+    def summary_columns(cls):
+        """Columns needed by to_summary_json, for use with load_only"""
+        return (cls.id, cls.title, cls.category, cls.status, cls.urgency,
+                cls.created_at, cls.updated_at, cls.client_id, cls.lawyer_id)
+
+    def to_summary_json(self):
+        """List projection: no long text fields"""
+        client = self.get_client()
+        lawyer = self.get_lawyer()
         return {
             'id': self.id,
             'title': self.title,
-            'description': self.description,
             'category': self.category,
             'status': self.status,
+            'urgency': self.urgency,
             'updated': self.updated_at,
-            'client': self.get_client().to_json().get('firstname') + " " + self.get_client().to_json().get('lastname') if self.get_client() else None,
-            'lawyer': self.get_lawyer().to_json().get('firstname') + " " + self.get_lawyer().to_json().get('lastname') if self.get_lawyer() else None,
+            'client': client.firstname + " " + client.lastname if client else None,
+            'lawyer': lawyer.firstname + " " + lawyer.lastname if lawyer else None,
+        }
+
+    def to_json(self):
+        """Detail projection"""
+        return {
+            **self.to_summary_json(),
+            'description': self.description,
+            'communication_method': self.communication_method,
+            'special_requirements': self.special_requirements,
+            'created': self.created_at,
         }
 
 class Document(db.Model):
     __tablename__ = 'documents'
+    __table_args__ = (
+        # A case's documents in upload order (case detail, exports)
+        db.Index('ix_documents_case_id_uploaded_at_id', 'case_id', 'uploaded_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     file_name = db.Column(db.String(255), nullable=False)
-    file_data = db.Column(db.LargeBinary, nullable=True)  # Or use a cloud storage reference
+    # Content lives in the document storage backend, addressed by its hash
+    sha256 = db.Column(db.String(64), nullable=True)
+    size = db.Column(db.BigInteger, nullable=True)
+    mime_type = db.Column(db.String(255), nullable=True)
     case_id = db.Column(db.String(36), db.ForeignKey('cases.id'), nullable=False)
     uploaded_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Filled in by the process_document job, see app.services.document_processing
+    processing_status = db.Column(db.String(20), nullable=True, default='pending')
+    page_count = db.Column(db.Integer, nullable=True)
+    text_sha256 = db.Column(db.String(64), nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
     uploader = db.relationship('User', backref='uploaded_documents')
     
+    @classmethod
+    def summary_columns(cls):
+        """Columns needed by to_summary_json, for use with load_only"""
+        return (cls.id, cls.file_name, cls.mime_type, cls.size, cls.uploaded_at)
+
+    def to_summary_json(self):
+        """List projection: what a document list needs to render"""
+        return {
+            'id': self.id,
+            'file_name': self.file_name,
+            'mime_type': self.mime_type,
+            'size': self.size,
+            'uploaded_at': self.uploaded_at.isoformat()
+        }
+
     def to_json(self):
+        """Detail projection"""
         return {
             'id': self.id,
             'file_name': self.file_name,
+            'sha256': self.sha256,
+            'size': self.size,
+            'mime_type': self.mime_type,
             'case_id': self.case_id,
             'uploaded_by': self.uploaded_by,
-            'uploaded_at': self.uploaded_at.isoformat()
-        }
\ No newline at end of file
+            'uploaded_at': self.uploaded_at.isoformat(),
+            'processing_status': self.processing_status,
+            'page_count': self.page_count
+        }
+
+class TokenRevocation(db.Model):
+    """
+    A revoked token (jti set) or a cut-off for all tokens of a user issued
+    before revoked_at (user_id set). token_type limits a user cut-off to
+    'access' tokens; None covers every token type.
+    """
+    __tablename__ = 'token_revocations'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(36), nullable=True, index=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True, index=True)
+    token_type = db.Column(db.String(20), nullable=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class CaseStatusCount(db.Model):
+    """
+    Number of a user's cases in each status, counted for the case's client
+    and for its lawyer. Maintained incrementally, see app.services.dashboard.
+    """
+    __tablename__ = 'case_status_counts'
+
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Job(db.Model):
+    """
+    A unit of background work run by `flask caselaw worker`, see
+    app.services.jobs. A running job whose locked_until has passed is
+    considered abandoned and is handed to the next worker.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # queued, running, done or failed
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+class ImportProgress(db.Model):
+    """
+    How far a bulk import got, see app.services.bulk_import. Advanced in
+    the transaction that commits each chunk, so a resumed import never
+    replays a committed chunk.
+    """
+    __tablename__ = 'import_progress'
+
+    key = db.Column(db.String(512), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    imported = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
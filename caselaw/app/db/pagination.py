@@ -0,0 +1,140 @@
+import base64
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, func, or_
+from app.db.models import Case, User
+from app.db.serializers import load_cases
+from app.services.conditional import make_validator
+
+# Request arguments that narrow a case listing to an exact column value
+CASE_FILTERS = {
+    'status': Case.status,
+    'urgency': Case.urgency,
+    'category': Case.category,
+}
+
+
+class InvalidPageRequest(ValueError):
+    """Raised when the limit, cursor or filter arguments cannot be used"""
+
+
+def encode_cursor(case):
+    """
+    Encode the (created_at, id) position of a case as an opaque cursor
+
+    Parameters:
+    case (Case): The last case of the current page
+
+    Returns:
+    str: URL-safe cursor string
+    """
+    raw = f"{case.created_at.isoformat()}|{case.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Parameters:
+    cursor (str): Cursor string from a previous page
+
+    Returns:
+    tuple: (created_at, id) of the last case of the previous page
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, case_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), case_id
+    except (ValueError, UnicodeError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def get_page_size(args):
+    """Read and clamp the limit argument against the configured page sizes"""
+    limit = args.get('limit', current_app.config['CASES_PAGE_SIZE'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('limit must be an integer')
+    if limit < 1:
+        raise InvalidPageRequest('limit must be positive')
+    return min(limit, current_app.config['CASES_MAX_PAGE_SIZE'])
+
+
+def apply_case_filters(query, args):
+    """Narrow a Case query by the status/urgency/category request arguments"""
+    for name, column in CASE_FILTERS.items():
+        value = args.get(name)
+        if value:
+            query = query.filter(column == value)
+    return query
+
+
+def paginate_cases(query, args):
+    """
+    Return one page of a Case query, newest first, keyed on (created_at, id)
+
+    The query is filtered and seeked with an index-friendly range condition,
+    so the cost of a page does not depend on how deep into the listing it is.
+
+    Parameters:
+    query (Query): A filtered Case query without ordering
+    args (MultiDict): Request arguments (limit, cursor, status, urgency, category)
+
+    Returns:
+    tuple: (list of serialized cases, cursor for the next page or None)
+    """
+    limit = get_page_size(args)
+    query = apply_case_filters(query, args)
+
+    cursor = args.get('cursor')
+    if cursor:
+        created_at, case_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Case.created_at < created_at,
+            and_(Case.created_at == created_at, Case.id < case_id)
+        ))
+
+    query = query.order_by(Case.created_at.desc(), Case.id.desc()).limit(limit + 1)
+    cases = load_cases(query)
+
+    next_cursor = None
+    if len(cases) > limit:
+        cases = cases[:limit]
+        next_cursor = encode_cursor(cases[-1])
+    return [case.to_summary_json() for case in cases], next_cursor
+
+
+def case_list_validator(query, args):
+    """
+    Cache validator of a case listing, from one aggregate query instead of
+    loading and serializing the page.
+
+    The listing changes when a matching case is added, removed or updated
+    (count and newest updated_at), or when the client or lawyer whose name
+    it shows is updated. The request arguments are part of the version, as
+    the page depends on them.
+
+    Only an ETag is given: a case that is deleted or leaves the filter
+    changes the count but not the newest updated_at, so a Last-Modified
+    date would answer If-Modified-Since with 304 for a shorter listing.
+
+    Parameters:
+    query (Query): The Case query given to paginate_cases
+    args (MultiDict): Request arguments given to paginate_cases
+
+    Returns:
+    Validator: See app.services.conditional
+    """
+    clients = User.__table__.alias('case_client')
+    lawyers = User.__table__.alias('case_lawyer')
+    count, cases_changed, clients_changed, lawyers_changed = apply_case_filters(query, args) \
+        .outerjoin(clients, clients.c.id == Case.client_id) \
+        .outerjoin(lawyers, lawyers.c.id == Case.lawyer_id) \
+        .with_entities(func.count(Case.id), func.max(Case.updated_at),
+                       func.max(clients.c.updated_at), func.max(lawyers.c.updated_at)) \
+        .order_by(None).one()
+
+    version = (count, cases_changed, clients_changed, lawyers_changed, sorted(args.items(multi=True)))
+    return make_validator(version)
@@ -0,0 +1,85 @@
+import time
+from flask import Flask, current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event
+
+# session.info keys: bind key to read from, and whether the session wrote
+REPLICA_KEY = 'read_replica'
+WROTE_KEY = 'wrote'
+
+STICKY_COOKIE = 'db_primary_until'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs to a read replica when asked to.
+
+    Routing applies only while info[REPLICA_KEY] names a bind. Everything
+    else goes to the primary: writes, flushes, raw connections and, once
+    the session has written, every later read, so a request always reads
+    its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get(REPLICA_KEY)
+        if (
+            bind is None
+            and replica
+            and isinstance(clause, Select)
+            and not self._flushing
+            and not self.info.get(WROTE_KEY)
+        ):
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[WROTE_KEY] = True
+
+
+def use_primary(view):
+    """Mark a GET view that must read from the primary, e.g. one that writes"""
+    view.use_primary = True
+    return view
+
+
+def init_routing(app: Flask, db):
+    """
+    Route the reads of GET and HEAD requests to the replica bind, if one is
+    configured.
+
+    A request that wrote sets a short-lived cookie, and GET requests that
+    carry it read from the primary, so a client sees its own writes
+    despite replication lag.
+    """
+    replica = app.config['DATABASE_REPLICA_BIND']
+    if replica not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    @app.before_request
+    def _route_reads():
+        if request.method not in ('GET', 'HEAD'):
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'use_primary', False):
+            return
+        try:
+            if float(request.cookies.get(STICKY_COOKIE, 0)) > time.time():
+                return
+        except ValueError:
+            pass
+        db.session.info[REPLICA_KEY] = replica
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if db.session.info.get(WROTE_KEY):
+            sticky = current_app.config['REPLICA_STICKY_SECONDS']
+            response.set_cookie(STICKY_COOKIE, str(int(time.time() + sticky)), max_age=int(sticky), httponly=True)
+        return response
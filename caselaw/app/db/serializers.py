@@ -0,0 +1,58 @@
+from sqlalchemy.orm import load_only, selectinload, undefer_group
+from app.db.models import Case, Client, Lawyer
+
+
+def case_loader_options():
+    """
+    Loader options that pull a case's client, lawyer and their roles
+    alongside the case rows.
+
+    The clients, the lawyers and the roles of both are fetched with one
+    extra IN query each, so serializing a page of cases costs the same
+    number of queries however long it is. The parties are not joined into
+    the case SELECT: a LEFT JOIN to a joined-inheritance entity nests
+    (users JOIN clients), which SQLite builds in full, scanning every user,
+    before probing it.
+    """
+    return (
+        selectinload(Case.client).selectinload(Client.roles),
+        selectinload(Case.lawyer).selectinload(Lawyer.roles),
+    )
+
+
+def case_summary_options():
+    """Loader options for list views: only the columns of Case.to_summary_json"""
+    return (load_only(*Case.summary_columns()), *case_loader_options())
+
+
+def case_detail_options():
+    """Loader options for detail views: every column, including deferred text"""
+    return (undefer_group('detail'), *case_loader_options())
+
+
+def load_cases(query, detail=False):
+    """
+    Execute a Case query with its related parties eagerly loaded
+
+    Parameters:
+    query (Query): A Case query, already filtered and ordered
+    detail (bool): Load the detail projection instead of the summary one
+
+    Returns:
+    list: The matching Case objects
+    """
+    options = case_detail_options() if detail else case_summary_options()
+    return query.options(*options).all()
+
+
+def serialize_cases(query):
+    """
+    Build the summary JSON list for a Case query in a fixed number of queries
+
+    Parameters:
+    query (Query): A Case query, already filtered and ordered
+
+    Returns:
+    list: One Case.to_summary_json() dict per matching case
+    """
+    return [case.to_summary_json() for case in load_cases(query)]
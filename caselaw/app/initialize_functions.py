@@ -1,21 +1,34 @@
 from app.modules.lawyer import lawyer_bp
 from app.modules.client import client_bp
+from app.modules.cases import cases_bp
+from app.modules.media import media_bp
+import os
+import weakref
 from flask import Flask
-from flasgger import Swagger
 from app.modules.auth import auth_bp
-from app.db.models import Role, db
+from app.cli import caselaw_cli
+from app.db.models import db
+from app.db.routing import init_routing
+from app.services.profile_images import profile_image_store
+from app.services.roles import role_registry, seed_roles
+from app.services.storage import init_storage
 
+# Apps whose connection pools must not be shared with forked workers
+_apps = weakref.WeakSet()
 
-def create_roles():
-    roles = ['admin', 'lawyer', 'client']  # Just a list of names
-    
-    for role_name in roles:
-        role = Role.query.filter_by(name=role_name).first()
-        if not role:
-            role = Role(name=role_name)
-            db.session.add(role)
-    
-    db.session.commit()
+
+def _dispose_engines_after_fork():
+    # With gunicorn preload_app the app is built in the master; connections
+    # it opened must not be reused by the workers. close=False leaves the
+    # parent's sockets alone and gives the child fresh pools.
+    for app in list(_apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engines_after_fork)
 
 
 def initialize_route(app: Flask):
@@ -23,16 +36,45 @@ def initialize_route(app: Flask):
         app.register_blueprint(lawyer_bp, url_prefix='/api/lawyer')
         app.register_blueprint(client_bp, url_prefix='/api/client')
         app.register_blueprint(auth_bp, url_prefix='/api/auth')
+        app.register_blueprint(cases_bp, url_prefix='/api/cases')
+        app.register_blueprint(media_bp, url_prefix='/api/media')
 
 
 def initialize_db(app: Flask):
-    with app.app_context():
-        db.init_app(app)
-        db.create_all()
-        create_roles()
+    """
+    Bind the database and set up read replica routing. With
+    AUTO_CREATE_SCHEMA off (production) boot does not touch the database:
+    the schema comes from `flask db upgrade` and roles from
+    `flask caselaw seed-roles`.
+    """
+    db.init_app(app)
+    init_routing(app, db)
+    role_registry.init_app(app)
+    _apps.add(app)
+
+    if app.config['AUTO_CREATE_SCHEMA']:
+        with app.app_context():
+            # The primary only: a replica gets its schema by replication
+            db.create_all(bind_key=None)
+            seed_roles()
+
+
+def initialize_storage(app: Flask):
+    profile_image_store.init_app(app)
+    return init_storage(app)
+
+
+def initialize_cli(app: Flask):
+    app.cli.add_command(caselaw_cli)
 
 
 def initialize_swagger(app: Flask):
+    # flasgger builds the spec on the first /apispec_1.json request and
+    # caches it outside debug mode; disabling it also skips the import
+    if not app.config['SWAGGER_ENABLED']:
+        return None
+
+    from flasgger import Swagger
     with app.app_context():
         swagger = Swagger(app)
         return swagger
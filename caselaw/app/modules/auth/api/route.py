@@ -1,7 +1,13 @@
-from flask import jsonify, redirect, request, session, url_for
-from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, jwt_required
-from app.db.models import Client, Lawyer, Role, User, db
+from flask import current_app, jsonify, redirect, request, session, url_for
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt, get_jwt_identity, jwt_required
+from app.db.models import Client, Lawyer, User, db
 from app.modules.auth import auth_bp
+from app.services.passwords import PasswordHasherBusy
+from app.services.conditional import make_validator, not_modified, with_validator
+from app.services.principals import get_current_principal
+from app.services.profile_images import InvalidImage
+from app.services.revocation import revoke_token
+from app.services.roles import role_registry
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -58,7 +64,7 @@ def register():
             }), 400
         
         # Assign the user-provided role
-        user_role = Role.query.filter_by(name=data['userType']).first()
+        user_role = role_registry.get(data['userType'])
         if not user_role:
             return jsonify({
                 'status' : 'error',
@@ -84,6 +90,13 @@ def register():
                 'refresh_token': refresh_token
             }
         }), 201
+
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': 'Server is busy, please retry'
+        }), 503
         
     except Exception as e:
         db.session.rollback()
@@ -109,11 +122,22 @@ def login():
     user = User.query.filter_by(email=data['email']).first()
     
     # Check if user exists and password is correct
-    if not user or not user.verify_password(data['password']):
+    try:
+        if not user or not user.verify_password(data['password']):
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid email or password'
+            }), 401
+
+        # Upgrade hashes made with an outdated bcrypt cost
+        if user.password_needs_rehash():
+            user.upgrade_password_hash(data['password'])
+            db.session.commit()
+    except PasswordHasherBusy:
         return jsonify({
             'status': 'error',
-            'message': 'Invalid email or password'
-        }), 401
+            'message': 'Server is busy, please retry'
+        }), 503
     
     # Generate tokens
     access_token = create_access_token(identity=user)
@@ -134,8 +158,9 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     """Refresh access token"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    # Roles come from the database, not the principal cache: a worker's
+    # cached snapshot may predate a role change that revoked access tokens
+    user = User.query.get(get_jwt_identity())
     
     if not user:
         return jsonify({
@@ -159,18 +184,74 @@ def refresh():
 @jwt_required()
 def get_user_profile():
     """Get current user profile"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_principal()
     
     if not user:
         return jsonify({
             'status': 'error',
             'message': 'User not found'
         }), 404
+
+    # ETag only: counters in the body change without touching updated_at,
+    # so Last-Modified would be wrong. The image URL depends on the host.
+    validator = make_validator((user.id, user.version, request.host_url))
+    unchanged = not_modified(validator)
+    if unchanged:
+        return unchanged
     
-    return jsonify({
+    return with_validator(jsonify({
         'status': 'success',
         'data': {
             'user': user.to_json()
         }
+    }), validator), 200
+
+
+@auth_bp.route('/me/profile-image', methods=['PUT'])
+@jwt_required()
+def upload_profile_image():
+    """Replace the current user's profile image with the uploaded 'image' file"""
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({
+            'status': 'error',
+            'message': 'User not found'
+        }), 404
+
+    image = request.files.get('image')
+    if not image:
+        return jsonify({
+            'status': 'error',
+            'message': 'No image provided'
+        }), 400
+
+    try:
+        user.update_profile_image(image)
+    except InvalidImage as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'profile_images': {
+                variant: user.get_profile_image_url(variant)
+                for variant in current_app.config['PROFILE_IMAGE_SIZES']
+            }
+        }
+    }), 200
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoke the token used for this request"""
+    revoke_token(get_jwt())
+    db.session.commit()
+
+    return jsonify({
+        'status': 'success',
+        'message': 'Token revoked'
     }), 200
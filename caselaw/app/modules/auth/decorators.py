@@ -0,0 +1,38 @@
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from app.services.principals import get_current_principal
+
+
+def get_current_roles():
+    """
+    Roles of the caller, read from the access token claims.
+
+    Tokens issued before role claims existed fall back to the principal
+    cache, so they keep working until they expire.
+    """
+    roles = get_jwt().get('roles')
+    if roles is None:
+        principal = get_current_principal()
+        return principal.roles if principal else frozenset()
+    return frozenset(roles)
+
+
+def roles_required(*roles):
+    """
+    Require a valid access token whose role claims include one of the given
+    roles. Authorization does not touch the database.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            verify_jwt_in_request()
+            if get_current_roles().isdisjoint(roles):
+                return jsonify({
+                    'status': 'error',
+                    'message': 'You are not allowed to access this resource',
+                    'code': 'forbidden'
+                }), 403
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
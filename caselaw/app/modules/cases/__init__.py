@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+
+cases_bp = Blueprint('cases_bp', __name__)
+
+import app.modules.cases.api.route
@@ -0,0 +1,94 @@
+from flask import Response, jsonify, request, send_file, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.db.models import Case, Document
+from app.db.serializers import case_detail_options
+from app.modules.auth.decorators import get_current_roles, roles_required
+from app.modules.cases import cases_bp
+from app.services.export import export_criteria, iter_ndjson
+from app.services.storage import get_storage
+
+
+def can_access_case(case):
+    """The case's client, its assigned lawyer and admins may see a case"""
+    if get_jwt_identity() in (case.client_id, case.lawyer_id):
+        return True
+    return 'admin' in get_current_roles()
+
+
+@cases_bp.route('/export', methods=['GET'])
+@roles_required('admin')
+def export_cases():
+    """
+    Stream cases with their document metadata as NDJSON, firm-wide or for
+    one client_id and/or lawyer_id. gzip=1 compresses the stream.
+    """
+    client_id = request.args.get('client_id')
+    lawyer_id = request.args.get('lawyer_id')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true')
+
+    scope = '-'.join(filter(None, [client_id and f'client-{client_id}', lawyer_id and f'lawyer-{lawyer_id}'])) or 'all'
+    filename = f'cases-{scope}.ndjson' + ('.gz' if compress else '')
+
+    response = Response(
+        stream_with_context(iter_ndjson(export_criteria(client_id, lawyer_id), compress=compress)),
+        mimetype='application/gzip' if compress else 'application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@cases_bp.route('/<string:case_id>', methods=['GET'])
+@jwt_required()
+def get_case(case_id):
+    """Case detail: full case, client, lawyer and document summaries"""
+    case = Case.query.options(*case_detail_options()).filter_by(id=case_id).first()
+    if not case:
+        return jsonify({"message": "Case not found"}), 404
+
+    if not can_access_case(case):
+        return jsonify({"message": "Not allowed to access this case"}), 403
+
+    return jsonify({
+        "case": case.get_case_details()
+    }), 200
+
+
+@cases_bp.route('/<string:case_id>/documents/<string:doc_id>', methods=['GET'])
+@jwt_required()
+def download_document(case_id, doc_id):
+    """
+    Stream a case document from storage.
+
+    Supports Range requests and conditional GETs against the content hash,
+    which is used as a strong ETag. File-backed stores are handed to the
+    WSGI server as a path so it can use sendfile.
+    """
+    case = Case.query.get(case_id)
+    if not case:
+        return jsonify({"message": "Case not found"}), 404
+
+    if not can_access_case(case):
+        return jsonify({"message": "Not allowed to access this case"}), 403
+
+    document = Document.query.filter_by(id=doc_id, case_id=case.id).first()
+    if not document or not document.sha256:
+        return jsonify({"message": "Document not found"}), 404
+
+    storage = get_storage()
+    if not storage.exists(document.sha256):
+        return jsonify({"message": "Document content is missing"}), 404
+
+    source = storage.local_path(document.sha256) or storage.open(document.sha256)
+    response = send_file(
+        source,
+        mimetype=document.mime_type or 'application/octet-stream',
+        as_attachment=True,
+        download_name=document.file_name,
+        conditional=True,
+        etag=document.sha256,
+        last_modified=document.uploaded_at,
+        max_age=0,
+    )
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
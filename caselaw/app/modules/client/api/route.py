@@ -1,9 +1,17 @@
 from flask import jsonify, make_response, request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import os
 # from app import db
 from app.db.models import Case, Client , Lawyer,db
+from app.db.pagination import InvalidPageRequest, case_list_validator, paginate_cases
+from app.modules.auth.decorators import roles_required
 from app.modules.client import client_bp
+from app.services.conditional import not_modified, with_validator
+from app.services.dashboard import get_status_counts
+from app.services.lawyer_directory import lawyer_directory
+from app.services.principals import principal_cache
+from app.services.submissions import create_case_with_documents
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
@@ -12,7 +20,7 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @client_bp.route('/case-submit/<string:user_id>', methods=['POST'])
-@jwt_required()
+@roles_required('client', 'admin')
 def handle_submitted_case(user_id:str):
     try:
         # Verify if request has data
@@ -42,40 +50,29 @@ def handle_submitted_case(user_id:str):
             }), 400
 
         # Get client
-        client = Client.query.get(user_id)
-        if not client:
+        client = principal_cache.get(user_id)
+        if not client or client.type != 'client':
             return jsonify({
                 'status': 'error',
                 'message': 'Client not found'
             }), 404
 
-        # Create new case
-        new_case = Case(
-            title=data['title'],
-            description=data['description'],
-            urgency=data['urgency_level'],
-            communication_method=data['communication_method'],
-            special_requirements=data['special_requirements'],
-            client_id=client.id,
-            status='Pending'
-        )
-
-        # Handle file uploads
-        if 'documents' in request.files:
-            files = request.files.getlist('documents')
-            for file in files:
-                if file and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    # Save file and create document record
-                    new_case.add_document(
-                        file_name=filename,
-                        file_data=file.read(),
-                        uploaded_by=client.id
-                    )
-
-        # Save case to database
-        db.session.add(new_case)
-        db.session.commit()
+        # Uploads were spooled to temporary files, within the size limits,
+        # while the form was parsed
+        attachments = [
+            (secure_filename(file.filename), file.stream, file.mimetype)
+            for file in request.files.getlist('documents')
+            if file and allowed_file(file.filename)
+        ]
+
+        # Store the blobs, then the case and its documents in one transaction
+        new_case = create_case_with_documents(client.id, {
+            'title': data['title'],
+            'description': data['description'],
+            'urgency': data['urgency_level'],
+            'communication_method': data['communication_method'],
+            'special_requirements': data['special_requirements'],
+        }, attachments)
 
         return jsonify({
             'status': 'success',
@@ -83,6 +80,12 @@ def handle_submitted_case(user_id:str):
             'case_id': new_case.id
         }), 201
 
+    except RequestEntityTooLarge as e:
+        return jsonify({
+            'status': 'error',
+            'message': e.description
+        }), 413
+
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -92,24 +95,37 @@ def handle_submitted_case(user_id:str):
     
 
 @client_bp.route('/cases/<string:user_id>',methods=['GET'])
-@jwt_required()
+@roles_required('client', 'admin')
 def get_client_cases(user_id:str):
     try:
-        client = Client.query.get(user_id)
-        if not client:
+        client = principal_cache.get(user_id)
+        if not client or client.type != 'client':
             return jsonify({
                 'status': 'error',
                 'message': 'Client not found'
             }), 404
 
-        cases = Case.query.filter_by(client_id=client.id).all()
-        # return cases if empty return empty list
-        cases_data = [case.to_json() for case in cases] if cases else []
+        cases = Case.query.filter_by(client_id=client.id)
 
-        return jsonify({
+        # Answer polls from one aggregate query while nothing changed
+        validator = case_list_validator(cases, request.args)
+        unchanged = not_modified(validator)
+        if unchanged:
+            return unchanged
+
+        cases_data, next_cursor = paginate_cases(cases, request.args)
+
+        return with_validator(jsonify({
             'status': 'success',
-            'data': cases_data
-        }), 200
+            'data': cases_data,
+            'next_cursor': next_cursor
+        }), validator), 200
+
+    except InvalidPageRequest as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
 
     except Exception as e:
         return jsonify({
@@ -119,6 +135,18 @@ def get_client_cases(user_id:str):
     
 
 
+@client_bp.route('/dashboard', methods=['GET'])
+@roles_required('client')
+def client_dashboard():
+    status_counts = get_status_counts(get_jwt_identity())
+
+    return jsonify({
+        'status': 'success',
+        'status_counts': status_counts,
+        'total_cases': sum(status_counts.values())
+    }), 200
+
+
 def submit_case(self, case_details):
         new_case = Case(
             title=case_details.get('title'),
@@ -135,22 +163,30 @@ def submit_case(self, case_details):
 @client_bp.route('/get-lawyers', methods=['POST'])
 @jwt_required()
 def find_lawyer_by_specialization():
-        data = request.get_json()
+        data = request.get_json(silent=True)
 
-        if data is None:
+        if not data or not data.get('specialization'):
              return jsonify({
                   'success':'error',
                   'message':'input required'
                   
-             })
+             }), 400
         
-        lawyers = Lawyer.query.filter_by(specialization=data.get['specialization']).all()
+        try:
+             limit = int(data.get('limit', 20))
+        except (TypeError, ValueError):
+             return jsonify({
+                  'success':'error',
+                  'message':'limit must be an integer'
+             }), 400
+
+        lawyers = lawyer_directory.search(data['specialization'], limit=max(1, min(limit, 100)))
 
-        if lawyers is None:
+        if not lawyers:
              return jsonify({
                   'success':'error',
                   'message':'no lawyers found with that specialization'
-             })
+             }), 404
         
 
         return jsonify({
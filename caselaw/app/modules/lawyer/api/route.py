@@ -1,10 +1,19 @@
-from flask import jsonify
+from flask import jsonify, request
 from app.db.models import Case, Lawyer, db
+from app.db.pagination import InvalidPageRequest, case_list_validator, get_page_size, paginate_cases
+from app.db.routing import use_primary
+from app.db.serializers import case_summary_options
+from app.modules.auth.decorators import roles_required
 from app.modules.lawyer import lawyer_bp
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.case_search import InvalidSearch, search_cases
+from app.services.claims import claim_case, claim_next_case
+from app.services.conditional import not_modified, with_validator
+from app.services.dashboard import get_status_counts
+from flask_jwt_extended import get_jwt_identity
 
 @lawyer_bp.route('/handle-cases/<string:case_id>', methods=['GET'])
-@jwt_required()
+@use_primary
+@roles_required('lawyer')
 def handle_case(case_id):
     lawyer_id = get_jwt_identity()
     lawyer = Lawyer.query.get(lawyer_id)
@@ -12,17 +21,11 @@ def handle_case(case_id):
     if not lawyer:
         return jsonify({"message": "Lawyer not found"}), 404
 
-    case = Case.query.get(case_id)
-    if not case:
-        return jsonify({"message": "Case not found"}), 404
-
-    if case.status != 'Pending' or case.lawyer_id is not None:
-        return jsonify({"message": "Case is already assigned or not available"}), 400
-
     # Assign the case to the lawyer
-    case.lawyer_id = lawyer.id
-    case.status = 'Under Review'
-    lawyer.active_cases += 1
+    if not claim_case(case_id, lawyer_id):
+        if not Case.query.get(case_id):
+            return jsonify({"message": "Case not found"}), 404
+        return jsonify({"message": "Case is already assigned or not available"}), 400
     db.session.commit()
 
     return jsonify({
@@ -30,41 +33,93 @@ def handle_case(case_id):
         "lawyer_active_cases": lawyer.active_cases
     }), 200
 
-@lawyer_bp.route('/available-case', methods=['GET'])
-@jwt_required()
-def get_available_cases():
+@lawyer_bp.route('/claim-next', methods=['POST'])
+@roles_required('lawyer')
+def claim_next():
     lawyer_id = get_jwt_identity()
-    lawyer = Lawyer.query.get(lawyer_id)
 
-    if not lawyer:
-        return jsonify({"message": "Lawyer not found"}), 404
+    case_id = claim_next_case(lawyer_id)
+    if not case_id:
+        return jsonify({"message": "No available cases at the moment"}), 404
+    db.session.commit()
 
-    available_cases = Case.query.filter(
-        Case.lawyer_id == None, 
-        Case.status == "Pending"
-    ).all()
+    case = Case.query.options(*case_summary_options()).filter_by(id=case_id).first()
+    return jsonify({
+        "message": f"Case {case_id} has been assigned to Lawyer {lawyer_id}",
+        "case": case.to_summary_json()
+    }), 200
+
+@lawyer_bp.route('/available-case', methods=['GET'])
+@roles_required('lawyer')
+def get_available_cases():
+    try:
+        available_cases, next_cursor = paginate_cases(Case.query.filter(
+            Case.lawyer_id == None, 
+            Case.status == "Pending"
+        ), request.args)
+    except InvalidPageRequest as e:
+        return jsonify({"message": str(e)}), 400
 
     if not available_cases:
         return jsonify({"message": "No available cases at the moment"}), 404
 
     return jsonify({
-        "available_cases": [case.to_json() for case in available_cases]
+        "available_cases": available_cases,
+        "next_cursor": next_cursor
     }), 200
 
 @lawyer_bp.route('/assigned-cases', methods=['GET'])
-@jwt_required()
+@roles_required('lawyer')
 def get_assigned_cases():
     lawyer_id = get_jwt_identity()
-    lawyer = Lawyer.query.get(lawyer_id)
+    cases = Case.query.filter_by(lawyer_id=lawyer_id)
 
-    if not lawyer:
-        return jsonify({"message": "Lawyer not found"}), 404
+    # Answer polls from one aggregate query while nothing changed
+    validator = case_list_validator(cases, request.args)
+    unchanged = not_modified(validator)
+    if unchanged:
+        return unchanged
 
-    assigned_cases = Case.query.filter_by(lawyer_id=lawyer_id).all()
+    try:
+        assigned_cases, next_cursor = paginate_cases(cases, request.args)
+    except InvalidPageRequest as e:
+        return jsonify({"message": str(e)}), 400
 
     if not assigned_cases:
         return jsonify({"message": "No cases assigned to this lawyer"}), 404
 
+    return with_validator(jsonify({
+        "assigned_cases": assigned_cases,
+        "next_cursor": next_cursor
+    }), validator), 200
+
+@lawyer_bp.route('/cases/search', methods=['GET'])
+@roles_required('lawyer')
+def search_lawyer_cases():
+    lawyer_id = get_jwt_identity()
+    query = request.args.get('q', '').strip()
+
+    if not query:
+        return jsonify({"message": "Search query is required"}), 400
+
+    try:
+        results, next_cursor = search_cases(
+            query, lawyer_id, get_page_size(request.args), request.args.get('cursor')
+        )
+    except (InvalidPageRequest, InvalidSearch) as e:
+        return jsonify({"message": str(e)}), 400
+
+    return jsonify({
+        "results": results,
+        "next_cursor": next_cursor
+    }), 200
+
+@lawyer_bp.route('/dashboard', methods=['GET'])
+@roles_required('lawyer')
+def lawyer_dashboard():
+    status_counts = get_status_counts(get_jwt_identity())
+
     return jsonify({
-        "assigned_cases": [case.to_json() for case in assigned_cases]
+        "status_counts": status_counts,
+        "total_cases": sum(status_counts.values())
     }), 200
@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+
+media_bp = Blueprint('media_bp', __name__)
+
+import app.modules.media.api.route
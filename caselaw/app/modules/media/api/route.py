@@ -0,0 +1,26 @@
+from flask import current_app, jsonify, send_file
+from app.modules.media import media_bp
+from app.services.profile_images import IMAGE_KEY, VARIANT_MIMETYPE, profile_image_store
+
+# A variant never changes under its URL, see ProfileImageStore
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+@media_bp.route('/profile-images/<string:key>/<string:variant>.webp', methods=['GET'])
+def get_profile_image(key, variant):
+    """Serve a profile image variant with far-future, immutable caching"""
+    if not IMAGE_KEY.match(key) or variant not in current_app.config['PROFILE_IMAGE_SIZES']:
+        return jsonify({"message": "Image not found"}), 404
+    if not profile_image_store.exists(key, variant):
+        return jsonify({"message": "Image not found"}), 404
+
+    response = send_file(
+        profile_image_store.path(key, variant),
+        mimetype=VARIANT_MIMETYPE,
+        conditional=True,
+        etag=f'{key}-{variant}',
+        max_age=IMMUTABLE_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,159 @@
+from datetime import datetime
+from sqlalchemy import case, func, select, update
+from app.db.models import Case, Lawyer, db
+from app.services import lawyer_directory, principals
+from app.services.dashboard import apply_status_change
+
+# A case counts towards its lawyer's active_cases until it is closed
+CLOSED_STATUS = 'Closed'
+
+lawyers = Lawyer.__table__
+cases = Case.__table__
+
+
+def _lawyer_changed(lawyer_id):
+    # Core UPDATEs bypass the ORM events, so queue the cache invalidations
+    # that flushing a Lawyer would have queued; they run after commit
+    for key in (principals.STALE_KEY, lawyer_directory.STALE_KEY):
+        db.session.info.setdefault(key, set()).add(lawyer_id)
+
+
+def adjust_active_cases(lawyer_id, delta):
+    """
+    Add delta to a lawyer's active_cases in SQL, never going below zero.
+    The caller commits.
+    """
+    active = func.coalesce(lawyers.c.active_cases, 0) + delta
+    db.session.execute(
+        update(lawyers)
+        .where(lawyers.c.id == lawyer_id)
+        .values(active_cases=case((active < 0, 0), else_=active))
+    )
+    _lawyer_changed(lawyer_id)
+
+
+def record_rating(lawyer_id, rating_value):
+    """
+    Add a rating to a lawyer's running average in one UPDATE. The caller
+    commits.
+
+    Returns:
+    float: The new average rating, or None if there is no such lawyer
+    """
+    rating_sum = func.coalesce(lawyers.c.rating_sum, 0.0) + rating_value
+    rating_count = func.coalesce(lawyers.c.rating_count, 0) + 1
+    rating = db.session.execute(
+        update(lawyers)
+        .where(lawyers.c.id == lawyer_id)
+        .values(rating_sum=rating_sum, rating_count=rating_count, rating=rating_sum / rating_count)
+        .returning(lawyers.c.rating)
+    ).scalar()
+    if rating is not None:
+        _lawyer_changed(lawyer_id)
+    return rating
+
+
+def change_case_status(case_id, new_status):
+    """
+    Set a case's status and keep its lawyer's active_cases in step: closing
+    decrements it, reopening a closed case increments it. The dashboard
+    status counts follow the same transition. The status is
+    compare-and-set against the value read, so two concurrent closes adjust
+    the counter once. The caller commits.
+
+    Returns:
+    bool: False if there is no such case
+    """
+    while True:
+        current = db.session.execute(
+            select(cases.c.client_id, cases.c.lawyer_id, cases.c.status).where(cases.c.id == case_id)
+        ).first()
+        if current is None:
+            return False
+
+        result = db.session.execute(
+            update(cases)
+            .where(
+                cases.c.id == case_id,
+                cases.c.status == current.status,
+                cases.c.lawyer_id == current.lawyer_id
+            )
+            .values(status=new_status, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 1:
+            break
+
+    apply_status_change(db.session.connection(), tuple(current), (current.client_id, current.lawyer_id, new_status))
+
+    delta = (current.status == CLOSED_STATUS) - (new_status == CLOSED_STATUS)
+    if delta and current.lawyer_id:
+        adjust_active_cases(current.lawyer_id, delta)
+    return True
+
+
+def reconcile_counters(chunk_size=500, dry_run=False):
+    """
+    Recompute every lawyer's active_cases from the cases table and rating
+    from rating_sum/rating_count, one chunk of lawyers per transaction.
+
+    Corrections are compare-and-set against the value that was checked, so
+    a counter updated concurrently is left alone rather than overwritten.
+
+    Parameters:
+    chunk_size (int): Lawyers checked per transaction
+    dry_run (bool): Report drift without correcting it
+
+    Returns:
+    dict: Number of lawyers checked and a list of drifted counters
+    """
+    report = {'checked': 0, 'drift': []}
+    last_id = ''
+
+    while True:
+        rows = db.session.execute(
+            select(lawyers.c.id, lawyers.c.active_cases, lawyers.c.rating,
+                   lawyers.c.rating_sum, lawyers.c.rating_count)
+            .where(lawyers.c.id > last_id)
+            .order_by(lawyers.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        ids = [row.id for row in rows]
+        active = dict(db.session.execute(
+            select(cases.c.lawyer_id, func.count())
+            .where(cases.c.lawyer_id.in_(ids), cases.c.status != CLOSED_STATUS)
+            .group_by(cases.c.lawyer_id)
+        ).all())
+
+        for row in rows:
+            expected_active = active.get(row.id, 0)
+            if (row.active_cases or 0) != expected_active:
+                report['drift'].append({'lawyer_id': row.id, 'counter': 'active_cases',
+                                        'stored': row.active_cases, 'actual': expected_active})
+                if not dry_run:
+                    db.session.execute(
+                        update(lawyers)
+                        .where(lawyers.c.id == row.id, lawyers.c.active_cases == row.active_cases)
+                        .values(active_cases=expected_active)
+                    )
+                    _lawyer_changed(row.id)
+
+            expected_rating = (row.rating_sum or 0.0) / row.rating_count if row.rating_count else 0.0
+            if abs((row.rating or 0.0) - expected_rating) > 1e-9:
+                report['drift'].append({'lawyer_id': row.id, 'counter': 'rating',
+                                        'stored': row.rating, 'actual': expected_rating})
+                if not dry_run:
+                    db.session.execute(
+                        update(lawyers)
+                        .where(lawyers.c.id == row.id, lawyers.c.rating_count == row.rating_count)
+                        .values(rating=expected_rating)
+                    )
+                    _lawyer_changed(row.id)
+
+        report['checked'] += len(rows)
+        db.session.commit()
+
+    return report
@@ -0,0 +1,320 @@
+import csv
+import itertools
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select
+from app.db.models import CASE_STATUSES, Case, Client, ImportProgress, Lawyer, User, db, user_roles
+from app.services.aggregates import adjust_active_cases
+from app.services.claims import URGENCY_PRIORITY
+from app.services.dashboard import apply_status_changes
+from app.services.passwords import password_hasher
+from app.services.roles import role_registry
+
+IMPORT_KINDS = ('clients', 'lawyers', 'cases')
+INPUT_FORMATS = ('csv', 'jsonl')
+
+USER_REQUIRED = ('email', 'password', 'firstname', 'lastname')
+CASE_REQUIRED = ('client_email', 'title', 'description')
+
+users = User.__table__
+clients = Client.__table__
+lawyers = Lawyer.__table__
+cases = Case.__table__
+
+
+class BulkImportError(ValueError):
+    """Raised when the input cannot be imported at all"""
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    raise BulkImportError(f'Cannot tell the format of {path}, pass --format')
+
+
+def read_rows(path, input_format):
+    """
+    Stream (line number, row dict) pairs from a CSV file with a header row
+    or a JSON-lines file. Blank lines are skipped.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if input_format == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {key: (value or '').strip() for key, value in row.items() if key}
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield line_number, None
+                    continue
+                yield line_number, row if isinstance(row, dict) else None
+
+
+def _missing(row, required):
+    return [name for name in required if not str(row.get(name) or '').strip()]
+
+
+def _text(row, name, max_length=None):
+    value = row.get(name)
+    value = str(value).strip() if value is not None else ''
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{name} is longer than {max_length} characters')
+    return value or None
+
+
+def _import_users(kind, rows):
+    """Insert one chunk of clients or lawyers; rows are (line, dict) pairs"""
+    errors = []
+    valid = []
+    for line, row in rows:
+        missing = _missing(row, USER_REQUIRED)
+        if missing:
+            errors.append((line, f"Missing {', '.join(missing)}"))
+            continue
+        if '@' not in str(row['email']):
+            errors.append((line, 'Invalid email'))
+            continue
+        try:
+            valid.append((line, {
+                'email': _text(row, 'email', 255),
+                'firstname': _text(row, 'firstname', 100),
+                'lastname': _text(row, 'lastname', 100),
+                'password': str(row['password']),
+                'phone': _text(row, 'phone', 20),
+                'address': _text(row, 'address', 255),
+                'location': _text(row, 'location', 100),
+                'bar_number': _text(row, 'bar_number', 50),
+                'specialization': _text(row, 'specialization', 100),
+            }))
+        except ValueError as e:
+            errors.append((line, str(e)))
+
+    # One query per chunk for duplicates against the database; rows of
+    # earlier chunks are already committed, so this also covers the file
+    emails = [row['email'] for _, row in valid]
+    taken = {email for email, in db.session.execute(select(users.c.email).where(users.c.email.in_(emails)))}
+    bar_numbers = [row['bar_number'] for _, row in valid if row['bar_number']]
+    taken_bars = set()
+    if kind == 'lawyers' and bar_numbers:
+        taken_bars = {number for number, in db.session.execute(
+            select(lawyers.c.bar_number).where(lawyers.c.bar_number.in_(bar_numbers))
+        )}
+
+    accepted = []
+    for line, row in valid:
+        if row['email'] in taken:
+            errors.append((line, f"Email {row['email']} is already registered"))
+        elif kind == 'lawyers' and row['bar_number'] and row['bar_number'] in taken_bars:
+            errors.append((line, f"Bar number {row['bar_number']} is already registered"))
+        else:
+            taken.add(row['email'])
+            if row['bar_number']:
+                taken_bars.add(row['bar_number'])
+            accepted.append(row)
+
+    if not accepted:
+        return 0, errors
+
+    hashes = password_hasher.hash_many(row['password'] for row in accepted)
+    role = role_registry.get('client' if kind == 'clients' else 'lawyer')
+    if role is None:
+        raise BulkImportError('Roles are missing, run `flask caselaw seed-roles` first')
+
+    now = datetime.utcnow()
+    user_type = 'client' if kind == 'clients' else 'lawyer'
+    user_rows, detail_rows, role_rows = [], [], []
+    for row, hashed in zip(accepted, hashes):
+        user_id = str(uuid.uuid4())
+        user_rows.append({
+            'id': user_id, 'email': row['email'], 'firstname': row['firstname'],
+            'lastname': row['lastname'], '_password': hashed, 'type': user_type,
+            'profile_image': current_app.config['DEFAULT_PROFILE_IMAGE'],
+            'created_at': now, 'updated_at': now,
+        })
+        if kind == 'clients':
+            detail_rows.append({'id': user_id, 'phone': row['phone'], 'address': row['address'],
+                                'location': row['location']})
+        else:
+            detail_rows.append({'id': user_id, 'bar_number': row['bar_number'],
+                                'specialization': row['specialization'], 'active_cases': 0,
+                                'rating': 0.0, 'rating_sum': 0.0, 'rating_count': 0})
+        role_rows.append({'user_id': user_id, 'role_id': role.id})
+
+    db.session.execute(insert(users), user_rows)
+    db.session.execute(insert(clients if kind == 'clients' else lawyers), detail_rows)
+    db.session.execute(insert(user_roles), role_rows)
+    return len(user_rows), errors
+
+
+def _import_cases(rows):
+    """Insert one chunk of cases; rows are (line, dict) pairs"""
+    errors = []
+    valid = []
+    for line, row in rows:
+        missing = _missing(row, CASE_REQUIRED)
+        if missing:
+            errors.append((line, f"Missing {', '.join(missing)}"))
+            continue
+        try:
+            case = {
+                'client_email': _text(row, 'client_email'),
+                'lawyer_email': _text(row, 'lawyer_email'),
+                'title': _text(row, 'title', 100),
+                'description': _text(row, 'description'),
+                'category': _text(row, 'category', 100),
+                'status': _text(row, 'status') or 'Pending',
+                'urgency': (_text(row, 'urgency') or 'low').lower(),
+                'communication_method': _text(row, 'communication_method', 100) or 'Email',
+                'special_requirements': _text(row, 'special_requirements'),
+            }
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        if case['status'] not in CASE_STATUSES:
+            errors.append((line, f"Invalid status {case['status']}"))
+        elif case['urgency'] not in URGENCY_PRIORITY:
+            errors.append((line, f"Invalid urgency {case['urgency']}"))
+        elif case['status'] != 'Pending' and not case['lawyer_email']:
+            errors.append((line, f"A {case['status']} case needs a lawyer_email"))
+        else:
+            valid.append((line, case))
+
+    emails = {row['client_email'] for _, row in valid} | {row['lawyer_email'] for _, row in valid if row['lawyer_email']}
+    user_ids = {
+        (email, user_type): user_id
+        for user_id, email, user_type in db.session.execute(
+            select(users.c.id, users.c.email, users.c.type).where(users.c.email.in_(emails))
+        )
+    }
+
+    now = datetime.utcnow()
+    case_rows = []
+    for line, row in valid:
+        client_id = user_ids.get((row['client_email'], 'client'))
+        lawyer_id = user_ids.get((row['lawyer_email'], 'lawyer')) if row['lawyer_email'] else None
+        if client_id is None:
+            errors.append((line, f"No client with email {row['client_email']}"))
+        elif row['lawyer_email'] and lawyer_id is None:
+            errors.append((line, f"No lawyer with email {row['lawyer_email']}"))
+        else:
+            case_rows.append({
+                'id': str(uuid.uuid4()), 'client_id': client_id, 'lawyer_id': lawyer_id,
+                'title': row['title'], 'description': row['description'], 'category': row['category'],
+                'status': row['status'], 'urgency': row['urgency'],
+                'communication_method': row['communication_method'],
+                'special_requirements': row['special_requirements'],
+                'created_at': now, 'updated_at': now,
+            })
+
+    if not case_rows:
+        return 0, errors
+
+    # Core inserts skip the mapper events, so maintain the counters here
+    db.session.execute(insert(cases), case_rows)
+    apply_status_changes(db.session.connection(), [
+        (None, (row['client_id'], row['lawyer_id'], row['status'])) for row in case_rows
+    ])
+    active = Counter(row['lawyer_id'] for row in case_rows if row['lawyer_id'] and row['status'] != 'Closed')
+    for lawyer_id, count in active.items():
+        adjust_active_cases(lawyer_id, count)
+    return len(case_rows), errors
+
+
+def import_chunk(kind, rows, progress=None):
+    """
+    Validate and insert one chunk of rows in a single transaction.
+
+    Parameters:
+    kind (str): 'clients', 'lawyers' or 'cases'
+    rows (list): (line number, row dict) pairs
+    progress (ImportProgress): Advanced past the chunk in the same transaction
+
+    Returns:
+    tuple: (number of rows inserted, list of (line number, error) for rejected rows)
+    """
+    errors = [(line, 'Not a JSON object') for line, row in rows if row is None]
+    valid = [(line, row) for line, row in rows if row is not None]
+    try:
+        if kind == 'cases':
+            imported, rejected = _import_cases(valid)
+        else:
+            imported, rejected = _import_users(kind, valid)
+        if progress is not None:
+            progress.rows += len(rows)
+            progress.imported += imported
+            progress.rejected += len(errors) + len(rejected)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return imported, sorted(errors + rejected)
+
+
+def run_import(kind, path, input_format=None, chunk_size=1000, checkpoint=None, restart=False):
+    """
+    Stream a file into the database chunk by chunk, yielding a progress
+    dict after each committed chunk.
+
+    Progress is kept in an import_progress row that each chunk advances
+    in its own transaction, so a failed import resumes after the last
+    committed chunk and never inserts a chunk twice.
+
+    Parameters:
+    kind (str): 'clients', 'lawyers' or 'cases'
+    path (str): Input file
+    input_format (str): 'csv' or 'jsonl', guessed from the extension if omitted
+    chunk_size (int): Rows per transaction
+    checkpoint (str): Key the progress is kept under, defaults to the absolute path of the file
+    restart (bool): Ignore the progress of an earlier run
+    """
+    if kind not in IMPORT_KINDS:
+        raise BulkImportError(f'Unknown import kind {kind}')
+    input_format = input_format or detect_format(path)
+    checkpoint = checkpoint or os.path.abspath(path)
+
+    progress = db.session.get(ImportProgress, checkpoint)
+    if progress is not None and restart:
+        db.session.delete(progress)
+        db.session.flush()
+        progress = None
+    if progress is not None and progress.kind != kind:
+        raise BulkImportError(f'{checkpoint} belongs to a {progress.kind} import')
+    if progress is None:
+        progress = ImportProgress(key=checkpoint, kind=kind, rows=0, imported=0, rejected=0)
+        db.session.add(progress)
+        db.session.commit()
+    resumed_from = progress.rows
+
+    rows = itertools.islice(read_rows(path, input_format), resumed_from, None)
+    started = time.perf_counter()
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        _, errors = import_chunk(kind, chunk, progress)
+
+        elapsed = time.perf_counter() - started
+        yield {
+            'kind': kind,
+            'rows': progress.rows,
+            'imported': progress.imported,
+            'rejected': progress.rejected,
+            'errors': errors,
+            'resumed_from': resumed_from,
+            'rows_per_second': (progress.rows - resumed_from) / elapsed if elapsed else 0.0,
+        }
+
+    db.session.delete(progress)
+    db.session.commit()
@@ -0,0 +1,197 @@
+import base64
+import html
+import re
+from sqlalchemy import DDL, event, text
+from app.db.models import Case, db
+from app.db.serializers import case_summary_options
+
+# Relative weight of title, description and category in the ranking
+COLUMN_WEIGHTS = (10.0, 1.0, 5.0)
+
+# SQLite ranks at most this many of the newest matches, so a query for a
+# very common word costs the same as one for a rare word
+SEARCH_CANDIDATES = 1000
+
+# SQLite: an external-content FTS5 table over cases, keyed on the cases
+# rowid and kept in sync by triggers. VACUUM may renumber rowids of a table
+# without an INTEGER PRIMARY KEY, so run `flask caselaw rebuild-search-index`
+# after a VACUUM.
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5("
+    "title, description, category, content='cases', content_rowid='rowid', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ai AFTER INSERT ON cases BEGIN "
+    "INSERT INTO cases_fts(rowid, title, description, category) "
+    "VALUES (new.rowid, new.title, new.description, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ad AFTER DELETE ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.rowid, old.title, old.description, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_au AFTER UPDATE OF title, description, category ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.rowid, old.title, old.description, old.category); "
+    "INSERT INTO cases_fts(rowid, title, description, category) "
+    "VALUES (new.rowid, new.title, new.description, new.category); END",
+)
+SQLITE_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS cases_fts_au",
+    "DROP TRIGGER IF EXISTS cases_fts_ad",
+    "DROP TRIGGER IF EXISTS cases_fts_ai",
+    "DROP TABLE IF EXISTS cases_fts",
+)
+
+# PostgreSQL: a GIN expression index, which the planner maintains itself
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+POSTGRES_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_cases_search ON cases USING gin (({POSTGRES_DOCUMENT}))",
+)
+POSTGRES_DROP_DDL = (
+    "DROP INDEX IF EXISTS ix_cases_search",
+)
+
+for _statement in SQLITE_DDL:
+    event.listen(Case.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in POSTGRES_DDL:
+    event.listen(Case.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+
+
+class InvalidSearch(ValueError):
+    """Raised when the query or cursor cannot be used"""
+
+
+def encode_cursor(score, key, floor):
+    raw = f'{score!r}|{floor}|{key}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        score, floor, key = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 2)
+        return float(score), key, int(floor)
+    except (ValueError, UnicodeError):
+        raise InvalidSearch('Invalid cursor')
+
+
+# Snippets come back from the database with these control characters
+# around each match instead of HTML, so the snippet can be escaped as a
+# whole before they become <mark> tags (see highlight). One typed into a
+# case yields at most a stray <mark>, never markup from the case text.
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+VISIBLE_TO_LAWYER = "((cases.status = 'Pending' AND cases.lawyer_id IS NULL) OR cases.lawyer_id = :lawyer_id)"
+
+
+def _sqlite_hits():
+    weights = ', '.join(map(str, COLUMN_WEIGHTS))
+    return f"""
+        SELECT cases.id AS id, cases_fts.rowid AS key,
+               bm25(cases_fts, {weights}) AS score,
+               snippet(cases_fts, -1, char(2), char(3), '…', 16) AS snippet
+        FROM cases_fts JOIN cases ON cases.rowid = cases_fts.rowid
+        WHERE cases_fts MATCH :match AND cases_fts.rowid >= :floor AND {VISIBLE_TO_LAWYER}
+    """
+
+
+def _sqlite_floor(match):
+    # Lowest rowid among the newest SEARCH_CANDIDATES matches; walking the
+    # doclist backwards by rowid is cheap, unlike scoring all of it
+    floor = db.session.execute(text(
+        "SELECT rowid FROM cases_fts WHERE cases_fts MATCH :match "
+        "ORDER BY rowid DESC LIMIT 1 OFFSET :offset"
+    ), {'match': match, 'offset': SEARCH_CANDIDATES - 1}).scalar()
+    return floor or 0
+
+
+def _postgres_hits():
+    # ts_rank_cd grows with relevance; negate it so both backends sort ascending
+    return f"""
+        SELECT cases.id AS id, cases.id AS key,
+               -ts_rank_cd({POSTGRES_DOCUMENT}, q) AS score,
+               ts_headline('english', coalesce(title, '') || ' ' || coalesce(description, ''), q,
+                           'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=16, MinWords=6') AS snippet
+        FROM cases, to_tsquery('english', :match) AS q
+        WHERE ({POSTGRES_DOCUMENT}) @@ q AND {VISIBLE_TO_LAWYER}
+    """
+
+
+def highlight(snippet):
+    """
+    HTML for a database snippet: the text escaped, the matches in <mark>.
+    Case text is client input, so nothing in it may reach the page as markup.
+    """
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def _words(query):
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        raise InvalidSearch('Search query must contain a word')
+    return words
+
+
+def to_match_query(query, dialect='sqlite'):
+    """
+    Turn free text into a full-text query in which every word must match.
+    Words are quoted, so user input cannot inject query syntax.
+    """
+    words = _words(query)
+    if dialect == 'postgresql':
+        return ' & '.join(words)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def search_cases(query, lawyer_id, limit, cursor=None):
+    """
+    Full-text search over the cases a lawyer can see: the open queue and
+    the lawyer's own cases. Results are ranked by relevance (title matches
+    weigh most) and paginated with a (score, key) cursor. On SQLite only
+    the newest SEARCH_CANDIDATES matches are ranked; the cursor pins that
+    window so later pages stay consistent with the first.
+
+    Returns:
+    tuple: (list of case summaries with 'snippet' and 'score', next cursor or None)
+    """
+    dialect = db.engine.dialect.name
+    match = to_match_query(query, dialect)
+    sql = f"SELECT * FROM ({_postgres_hits() if dialect == 'postgresql' else _sqlite_hits()}) AS hits"
+    params = {'match': match, 'lawyer_id': lawyer_id, 'limit': limit + 1}
+
+    if cursor:
+        params['after_score'], params['after_key'], params['floor'] = decode_cursor(cursor)
+        if dialect != 'postgresql':
+            params['after_key'] = int(params['after_key'])
+        sql += " WHERE score > :after_score OR (score = :after_score AND key > :after_key)"
+    elif dialect != 'postgresql':
+        params['floor'] = _sqlite_floor(match)
+    sql += " ORDER BY score, key LIMIT :limit"
+    hits = db.session.execute(text(sql), params).all()
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1].score, hits[-1].key, params.get('floor', 0))
+
+    cases = Case.query.options(*case_summary_options()) \
+        .filter(Case.id.in_([hit.id for hit in hits])).all()
+    cases_by_id = {case.id: case for case in cases}
+
+    results = []
+    for hit in hits:
+        case = cases_by_id.get(hit.id)
+        if case:
+            results.append({**case.to_summary_json(), 'snippet': highlight(hit.snippet), 'score': hit.score})
+    return results, next_cursor
+
+
+def rebuild_search_index():
+    """Re-index every case from scratch"""
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text("INSERT INTO cases_fts(cases_fts) VALUES ('rebuild')"))
+    elif db.engine.dialect.name == 'postgresql':
+        db.session.execute(text("REINDEX INDEX ix_cases_search"))
+    db.session.commit()
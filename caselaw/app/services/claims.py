@@ -0,0 +1,86 @@
+from datetime import datetime
+from sqlalchemy import update
+from app.db.models import Case, db
+from app.services.aggregates import adjust_active_cases
+from app.services.dashboard import apply_status_change
+
+# claim-next works through pending cases in this urgency order, oldest first
+URGENCY_PRIORITY = ('urgent', 'high', 'medium', 'low')
+
+# Candidates fetched per round; losers of a race fall through to the next one
+CLAIM_CANDIDATES = 10
+
+
+def claim_case(case_id, lawyer_id):
+    """
+    Assign a pending, unassigned case to a lawyer.
+
+    The status check and the assignment are one conditional UPDATE, so when
+    several lawyers race for the same case exactly one of them wins. The
+    lawyer's active_cases counter and the dashboard status counts are
+    updated in SQL within the same transaction. The caller commits; a lost
+    claim changes nothing, so the caller's other pending work is kept.
+
+    Parameters:
+    case_id (str): ID of the case to claim
+    lawyer_id (str): ID of the claiming lawyer
+
+    Returns:
+    bool: True if this call assigned the case
+    """
+    claimed = db.session.execute(
+        update(Case.__table__)
+        .where(
+            Case.__table__.c.id == case_id,
+            Case.__table__.c.status == 'Pending',
+            Case.__table__.c.lawyer_id.is_(None)
+        )
+        .values(lawyer_id=lawyer_id, status='Under Review', updated_at=datetime.utcnow())
+        .returning(Case.__table__.c.client_id)
+    ).first()
+    if claimed is None:
+        return False
+
+    adjust_active_cases(lawyer_id, 1)
+    apply_status_change(
+        db.session.connection(),
+        (claimed.client_id, None, 'Pending'),
+        (claimed.client_id, lawyer_id, 'Under Review')
+    )
+    return True
+
+
+def next_candidates():
+    """
+    IDs of the most urgent, oldest unclaimed cases.
+
+    One query per urgency level keeps each lookup on the
+    (status, urgency, created_at) index instead of sorting the whole queue.
+    """
+    base = db.session.query(Case.id).filter(Case.status == 'Pending', Case.lawyer_id.is_(None))
+    for urgency in URGENCY_PRIORITY:
+        ids = base.filter(Case.urgency == urgency) \
+            .order_by(Case.created_at, Case.id).limit(CLAIM_CANDIDATES).all()
+        if ids:
+            return [case_id for case_id, in ids]
+
+    ids = base.filter(Case.urgency.notin_(URGENCY_PRIORITY)) \
+        .order_by(Case.created_at, Case.id).limit(CLAIM_CANDIDATES).all()
+    return [case_id for case_id, in ids]
+
+
+def claim_next_case(lawyer_id):
+    """
+    Claim the highest-priority unclaimed case for a lawyer. The caller
+    commits.
+
+    Returns:
+    str: ID of the claimed case, or None when the queue is empty
+    """
+    while True:
+        candidates = next_candidates()
+        if not candidates:
+            return None
+        for case_id in candidates:
+            if claim_case(case_id, lawyer_id):
+                return case_id
@@ -0,0 +1,57 @@
+import gzip
+from flask import Flask, current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv'}
+
+
+def _encodings():
+    # Preference order when the client accepts several with equal quality
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress_response(response):
+    """
+    Compress a buffered response body with the best encoding the client
+    accepts.
+
+    Streamed and file responses (exports, document downloads) are left
+    alone, as are bodies below COMPRESS_MIN_SIZE, where compression costs
+    more CPU than the bytes it saves are worth.
+    """
+    config = current_app.config
+    if (
+        not config['COMPRESS_ENABLED']
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encoding = request.accept_encodings.best_match(_encodings())
+    if encoding == 'br':
+        body = brotli.compress(body, quality=config['COMPRESS_BROTLI_QUALITY'])
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app: Flask):
+    app.after_request(compress_response)
@@ -0,0 +1,53 @@
+import hashlib
+from collections import namedtuple
+from flask import make_response, request
+
+
+class Validator(namedtuple('Validator', ['etag', 'last_modified'])):
+    """
+    Cache validators of a response, known before the response is built:
+    an opaque version tag and the time of the newest change (or None)
+    """
+
+
+def make_validator(version, last_modified=None):
+    """
+    Build a Validator from the parts a response depends on
+
+    Parameters:
+    version (tuple): Values that change whenever the response would, e.g.
+        the newest updated_at, a row count and the request arguments
+    last_modified (datetime): Newest change covered by version, if known
+    """
+    etag = hashlib.sha1(repr(version).encode('utf-8')).hexdigest()
+    return Validator(etag, last_modified)
+
+
+def not_modified(validator):
+    """
+    A 304 response if the request's If-None-Match or If-Modified-Since
+    still matches the validator, otherwise None. If-Modified-Since is only
+    considered without If-None-Match, and at one second resolution.
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(validator.etag)
+    elif request.if_modified_since and validator.last_modified:
+        fresh = validator.last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    return with_validator(make_response('', 304), validator)
+
+
+def with_validator(response, validator):
+    """
+    Attach the validators to a response. Clients may keep it but must
+    revalidate before reuse, which is what makes polling cheap.
+    """
+    response.set_etag(validator.etag, weak=True)
+    if validator.last_modified:
+        response.last_modified = validator.last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
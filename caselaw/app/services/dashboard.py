@@ -0,0 +1,117 @@
+from collections import Counter
+from sqlalchemy import event, func, inspect, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from app.db.models import Case, CaseStatusCount, db
+
+status_counts = CaseStatusCount.__table__
+cases = Case.__table__
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE, and their insert construct
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def _count_changes(old, new):
+    """
+    Per (user_id, status) deltas for a case moving from old to new, each a
+    (client_id, lawyer_id, status) tuple or None when the case is created
+    or deleted
+    """
+    deltas = Counter()
+    for row, sign in ((old, -1), (new, 1)):
+        if row is None:
+            continue
+        client_id, lawyer_id, status = row
+        for user_id in (client_id, lawyer_id):
+            if user_id:
+                deltas[(user_id, status)] += sign
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def apply_status_change(connection, old, new):
+    """
+    Move a case between the status counts of its client and lawyer.
+
+    Runs on the given connection, i.e. in the transaction that changed the
+    case. Each count is one upsert that adds to the stored value in SQL, so
+    concurrent changes do not lose updates.
+    """
+    apply_status_changes(connection, [(old, new)])
+
+
+def apply_status_changes(connection, changes):
+    """Apply many (old, new) case transitions with one batched upsert"""
+    deltas = Counter()
+    for old, new in changes:
+        deltas.update(_count_changes(old, new))
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    insert = UPSERT_INSERTS.get(connection.dialect.name)
+    if insert is None:
+        raise NotImplementedError(f'No status count upsert for the {connection.dialect.name} dialect')
+    statement = insert(status_counts)
+    statement = statement.on_conflict_do_update(
+        index_elements=[status_counts.c.user_id, status_counts.c.status],
+        set_={'count': status_counts.c.count + statement.excluded.count}
+    )
+    connection.execute(statement, [
+        {'user_id': user_id, 'status': status, 'count': delta}
+        for (user_id, status), delta in deltas.items()
+    ])
+
+
+def get_status_counts(user_id):
+    """
+    Cases of a user by status, read from the summary table
+
+    Returns:
+    dict: Status name to number of cases, statuses without cases omitted
+    """
+    rows = db.session.execute(
+        select(status_counts.c.status, status_counts.c.count)
+        .where(status_counts.c.user_id == user_id, status_counts.c.count > 0)
+    ).all()
+    return {status: count for status, count in rows}
+
+
+def rebuild_status_counts():
+    """Recount every user's cases by status from the cases table"""
+    per_user = union_all(
+        select(cases.c.client_id.label('user_id'), cases.c.status),
+        select(cases.c.lawyer_id.label('user_id'), cases.c.status).where(cases.c.lawyer_id.isnot(None))
+    ).subquery()
+
+    db.session.execute(status_counts.delete())
+    db.session.execute(status_counts.insert().from_select(
+        ['user_id', 'status', 'count'],
+        select(per_user.c.user_id, per_user.c.status, func.count())
+        .group_by(per_user.c.user_id, per_user.c.status)
+    ))
+    db.session.commit()
+
+
+def _previous(target, name):
+    history = inspect(target).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, name)
+
+
+@event.listens_for(Case, 'after_insert')
+def _count_inserted_case(mapper, connection, target):
+    apply_status_change(connection, None, (target.client_id, target.lawyer_id, target.status))
+
+
+@event.listens_for(Case, 'after_update')
+def _count_updated_case(mapper, connection, target):
+    old = tuple(_previous(target, name) for name in ('client_id', 'lawyer_id', 'status'))
+    apply_status_change(connection, old, (target.client_id, target.lawyer_id, target.status))
+
+
+@event.listens_for(Case, 'after_delete')
+def _count_deleted_case(mapper, connection, target):
+    apply_status_change(connection, (target.client_id, target.lawyer_id, target.status), None)
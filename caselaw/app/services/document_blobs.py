@@ -0,0 +1,111 @@
+import io
+import mimetypes
+import sqlalchemy as sa
+from app.db.models import db
+from app.services.storage import get_storage
+
+# Documents used to keep their content inline in documents.file_data.
+# Migration 9a7e5b3c1d20 added the storage columns next to it; the blobs
+# are moved with `flask caselaw move-document-blobs` and migration
+# e8b3f5a2c6d1 drops the column once they are all out.
+documents = sa.table(
+    'documents',
+    sa.column('id', sa.String),
+    sa.column('file_name', sa.String),
+    sa.column('file_data', sa.LargeBinary),
+    sa.column('sha256', sa.String),
+    sa.column('size', sa.BigInteger),
+    sa.column('mime_type', sa.String),
+)
+
+
+def has_inline_blobs():
+    """Whether the documents table still has its file_data column"""
+    columns = sa.inspect(db.engine).get_columns('documents')
+    return any(column['name'] == 'file_data' for column in columns)
+
+
+def move_inline_blobs(batch_size=100):
+    """
+    Move the content of documents.file_data to the document storage and
+    fill in sha256, size and mime_type. Each batch is committed on its
+    own, so an interrupted run resumes where it stopped.
+
+    Parameters:
+    batch_size (int): Documents per transaction; each batch holds at most this many blobs in memory
+
+    Returns:
+    int: Number of documents moved
+    """
+    if not has_inline_blobs():
+        return 0
+
+    storage = get_storage()
+    moved = 0
+    last_id = ''
+    while True:
+        rows = db.session.execute(
+            sa.select(documents.c.id, documents.c.file_name, documents.c.file_data)
+            .where(documents.c.id > last_id)
+            .order_by(documents.c.id)
+            .limit(batch_size)
+        ).fetchall()
+        if not rows:
+            return moved
+
+        pending = [row for row in rows if row.file_data is not None]
+        saved = storage.save_many([io.BytesIO(row.file_data) for row in pending])
+        for row, (sha256, size) in zip(pending, saved):
+            db.session.execute(
+                documents.update()
+                .where(documents.c.id == row.id)
+                .values(
+                    sha256=sha256,
+                    size=size,
+                    mime_type=mimetypes.guess_type(row.file_name)[0] or 'application/octet-stream',
+                    file_data=None,
+                )
+            )
+        db.session.commit()
+        moved += len(pending)
+        last_id = rows[-1].id
+
+
+def restore_inline_blobs(batch_size=100):
+    """
+    Copy stored content back into documents.file_data, before downgrading
+    past migration 9a7e5b3c1d20. The blobs stay in the storage.
+
+    Parameters:
+    batch_size (int): Documents per transaction
+
+    Returns:
+    int: Number of documents restored
+    """
+    if not has_inline_blobs():
+        raise RuntimeError('documents.file_data does not exist; downgrade past e8b3f5a2c6d1 first')
+
+    storage = get_storage()
+    restored = 0
+    last_id = ''
+    while True:
+        rows = db.session.execute(
+            sa.select(documents.c.id, documents.c.sha256, documents.c.file_data.is_(None).label('missing'))
+            .where(documents.c.id > last_id)
+            .order_by(documents.c.id)
+            .limit(batch_size)
+        ).fetchall()
+        if not rows:
+            return restored
+
+        for row in rows:
+            if row.sha256 is None or not row.missing:
+                continue
+            with storage.open(row.sha256) as blob:
+                data = blob.read()
+            db.session.execute(
+                documents.update().where(documents.c.id == row.id).values(file_data=data)
+            )
+            restored += 1
+        db.session.commit()
+        last_id = rows[-1].id
@@ -0,0 +1,129 @@
+import hashlib
+import re
+import zipfile
+from datetime import datetime
+from xml.etree import ElementTree
+from app.db.models import Document, db
+from app.services.jobs import enqueue_many, job_handler
+from app.services.storage import get_storage
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+PDF_PAGE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+DOCX_PAGES = re.compile(r'<Pages>(\d+)</Pages>')
+
+
+def _extension(file_name):
+    return file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else ''
+
+
+def _read_txt(blob):
+    return blob.read().decode('utf-8', errors='replace'), None
+
+
+def _read_pdf(blob):
+    # pypdf is optional; without it only the pages are counted
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None, len(PDF_PAGE.findall(blob.read())) or None
+
+    reader = PdfReader(blob)
+    text = '\n'.join(page.extract_text() or '' for page in reader.pages)
+    return text, len(reader.pages)
+
+
+def _read_docx(blob):
+    with zipfile.ZipFile(blob) as archive:
+        body = ElementTree.fromstring(archive.read('word/document.xml'))
+        try:
+            pages = DOCX_PAGES.search(archive.read('docProps/app.xml').decode('utf-8'))
+        except KeyError:
+            pages = None
+
+    paragraphs = [
+        ''.join(node.text or '' for node in paragraph.iter(f'{WORD_NAMESPACE}t'))
+        for paragraph in body.iter(f'{WORD_NAMESPACE}p')
+    ]
+    return '\n'.join(paragraphs), int(pages.group(1)) if pages else None
+
+
+# Extension -> reader returning (text or None, page count or None). Legacy
+# binary .doc files are only verified.
+READERS = {
+    'txt': _read_txt,
+    'pdf': _read_pdf,
+    'docx': _read_docx,
+}
+
+
+def verify_checksum(storage, document):
+    hasher = hashlib.sha256()
+    with storage.open(document.sha256) as blob:
+        for chunk in iter(lambda: blob.read(storage.chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest() == document.sha256
+
+
+@job_handler('process_document')
+def process_document(payload):
+    """
+    Verify a stored document against its checksum, count its pages and
+    extract its text. The extracted text is kept in the document storage
+    and referenced by text_sha256.
+    """
+    document = db.session.get(Document, payload['document_id'])
+    if document is None or document.sha256 is None:
+        return
+
+    storage = get_storage()
+    if not verify_checksum(storage, document):
+        document.processing_status = 'corrupt'
+        document.processed_at = datetime.utcnow()
+        return
+
+    reader = READERS.get(_extension(document.file_name))
+    text, page_count = None, None
+    if reader:
+        with storage.open(document.sha256) as blob:
+            try:
+                text, page_count = reader(blob)
+            except (ValueError, KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+                # Not what the extension claims; keep the verified blob as is
+                pass
+
+    document.text_sha256 = storage.save_bytes(text.encode('utf-8'))[0] if text else None
+    document.page_count = page_count
+    document.processing_status = 'processed'
+    document.processed_at = datetime.utcnow()
+
+
+def enqueue_document_processing(document_ids):
+    """Queue a process_document job per document, in the current transaction"""
+    enqueue_many('process_document', [{'document_id': document_id} for document_id in document_ids])
+
+
+def enqueue_pending_documents(batch_size=500):
+    """
+    Queue processing for every document still marked pending, e.g. ones
+    uploaded before the job queue existed. Processing is idempotent, so a
+    document that already had a job queued is merely processed twice.
+
+    Returns:
+    int: Number of jobs queued
+    """
+    queued = 0
+    last_id = ''
+    while True:
+        ids = db.session.execute(
+            db.select(Document.id)
+            .where(db.or_(Document.processing_status == 'pending', Document.processing_status.is_(None)),
+                   Document.id > last_id)
+            .order_by(Document.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return queued
+        enqueue_document_processing(ids)
+        db.session.commit()
+        queued += len(ids)
+        last_id = ids[-1]
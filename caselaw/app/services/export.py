@@ -0,0 +1,84 @@
+import zlib
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only, selectinload, undefer_group
+from app.db.models import Case, Document, db
+
+
+def export_criteria(client_id=None, lawyer_id=None):
+    """Filters for a per-client, per-lawyer or (neither given) firm-wide export"""
+    criteria = []
+    if client_id:
+        criteria.append(Case.client_id == client_id)
+    if lawyer_id:
+        criteria.append(Case.lawyer_id == lawyer_id)
+    return criteria
+
+
+def _export_record(case, documents):
+    return {
+        **case.to_json(),
+        'client_id': case.client_id,
+        'lawyer_id': case.lawyer_id,
+        'documents': [document.to_summary_json() for document in documents],
+    }
+
+
+def iter_case_batches(criteria, batch_size):
+    """
+    Yield lists of export records (case detail plus document metadata),
+    ordered by case id.
+
+    Each batch is read with keyset pagination on the primary key in its
+    own short-lived session: no transaction stays open while the consumer
+    is slow, and nothing accumulates in an identity map, so memory depends
+    on batch_size only. A batch costs four queries: the cases, their
+    clients, their lawyers (by primary key, see case_loader_options) and
+    their documents.
+    """
+    last_id = ''
+    while True:
+        with Session(db.engine) as session:
+            cases = session.scalars(
+                select(Case)
+                .options(undefer_group('detail'), selectinload(Case.client), selectinload(Case.lawyer))
+                .where(*criteria, Case.id > last_id)
+                .order_by(Case.id)
+                .limit(batch_size)
+            ).all()
+            if not cases:
+                return
+
+            documents = defaultdict(list)
+            for document in session.scalars(
+                select(Document)
+                .options(load_only(*Document.summary_columns(), Document.case_id))
+                .where(Document.case_id.in_([case.id for case in cases]))
+                .order_by(Document.uploaded_at, Document.id)
+            ):
+                documents[document.case_id].append(document)
+
+            batch = [_export_record(case, documents[case.id]) for case in cases]
+            last_id = cases[-1].id
+        yield batch
+
+
+def iter_ndjson(criteria, batch_size=None, compress=False):
+    """
+    Stream an export as NDJSON bytes, one chunk per batch, gzip-compressed
+    when compress is set
+    """
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    dumps = current_app.json.dumps
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    for batch in iter_case_batches(criteria, batch_size):
+        chunk = ''.join(dumps(record) + '\n' for record in batch).encode('utf-8')
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,244 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, delete, insert, or_, select, update
+from app.db.models import Job, db
+
+logger = logging.getLogger(__name__)
+
+jobs = Job.__table__
+
+# Candidates fetched per round; losers of a race fall through to the next one
+CLAIM_CANDIDATES = 10
+
+# An idle worker deletes expired finished jobs at most this often (seconds)
+PURGE_INTERVAL = 60
+
+# Job kind -> function called with the job payload, see job_handler
+JOB_HANDLERS = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job cannot help"""
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler of a job kind"""
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload, delay=None, max_attempts=None):
+    """
+    Queue a job in the current transaction.
+
+    The job is inserted on the caller's session and not committed, so it
+    becomes visible to workers together with the rows it refers to, and
+    disappears with them on rollback.
+
+    Parameters:
+    kind (str): Handler name, see job_handler
+    payload (dict): JSON-serializable arguments of the handler
+    delay (timedelta): Run no earlier than this from now
+    max_attempts (int): Defaults to JOB_MAX_ATTEMPTS
+    """
+    enqueue_many(kind, [payload], delay, max_attempts)
+
+
+def enqueue_many(kind, payloads, delay=None, max_attempts=None):
+    """Queue one job per payload with a single INSERT, see enqueue"""
+    if not payloads:
+        return
+    now = datetime.utcnow()
+    run_at = now + delay if delay else now
+    max_attempts = max_attempts or current_app.config['JOB_MAX_ATTEMPTS']
+    db.session.execute(insert(jobs), [
+        {'kind': kind, 'payload': payload, 'status': 'queued', 'attempts': 0,
+         'max_attempts': max_attempts, 'run_at': run_at, 'created_at': now}
+        for payload in payloads
+    ])
+
+
+def _runnable(now):
+    # Queued and due, or running on a worker whose lease has expired and
+    # with attempts left
+    return or_(
+        and_(jobs.c.status == 'queued', jobs.c.run_at <= now),
+        and_(jobs.c.status == 'running', jobs.c.locked_until < now, jobs.c.attempts < jobs.c.max_attempts),
+    )
+
+
+def _fail_abandoned(now):
+    # A job whose worker died on its last attempt never recorded the
+    # failure; without this it would stay 'running' forever
+    failed = db.session.execute(
+        update(jobs)
+        .where(jobs.c.status == 'running', jobs.c.locked_until < now, jobs.c.attempts >= jobs.c.max_attempts)
+        .values(status='failed', locked_by=None, locked_until=None, finished_at=now,
+                last_error='Lease expired on the last attempt')
+    )
+    if failed.rowcount:
+        db.session.commit()
+
+
+def claim_job(worker_id, visibility_timeout=None):
+    """
+    Lease the next due job to a worker and commit the lease.
+
+    The check and the lease are one conditional UPDATE, so a job is handed
+    to exactly one of several racing workers. The lease lasts
+    visibility_timeout seconds; a worker that dies mid-job leaves it to be
+    picked up again once the lease expires, or marked 'failed' if that
+    was its last attempt.
+
+    Returns:
+    Row: id, kind, payload, attempts and max_attempts of the job, or None
+    when nothing is due
+    """
+    visibility_timeout = visibility_timeout or current_app.config['JOB_VISIBILITY_TIMEOUT']
+    while True:
+        now = datetime.utcnow()
+        _fail_abandoned(now)
+        candidates = db.session.execute(
+            select(jobs.c.id).where(_runnable(now)).order_by(jobs.c.run_at, jobs.c.id).limit(CLAIM_CANDIDATES)
+        ).scalars().all()
+        if not candidates:
+            db.session.rollback()
+            return None
+
+        for job_id in candidates:
+            claimed = db.session.execute(
+                update(jobs)
+                .where(jobs.c.id == job_id, _runnable(now))
+                .values(status='running', attempts=jobs.c.attempts + 1, locked_by=worker_id,
+                        locked_until=now + timedelta(seconds=visibility_timeout))
+                .returning(jobs.c.id, jobs.c.kind, jobs.c.payload, jobs.c.attempts, jobs.c.max_attempts)
+            ).first()
+            if claimed is not None:
+                db.session.commit()
+                return claimed
+        db.session.rollback()
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter after the given number of attempts"""
+    config = current_app.config
+    delay = min(config['JOB_RETRY_BACKOFF'] * 2 ** (attempts - 1), config['JOB_RETRY_BACKOFF_MAX'])
+    return timedelta(seconds=delay * random.uniform(0.75, 1.25))
+
+
+def _owned(job, worker_id):
+    # Still our lease: not reclaimed by another worker after a timeout
+    return and_(jobs.c.id == job.id, jobs.c.locked_by == worker_id, jobs.c.attempts == job.attempts)
+
+
+def run_job(job, worker_id):
+    """
+    Run a claimed job and record the outcome.
+
+    The handler's database changes are committed together with the job's
+    'done' state. A failed job is queued again after a backoff delay until
+    it has used up max_attempts, then it is marked 'failed'.
+
+    Returns:
+    bool: True if the job succeeded
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise PermanentJobError(f'No handler for job kind {job.kind}')
+        handler(job.payload)
+        finished = db.session.execute(
+            update(jobs).where(_owned(job, worker_id))
+            .values(status='done', locked_by=None, locked_until=None, last_error=None,
+                    finished_at=datetime.utcnow())
+        )
+        if finished.rowcount:
+            db.session.commit()
+        else:
+            # The lease expired and another worker owns the job now
+            db.session.rollback()
+        return bool(finished.rowcount)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Job %s (%s) failed on attempt %s', job.id, job.kind, job.attempts)
+
+        now = datetime.utcnow()
+        if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+            values = {'status': 'failed', 'finished_at': now}
+        else:
+            values = {'status': 'queued', 'run_at': now + retry_delay(job.attempts)}
+        db.session.execute(
+            update(jobs).where(_owned(job, worker_id))
+            .values(locked_by=None, locked_until=None, last_error=traceback.format_exc(limit=5), **values)
+        )
+        db.session.commit()
+        return False
+
+
+def purge_finished_jobs(retention=None):
+    """
+    Delete the jobs that finished successfully more than retention seconds
+    ago. Failed jobs are kept for inspection.
+
+    Returns:
+    int: Number of jobs deleted
+    """
+    retention = retention if retention is not None else current_app.config['JOB_RETENTION']
+    cutoff = datetime.utcnow() - timedelta(seconds=retention)
+    # A job runs after run_at, so the run_at bound lets the status index
+    # narrow the rows before finished_at is checked
+    purged = db.session.execute(
+        delete(jobs).where(jobs.c.status == 'done', jobs.c.run_at < cutoff, jobs.c.finished_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return purged
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def run_worker(worker_id=None, burst=False, max_jobs=None, poll_interval=None, stop=None):
+    """
+    Claim and run jobs until stopped. While the queue is empty the worker
+    also deletes finished jobs older than JOB_RETENTION.
+
+    Parameters:
+    worker_id (str): Name recorded on leased jobs, defaults to host:pid
+    burst (bool): Return once no job is due instead of polling
+    max_jobs (int): Return after running this many jobs
+    poll_interval (float): Seconds to sleep when the queue is empty
+    stop (threading.Event): Set to finish the current job and return
+
+    Returns:
+    int: Number of jobs run
+    """
+    worker_id = worker_id or default_worker_id()
+    poll_interval = poll_interval if poll_interval is not None else current_app.config['JOB_POLL_INTERVAL']
+    stop = stop or threading.Event()
+
+    processed = 0
+    purged_at = None
+    while not stop.is_set() and (max_jobs is None or processed < max_jobs):
+        job = claim_job(worker_id)
+        if job is None:
+            if purged_at is None or time.monotonic() - purged_at >= PURGE_INTERVAL:
+                purge_finished_jobs()
+                purged_at = time.monotonic()
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job, worker_id)
+        processed += 1
+        db.session.remove()
+    return processed
@@ -0,0 +1,83 @@
+import decimal
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(obj):
+    # Types orjson does not encode itself; datetime, date, UUID and
+    # dataclasses are handled natively
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding with orjson.
+
+    Datetimes are written as ISO 8601 strings (as the to_json methods
+    already do by hand) instead of the RFC 822 dates of Flask's default
+    provider. Responses are encoded straight to bytes. Keys are sorted
+    when sort_keys is set, as with Flask's default provider. Output is
+    always UTF-8 and compact or indented by two spaces; dumps arguments
+    asking for anything else raise TypeError.
+    """
+
+    def _option(self, sort_keys=None, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        """
+        Serialize obj to a JSON string.
+
+        Parameters:
+        obj: Value to encode
+        sort_keys (bool): Sort object keys, defaults to the provider's sort_keys
+        indent (int): None or 0 for compact output, or 2
+        default (callable): Encoder of types orjson does not know
+        separators (tuple): Only the compact (',', ':'), without indent
+        ensure_ascii (bool): Only False, orjson writes UTF-8
+        """
+        sort_keys = kwargs.pop('sort_keys', None)
+        indent = kwargs.pop('indent', None)
+        default = kwargs.pop('default', _default)
+        if indent not in (None, 0, 2):
+            raise TypeError(f'orjson only indents by 2 spaces, not {indent!r}')
+        separators = kwargs.pop('separators', None)
+        if separators is not None and (indent or tuple(separators) != (',', ':')):
+            raise TypeError("orjson only writes the compact separators (',', ':')")
+        if kwargs.pop('ensure_ascii', False):
+            raise TypeError('orjson cannot escape non-ASCII characters')
+        if kwargs:
+            raise TypeError(f"Unsupported dumps arguments: {', '.join(sorted(kwargs))}")
+        return orjson.dumps(obj, default=default, option=self._option(sort_keys, indent)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Pretty-printed in debug mode, like Flask's default provider
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        option = self._option(indent=indent) | orjson.OPT_APPEND_NEWLINE
+        body = orjson.dumps(obj, default=_default, option=option)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app: Flask):
+    """Use the orjson provider when orjson is installed"""
+    if orjson is not None and app.config['JSON_ENCODER'] == 'orjson':
+        app.json = OrjsonProvider(app)
+    return app.json
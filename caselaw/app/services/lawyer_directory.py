@@ -0,0 +1,372 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+import numpy as np
+from flask import Flask, current_app
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session, object_session
+from app.db.models import Lawyer, User, db
+from app.services.jobs import enqueue, job_handler, jobs
+
+# How well a lawyer's specialization matches the query
+MATCH_EXACT = 1.0
+MATCH_PREFIX = 0.7
+MATCH_WORD = 0.4
+
+# Score = match quality, rating and spare capacity, weighted
+WEIGHT_MATCH = 0.6
+WEIGHT_RATING = 0.3
+WEIGHT_LOAD = 0.1
+MAX_RATING = 5.0
+# Active cases at which the load penalty reaches half its weight
+LOAD_HALF = 5.0
+
+ARRAYS = ('ids', 'names', 'specializations', 'rating', 'active_cases', 'spec_code', 'order', 'offsets')
+
+
+def normalize(text):
+    """Lowercase alphanumeric words separated by single spaces"""
+    return ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower()))
+
+
+class DirectorySnapshot:
+    """
+    One immutable version of the directory, stored as .npy files and
+    memory-mapped read-only, so every worker shares the same pages.
+
+    Lawyers are rows. spec_code indexes the sorted vocabulary of normalized
+    specializations (-1 for none or deleted); order/offsets group the rows
+    by code, CSR style, so the rows of a contiguous code range are one slice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.vocabulary = json.load(f)['vocabulary']
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+
+        self.words = sorted(
+            (word, code)
+            for code, specialization in enumerate(self.vocabulary)
+            for word in specialization.split()
+        )
+        self._rows_by_id = None
+
+    @property
+    def rows_by_id(self):
+        if self._rows_by_id is None:
+            self._rows_by_id = {lawyer_id: row for row, lawyer_id in enumerate(self.ids.tolist())}
+        return self._rows_by_id
+
+    @staticmethod
+    def write(path, vocabulary, ids, names, specializations, rating, active_cases, spec_code):
+        os.makedirs(path)
+        order = np.argsort(spec_code, kind='stable').astype(np.int32)
+        offsets = np.searchsorted(spec_code[order], np.arange(len(vocabulary) + 1)).astype(np.int32)
+        arrays = {
+            'ids': np.asarray(ids, dtype=np.str_),
+            'names': np.asarray(names, dtype=np.str_),
+            'specializations': np.asarray(specializations, dtype=np.str_),
+            'rating': np.asarray(rating, dtype=np.float32),
+            'active_cases': np.asarray(active_cases, dtype=np.int32),
+            'spec_code': np.asarray(spec_code, dtype=np.int32),
+            'order': order,
+            'offsets': offsets,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), array)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'vocabulary': vocabulary}, f)
+
+    def match_codes(self, query):
+        """Specialization codes matching a normalized query, with match quality"""
+        matches = {}
+        # Every specialization starting with the query sits in one sorted range
+        start = bisect_left(self.vocabulary, query)
+        for code in range(start, len(self.vocabulary)):
+            if not self.vocabulary[code].startswith(query):
+                break
+            matches[code] = MATCH_EXACT if self.vocabulary[code] == query else MATCH_PREFIX
+
+        start = bisect_left(self.words, (query, -1))
+        for word, code in self.words[start:]:
+            if not word.startswith(query):
+                break
+            matches.setdefault(code, MATCH_WORD)
+        return matches
+
+    def search(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return []
+
+        matches = self.match_codes(query)
+        if not matches:
+            return []
+
+        codes = np.fromiter(matches.keys(), dtype=np.int32)
+        quality_by_code = np.zeros(len(self.vocabulary), dtype=np.float32)
+        quality_by_code[codes] = np.fromiter(matches.values(), dtype=np.float32)
+
+        rows = np.concatenate([self.order[self.offsets[code]:self.offsets[code + 1]] for code in codes])
+        load = self.active_cases[rows].astype(np.float32)
+        scores = (
+            WEIGHT_MATCH * quality_by_code[self.spec_code[rows]]
+            + WEIGHT_RATING * np.clip(self.rating[rows], 0, MAX_RATING) / MAX_RATING
+            - WEIGHT_LOAD * load / (load + LOAD_HALF)
+        )
+
+        if len(rows) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        return [{
+            'id': str(self.ids[rows[i]]),
+            'name': str(self.names[rows[i]]),
+            'specialization': str(self.specializations[rows[i]]),
+            'rating': float(self.rating[rows[i]]),
+            'active_cases': int(self.active_cases[rows[i]]),
+            'score': round(float(scores[i]), 4),
+        } for i in top]
+
+
+class LawyerDirectory:
+    """
+    In-memory lawyer directory: specialization lookups and ranking without
+    touching the database.
+
+    The directory lives in versioned snapshot folders under
+    LAWYER_INDEX_PATH; a CURRENT file names the live one. Workers re-read
+    CURRENT at most every LAWYER_INDEX_CHECK_INTERVAL seconds and map the new
+    version when it changes. Committing a lawyer change queues a
+    patch_lawyer_directory job; the job worker patches the changed rows
+    into a new version under a file lock, so requests never rewrite the
+    snapshot themselves.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.check_interval = 1.0
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask):
+        path = app.config['LAWYER_INDEX_PATH']
+        if not os.path.isabs(path):
+            path = os.path.join(app.instance_path, path)
+        self.path = path
+        self.check_interval = app.config['LAWYER_INDEX_CHECK_INTERVAL']
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+        os.makedirs(self.path, exist_ok=True)
+
+        app.extensions['lawyer_directory'] = self
+
+    def _current_version(self):
+        try:
+            with open(os.path.join(self.path, 'CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def snapshot(self):
+        """The live snapshot, remapped when another process published a new one"""
+        now = time.monotonic()
+        if self._snapshot is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            version = self._current_version()
+            if version is None:
+                self.rebuild()
+            elif version != self._version:
+                self._load(version)
+        return self._snapshot
+
+    def _load(self, version):
+        with self._lock:
+            self._snapshot = DirectorySnapshot(os.path.join(self.path, version))
+            self._version = version
+
+    def _locked(self):
+        lock_file = open(os.path.join(self.path, '.lock'), 'w')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _publish(self, vocabulary, ids, names, specializations, rating, active_cases, spec_code):
+        version = f'v{time.time_ns()}-{os.getpid()}'
+        DirectorySnapshot.write(
+            os.path.join(self.path, version),
+            vocabulary, ids, names, specializations, rating, active_cases, spec_code
+        )
+        tmp = os.path.join(self.path, 'CURRENT.tmp')
+        with open(tmp, 'w') as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self.path, 'CURRENT'))
+
+        # Keep the previous version for readers that have not switched yet
+        versions = sorted(name for name in os.listdir(self.path) if name.startswith('v'))
+        for old in versions[:-2]:
+            shutil.rmtree(os.path.join(self.path, old), ignore_errors=True)
+
+        self._load(version)
+
+    def _query(self):
+        return db.session.query(
+            Lawyer.id, User.firstname, User.lastname, Lawyer.specialization,
+            Lawyer.rating, Lawyer.active_cases
+        ).select_from(Lawyer)
+
+    def rebuild(self):
+        """Build a fresh snapshot from every lawyer row"""
+        with self._locked():
+            self._rebuild()
+
+    def _rebuild(self):
+        # Rows are read under the lock, so a process that read older rows
+        # cannot publish after one that read newer rows
+        rows = self._query().all()
+        normalized = [normalize(row.specialization) for row in rows]
+        vocabulary = sorted(set(filter(None, normalized)))
+        codes = {specialization: code for code, specialization in enumerate(vocabulary)}
+
+        self._publish(
+            vocabulary,
+            [row.id for row in rows],
+            [f'{row.firstname} {row.lastname}' for row in rows],
+            [row.specialization or '' for row in rows],
+            [row.rating or 0.0 for row in rows],
+            [row.active_cases or 0 for row in rows],
+            np.array([codes.get(value, -1) for value in normalized], dtype=np.int32),
+        )
+
+    def patch(self, lawyer_ids):
+        """Patch the given lawyers' current rows into a new snapshot version"""
+        with self._locked():
+            if self._current_version() is None:
+                self._rebuild()
+                return
+
+            rows = self._query().filter(Lawyer.id.in_(lawyer_ids)).all()
+            found = {row.id: row for row in rows}
+            base = DirectorySnapshot(os.path.join(self.path, self._current_version()))
+
+            ids = base.ids.tolist()
+            names = base.names.tolist()
+            specializations = base.specializations.tolist()
+            rating = np.array(base.rating)
+            active_cases = np.array(base.active_cases)
+            spec_code = np.array(base.spec_code)
+
+            # Re-code against a vocabulary that includes new specializations
+            new_values = {normalize(row.specialization) for row in rows} - {''}
+            vocabulary = sorted(set(base.vocabulary) | new_values)
+            if len(vocabulary) != len(base.vocabulary):
+                remap = np.searchsorted(np.asarray(vocabulary), np.asarray(base.vocabulary)).astype(np.int32)
+                valid = spec_code >= 0
+                spec_code[valid] = remap[spec_code[valid]]
+            codes = {specialization: code for code, specialization in enumerate(vocabulary)}
+
+            rows_by_id = base.rows_by_id
+            extra = []
+            for lawyer_id in lawyer_ids:
+                row = found.get(lawyer_id)
+                index = rows_by_id.get(lawyer_id)
+                if row is None:
+                    # Deleted: drop it from every specialization bucket
+                    if index is not None:
+                        spec_code[index] = -1
+                    continue
+                values = (
+                    f'{row.firstname} {row.lastname}', row.specialization or '',
+                    row.rating or 0.0, row.active_cases or 0,
+                    codes.get(normalize(row.specialization), -1)
+                )
+                if index is None:
+                    extra.append((row.id, *values))
+                else:
+                    names[index], specializations[index], rating[index], active_cases[index], spec_code[index] = values
+
+            if extra:
+                ids.extend(item[0] for item in extra)
+                names.extend(item[1] for item in extra)
+                specializations.extend(item[2] for item in extra)
+                rating = np.concatenate([rating, [item[3] for item in extra]])
+                active_cases = np.concatenate([active_cases, [item[4] for item in extra]])
+                spec_code = np.concatenate([spec_code, np.array([item[5] for item in extra], dtype=np.int32)])
+
+            self._publish(vocabulary, ids, names, specializations, rating, active_cases, spec_code)
+
+    def search(self, specialization, limit=20):
+        """
+        Lawyers matching a specialization, best first.
+
+        Returns:
+        list: Dicts with id, name, specialization, rating, active_cases, score
+        """
+        return self.snapshot().search(specialization, limit)
+
+
+lawyer_directory = LawyerDirectory()
+
+
+STALE_KEY = 'stale_lawyers'
+PATCH_JOB = 'patch_lawyer_directory'
+
+
+def _mark_lawyer(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(STALE_KEY, set()).add(target.id)
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Lawyer, _event_name, _mark_lawyer)
+
+
+def _queue_stale_lawyers(session, *args):
+    # Runs after every flush (ORM changes) and before commit (Core UPDATEs,
+    # see aggregates._lawyer_changed). The patch job is inserted in the
+    # same transaction, so it is queued exactly when the change commits.
+    stale = session.info.pop(STALE_KEY, None)
+    if stale:
+        enqueue(PATCH_JOB, {'lawyer_ids': sorted(stale)},
+                delay=timedelta(seconds=current_app.config['LAWYER_INDEX_PATCH_DELAY']))
+
+
+event.listen(Session, 'after_flush_postexec', _queue_stale_lawyers)
+event.listen(Session, 'before_commit', _queue_stale_lawyers)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_stale_lawyers(session, previous_transaction):
+    session.info.pop(STALE_KEY, None)
+
+
+@job_handler(PATCH_JOB)
+def patch_lawyer_directory(payload):
+    """
+    Patch changed lawyers into the directory. Patch jobs queued meanwhile
+    are absorbed and marked done with this one, so a burst of claims costs
+    one snapshot rewrite rather than one per claim.
+    """
+    absorbed = db.session.execute(
+        update(jobs)
+        .where(jobs.c.kind == PATCH_JOB, jobs.c.status == 'queued')
+        .values(status='done', finished_at=datetime.utcnow())
+        .returning(jobs.c.payload)
+    ).scalars().all()
+    lawyer_ids = set(payload['lawyer_ids'])
+    for other in absorbed:
+        lawyer_ids.update(other['lawyer_ids'])
+    lawyer_directory.patch(sorted(lawyer_ids))
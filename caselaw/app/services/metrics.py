@@ -0,0 +1,157 @@
+import logging
+import os
+import time
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from app.services.passwords import password_hasher
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # pragma: no cover - prometheus_client is in requirements.txt
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# Label for requests outside any blueprint (app routes, 404s)
+NO_BLUEPRINT = 'none'
+
+
+class RequestStats:
+    """Queries and database time of the current request, kept on flask.g"""
+
+    __slots__ = ('started', 'queries', 'db_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+class PasswordHasherCollector:
+    """
+    The password hasher's own counters. They live in each process, so in
+    multiprocess mode they describe the worker answering the scrape, named
+    by the pid label.
+    """
+
+    def collect(self):
+        metrics = password_hasher.metrics()
+        pid = str(os.getpid())
+        for name, value in metrics.items():
+            if name.endswith('_total'):
+                family = CounterMetricFamily(f'caselaw_password_{name[:-6]}', f'Password hasher {name}', labels=['pid'])
+            else:
+                family = GaugeMetricFamily(f'caselaw_password_{name}', f'Password hasher {name}', labels=['pid'])
+            family.add_metric([pid], value)
+            yield family
+
+
+if prometheus_client is not None:
+    REGISTRY = prometheus_client.REGISTRY
+    LABELS = ('blueprint', 'method')
+    REQUEST_SECONDS = prometheus_client.Histogram(
+        'caselaw_request_duration_seconds', 'Request latency', LABELS,
+        buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+    )
+    REQUEST_QUERIES = prometheus_client.Histogram(
+        'caselaw_request_queries', 'SQL statements per request', LABELS,
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    )
+    REQUEST_DB_SECONDS = prometheus_client.Histogram(
+        'caselaw_request_db_seconds', 'Database time per request', LABELS,
+        buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+    )
+    SLOW_QUERIES = prometheus_client.Counter(
+        'caselaw_slow_queries', 'Statements slower than SLOW_QUERY_THRESHOLD', LABELS,
+    )
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        REGISTRY.register(PasswordHasherCollector())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'request_stats' in g:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started or not has_request_context() or 'request_stats' not in g:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = g.request_stats
+    stats.queries += 1
+    stats.db_seconds += elapsed
+
+    if elapsed >= current_app.config['SLOW_QUERY_THRESHOLD']:
+        route = request.url_rule.rule if request.url_rule else request.path
+        logger.warning('Slow query (%.1f ms) in %s %s: %s', elapsed * 1000, request.method, route, statement[:1000])
+        if prometheus_client is not None:
+            SLOW_QUERIES.labels(request.blueprint or NO_BLUEPRINT, request.method).inc()
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def _start_request():
+    g.request_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = g.pop('request_stats', None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats.started
+
+    if current_app.config['SERVER_TIMING_ENABLED']:
+        response.headers.add(
+            'Server-Timing',
+            f'db;desc="{stats.queries} queries";dur={stats.db_seconds * 1000:.2f}, total;dur={elapsed * 1000:.2f}',
+        )
+
+    if prometheus_client is not None and request.endpoint != 'metrics':
+        labels = (request.blueprint or NO_BLUEPRINT, request.method)
+        REQUEST_SECONDS.labels(*labels).observe(elapsed)
+        REQUEST_QUERIES.labels(*labels).observe(stats.queries)
+        REQUEST_DB_SECONDS.labels(*labels).observe(stats.db_seconds)
+    return response
+
+
+def metrics():
+    """Prometheus exposition of the request histograms and hasher counters"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # Merge the per-worker files instead of reporting this worker only
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(PasswordHasherCollector())
+    else:
+        registry = REGISTRY
+    return Response(prometheus_client.generate_latest(registry), mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app: Flask, db):
+    """
+    Count the queries and database time of each request, log slow queries
+    and serve the Prometheus endpoint at METRICS_PATH.
+
+    With METRICS_ENABLED off nothing is registered: no engine events, no
+    request hooks, no endpoint.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    if prometheus_client is not None:
+        app.add_url_rule(app.config['METRICS_PATH'], 'metrics', metrics)
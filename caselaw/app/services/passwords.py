@@ -0,0 +1,211 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+from flask import Flask
+
+# bcrypt only looks at the first 72 bytes of a password; newer releases raise
+# instead of truncating, so truncate explicitly to keep old hashes valid.
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+
+def _to_bytes(password):
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    return password[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def hash_password(password, rounds):
+    """Hash a password with the given bcrypt cost (runs inside the pool)"""
+    return bcrypt.hashpw(_to_bytes(password), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def check_password(hashed, password):
+    """Check a password against a bcrypt hash (runs inside the pool)"""
+    return bcrypt.checkpw(_to_bytes(password), hashed.encode('utf-8'))
+
+
+def hash_cost(hashed):
+    """Cost factor stored in a bcrypt hash such as $2b$12$..."""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasherBusy(RuntimeError):
+    """
+    Raised when the hashing queue is full or a hash timed out, and the
+    request should back off
+    """
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt under a host-wide bound, apart from cheap requests.
+
+    Two semaphores are created in init_app. With gunicorn's preload_app the
+    master runs init_app, so every forked worker shares them:
+
+    - PASSWORD_HASH_CONCURRENCY hashes run at once on the host, one per
+      core by default, whatever the number of workers and threads;
+    - PASSWORD_HASH_MAX_QUEUE hashes may be running or waiting for a turn.
+      A request finding the queue full, or waiting longer than
+      PASSWORD_HASH_TIMEOUT, gets PasswordHasherBusy (a 503).
+
+    bcrypt releases the GIL, so by default (PASSWORD_HASH_POOL_SIZE = 0)
+    a password is hashed in the request thread, and the other threads of
+    a gthread worker keep serving requests meanwhile. A pool size above 0
+    hashes in a per-process pool instead. A pool cannot stop a hash that
+    has started: on a timeout that hash still runs to the end and keeps
+    its concurrency slot until then, so timed-out work is never hidden
+    from the bound.
+
+    Bulk imports (hash_many) use a separate pool with one process per core,
+    created only in the process that runs them.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.pool_size = 0
+        self.concurrency = 1
+        self.max_queue = 0
+        self.timeout = None
+        self._executor = None
+        self._executor_pid = None
+        self._batch_executor = None
+        self._batch_executor_pid = None
+        self._slots = None
+        self._running = None
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._count = 0
+        self._seconds_total = 0.0
+        self._seconds_max = 0.0
+        self._rejected = 0
+        self._timeouts = 0
+
+    def init_app(self, app: Flask):
+        self.rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.pool_size = app.config['PASSWORD_HASH_POOL_SIZE']
+        self.concurrency = app.config['PASSWORD_HASH_CONCURRENCY'] or os.cpu_count() or 1
+        self.max_queue = app.config['PASSWORD_HASH_MAX_QUEUE']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        # Shared with the processes forked from this one
+        self._slots = multiprocessing.BoundedSemaphore(self.max_queue)
+        self._running = multiprocessing.BoundedSemaphore(self.concurrency)
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=self.pool_size)
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _get_batch_executor(self):
+        if self._batch_executor is None or self._batch_executor_pid != os.getpid():
+            self._batch_executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+            self._batch_executor_pid = os.getpid()
+        return self._batch_executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy('Password hashing queue is full')
+
+        with self._lock:
+            self._depth += 1
+        started = time.perf_counter()
+        try:
+            if not self._running.acquire(True, self.timeout):
+                self._timed_out()
+            if not self.pool_size:
+                try:
+                    return fn(*args)
+                finally:
+                    self._running.release()
+
+            # The slot is given back when the hash ends, not when we stop waiting
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BaseException:
+                self._running.release()
+                raise
+            future.add_done_callback(lambda _: self._running.release())
+            remaining = None if self.timeout is None else max(0.0, self.timeout - (time.perf_counter() - started))
+            try:
+                return future.result(timeout=remaining)
+            except FutureTimeout:
+                # Only takes effect while the hash is still queued in the pool
+                future.cancel()
+                self._timed_out()
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._depth -= 1
+                self._count += 1
+                self._seconds_total += elapsed
+                self._seconds_max = max(self._seconds_max, elapsed)
+            self._slots.release()
+
+    def _timed_out(self):
+        with self._lock:
+            self._timeouts += 1
+        raise PasswordHasherBusy('Password hashing timed out')
+
+    def hash(self, password):
+        if not password:
+            raise ValueError('Password must be non-empty.')
+        return self._run(hash_password, password, self.rounds)
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch of passwords on every core, for bulk imports. Bypasses
+        the request queue limit: the caller is a batch job that wants to
+        saturate the machine.
+        """
+        passwords = list(passwords)
+        if not all(passwords):
+            raise ValueError('Password must be non-empty.')
+
+        started = time.perf_counter()
+        rounds = [self.rounds] * len(passwords)
+        if self.pool_size:
+            chunksize = max(1, len(passwords) // ((os.cpu_count() or 1) * 4))
+            hashes = list(self._get_batch_executor().map(hash_password, passwords, rounds, chunksize=chunksize))
+        else:
+            hashes = list(map(hash_password, passwords, rounds))
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._count += len(hashes)
+            self._seconds_total += elapsed
+        return hashes
+
+    def verify(self, hashed, password):
+        if not hashed or not password:
+            return False
+        return self._run(check_password, hashed, password)
+
+    def needs_rehash(self, hashed):
+        """True when a stored hash was made with a different cost than configured"""
+        return hash_cost(hashed) != self.rounds
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'queue_depth': self._depth,
+                'queue_limit': self.max_queue,
+                'concurrency_limit': self.concurrency,
+                'hashes_total': self._count,
+                'hash_seconds_total': self._seconds_total,
+                'hash_seconds_max': self._seconds_max,
+                'rejected_total': self._rejected,
+                'timeouts_total': self._timeouts,
+            }
+
+
+password_hasher = PasswordHasher()
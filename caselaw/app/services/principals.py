@@ -0,0 +1,153 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import Flask, g, has_app_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.db.models import User, profile_image_url
+
+
+class Principal:
+    """
+    Read-only snapshot of an authenticated user.
+
+    It is detached from any session, so it can be shared between requests.
+    Routes that need to modify the user still load the ORM object.
+    """
+
+    def __init__(self, user):
+        self.id = user.id
+        self.type = user.type
+        self.email = user.email
+        self.roles = frozenset(user.get_role())
+        self.profile_image = user.profile_image
+        self.updated_at = user.updated_at
+        self._profile = user.to_json()
+        # Hashed once per snapshot: counters such as a lawyer's rating change
+        # without touching updated_at, so the content is the version
+        self.version = hashlib.sha1(repr(sorted(self._profile.items())).encode('utf-8')).hexdigest()
+
+    def has_role(self, name):
+        return name in self.roles
+
+    def get_role(self):
+        return sorted(self.roles)
+
+    def to_json(self):
+        # The image URL depends on the request host, so build it per request
+        return {**self._profile, 'profile_image': profile_image_url(self.profile_image)}
+
+
+class PrincipalCache:
+    """
+    Two-level cache of Principal snapshots keyed by user id: a per-request
+    memo on flask.g in front of a process-wide TTL/LRU.
+
+    Entries are dropped when a transaction that modified the user commits,
+    see the session hooks below. Other worker processes only notice such a
+    change when their entry expires, so the TTL bounds staleness across
+    workers.
+    """
+
+    def __init__(self):
+        self.ttl = 60
+        self.max_size = 10000
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app: Flask):
+        self.ttl = app.config['PRINCIPAL_CACHE_TTL']
+        self.max_size = app.config['PRINCIPAL_CACHE_SIZE']
+        self.clear()
+        app.extensions['principal_cache'] = self
+
+    def get(self, user_id):
+        """Principal for a user id, or None if there is no such user"""
+        memo = g.setdefault('_principals', {}) if has_app_context() else {}
+        if user_id in memo:
+            return memo[user_id]
+
+        principal = self._get_cached(user_id)
+        if principal is None:
+            self.misses += 1
+            user = User.query.filter_by(id=user_id).one_or_none()
+            if user is None:
+                return None
+            principal = Principal(user)
+            self._store(user_id, principal)
+        else:
+            self.hits += 1
+
+        memo[user_id] = principal
+        return principal
+
+    def _get_cached(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def _store(self, user_id, principal):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+        if has_app_context():
+            memo = g.get('_principals')
+            if memo:
+                for user_id in user_ids:
+                    memo.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def get_current_principal():
+    """Principal of the caller of a JWT-protected route, or None"""
+    return principal_cache.get(get_jwt_identity())
+
+
+# Invalidate on commit rather than on flush, so a concurrent request cannot
+# re-cache the old row between the change and its commit.
+STALE_KEY = 'stale_principals'
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_stale_principals(session, flush_context):
+    changed = [obj for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)]
+    if changed:
+        session.info.setdefault(STALE_KEY, set()).update(user.id for user in changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_stale_principals(session):
+    stale = session.info.pop(STALE_KEY, None)
+    if stale:
+        principal_cache.invalidate(*stale)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_stale_principals(session, previous_transaction):
+    session.info.pop(STALE_KEY, None)
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+from flask import Flask, current_app
+
+# Stored profile images are referenced by a 64 hex digit key; anything else
+# in User.profile_image is a legacy upload name or the default image
+IMAGE_KEY = re.compile(r'^[0-9a-f]{64}$')
+
+VARIANT_FORMAT = 'webp'
+VARIANT_MIMETYPE = 'image/webp'
+
+
+class InvalidImage(ValueError):
+    """Raised when an upload is not an image that can be processed"""
+
+
+class ProfileImageStore:
+    """
+    Profile image variants stored as files under
+    root/<aa>/<key>-<variant>.webp.
+
+    The key is the SHA-256 of all variants of an image, so a file never
+    changes once written and can be cached by clients forever.
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def init_app(self, app: Flask):
+        root = app.config['PROFILE_IMAGE_PATH']
+        if not os.path.isabs(root):
+            root = os.path.join(app.instance_path, root)
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        app.extensions['profile_image_store'] = self
+
+    def path(self, key, variant):
+        return os.path.join(self.root, key[:2], f'{key}-{variant}.{VARIANT_FORMAT}')
+
+    def exists(self, key, variant):
+        return os.path.exists(self.path(key, variant))
+
+    def save(self, variants):
+        """
+        Store the encoded variants of one image
+
+        Parameters:
+        variants (dict): Variant name to encoded bytes
+
+        Returns:
+        str: Key of the stored image
+        """
+        hasher = hashlib.sha256()
+        for name in sorted(variants):
+            hasher.update(name.encode('utf-8'))
+            hasher.update(variants[name])
+        key = hasher.hexdigest()
+
+        directory = os.path.dirname(self.path(key, ''))
+        os.makedirs(directory, exist_ok=True)
+        for name, data in variants.items():
+            path = self.path(key, name)
+            if os.path.exists(path):
+                continue
+            # Written under a temporary name and renamed, so a variant is
+            # never visible half-written
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+            try:
+                with os.fdopen(fd, 'wb') as tmp:
+                    tmp.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return key
+
+
+profile_image_store = ProfileImageStore()
+
+
+def encode_variants(stream):
+    """
+    Decode an uploaded image and re-encode it as square WebP variants of
+    the sizes in PROFILE_IMAGE_SIZES, center-cropped and without metadata.
+
+    Returns:
+    dict: Variant name to encoded bytes
+    """
+    # Imported here: only image uploads need Pillow, app startup does not
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    config = current_app.config
+    sizes = config['PROFILE_IMAGE_SIZES']
+    largest = max(sizes.values())
+
+    try:
+        image = Image.open(stream)
+        if image.width * image.height > config['PROFILE_IMAGE_MAX_PIXELS']:
+            raise InvalidImage('The image is too large')
+        # JPEG can decode at a reduced scale, much cheaper than decoding a
+        # full phone photo and shrinking it afterwards
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImage('The file is not a supported image') from e
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    # Never upscale: a small source gives small variants
+    edge = min(largest, image.width, image.height)
+    square = ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+
+    variants = {}
+    for name, size in sizes.items():
+        size = min(size, edge)
+        resized = square if size == edge else square.resize((size, size), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        resized.save(output, format=VARIANT_FORMAT, quality=config['PROFILE_IMAGE_QUALITY'], method=4)
+        variants[name] = output.getvalue()
+    return variants
+
+
+def store_profile_image(stream):
+    """
+    Process an uploaded profile image and store its variants
+
+    Returns:
+    str: Image key to keep in User.profile_image
+    """
+    return profile_image_store.save(encode_variants(stream))
@@ -0,0 +1,193 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from flask import Flask, current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.db.models import TokenRevocation, User, db
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for a capacity and error rate"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def issued_before(jwt_payload, timestamp):
+    """
+    Whether a token was issued before a point in time. 'iat' only has
+    second precision, so prefer the 'issued_at' claim added at creation.
+    """
+    if 'issued_at' in jwt_payload:
+        return jwt_payload['issued_at'] < timestamp
+    return jwt_payload.get('iat', 0) <= timestamp
+
+
+class RevocationFilter:
+    """
+    In-process view of the token_revocations table.
+
+    Revoked JTIs sit in a Bloom filter backed by an exact set, so the common
+    case (token not revoked) is answered by the filter alone. Per-user cut-offs
+    revoke every token issued before a point in time. The table is the source
+    of truth; each process pulls new rows at most every
+    REVOCATION_SYNC_INTERVAL seconds and rebuilds from scratch every
+    REVOCATION_REBUILD_INTERVAL seconds to forget expired entries.
+    """
+
+    def __init__(self):
+        self.sync_interval = 5
+        self.rebuild_interval = 3600
+        self.capacity = 100000
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._bloom = BloomFilter(self.capacity)
+        self._jtis = set()
+        self._user_cutoffs = {}
+        self._last_id = 0
+        self._last_sync = 0.0
+        self._last_rebuild = 0.0
+
+    def init_app(self, app: Flask):
+        self.sync_interval = app.config['REVOCATION_SYNC_INTERVAL']
+        self.rebuild_interval = app.config['REVOCATION_REBUILD_INTERVAL']
+        self.capacity = app.config['REVOCATION_FILTER_CAPACITY']
+        with self._lock:
+            self._reset()
+        app.extensions['revocation_filter'] = self
+
+    def _apply(self, revocation):
+        if revocation.jti:
+            self._bloom.add(revocation.jti)
+            self._jtis.add(revocation.jti)
+        if revocation.user_id:
+            cutoffs = self._user_cutoffs.setdefault(revocation.user_id, {})
+            revoked_at = revocation.revoked_at.replace(tzinfo=timezone.utc).timestamp()
+            cutoffs[revocation.token_type] = max(cutoffs.get(revocation.token_type, 0), revoked_at)
+        self._last_id = max(self._last_id, revocation.id)
+
+    def _load(self):
+        return db.session.query(
+            TokenRevocation.id, TokenRevocation.jti, TokenRevocation.user_id,
+            TokenRevocation.token_type, TokenRevocation.revoked_at
+        ).filter(
+            TokenRevocation.id > self._last_id,
+            TokenRevocation.expires_at > datetime.utcnow()
+        ).order_by(TokenRevocation.id).all()
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+
+        with self._lock:
+            if now - self._last_rebuild >= self.rebuild_interval:
+                self._reset()
+                self._last_rebuild = now
+
+            rows = self._load()
+            if len(self._jtis) + len(rows) > self.capacity:
+                # Grow the filter instead of letting its error rate climb
+                while len(self._jtis) + len(rows) > self.capacity:
+                    self.capacity *= 2
+                self._reset()
+                self._last_rebuild = now
+                rows = self._load()
+
+            for row in rows:
+                self._apply(row)
+            self._last_sync = now
+
+    def request_sync(self):
+        """Make the next check pull new revocations"""
+        self._last_sync = 0.0
+
+    def is_revoked(self, jwt_payload):
+        self.sync()
+
+        jti = jwt_payload.get('jti')
+        if jti and jti in self._bloom and jti in self._jtis:
+            return True
+
+        cutoffs = self._user_cutoffs.get(jwt_payload.get('sub'))
+        if cutoffs:
+            for token_type in (None, jwt_payload.get('type')):
+                if token_type in cutoffs and issued_before(jwt_payload, cutoffs[token_type]):
+                    return True
+        return False
+
+
+revocation_filter = RevocationFilter()
+
+
+def revoke_token(jwt_payload):
+    """Revoke a single decoded token until it expires. The caller commits."""
+    db.session.add(TokenRevocation(
+        jti=jwt_payload['jti'],
+        user_id=None,
+        token_type=jwt_payload.get('type'),
+        expires_at=datetime.utcfromtimestamp(jwt_payload['exp'])
+    ))
+    db.session.info['revocations_pending'] = True
+
+
+def _user_cutoff(user_id, token_type):
+    lifetime = current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    if token_type == 'access':
+        lifetime = current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    return TokenRevocation(user_id=user_id, token_type=token_type, expires_at=datetime.utcnow() + lifetime)
+
+
+def revoke_user(user_id, token_type=None):
+    """
+    Revoke every token of a user issued so far, optionally only one token
+    type. The caller commits.
+    """
+    db.session.add(_user_cutoff(user_id, token_type))
+    db.session.info['revocations_pending'] = True
+
+
+@event.listens_for(Session, 'before_flush')
+def _revoke_on_account_change(session, flush_context, instances):
+    for obj in list(session.dirty):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if state.attrs._password.history.has_changes() and not vars(obj).pop('_password_rehashed', False):
+            # A new password ends every session opened with the old one
+            session.add(_user_cutoff(obj.id, None))
+            session.info['revocations_pending'] = True
+        elif state.attrs.roles.history.has_changes():
+            # Access tokens carry role claims, so a role change must
+            # invalidate the ones already issued. Refresh tokens stay
+            # valid: /refresh re-reads roles.
+            session.add(_user_cutoff(obj.id, 'access'))
+            session.info['revocations_pending'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _sync_after_revocation(session):
+    if session.info.pop('revocations_pending', False):
+        revocation_filter.request_sync()
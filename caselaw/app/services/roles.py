@@ -0,0 +1,67 @@
+import threading
+from flask import Flask
+from sqlalchemy.orm import make_transient_to_detached
+from app.db.models import Role, db
+
+ROLE_NAMES = ('admin', 'lawyer', 'client')
+
+
+class RoleRegistry:
+    """
+    Process-wide registry of the role rows.
+
+    Roles are seeded once per database (`flask caselaw seed-roles`) and do
+    not change while the app runs, so each process reads them on first use
+    and hands out session-bound copies without querying again.
+    """
+
+    def __init__(self):
+        self._roles = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask):
+        self.clear()
+        app.extensions['role_registry'] = self
+
+    def _load(self):
+        roles = {}
+        for role_id, name in db.session.query(Role.id, Role.name):
+            role = Role(id=role_id, name=name)
+            make_transient_to_detached(role)
+            roles[name] = role
+        return roles
+
+    def get(self, name):
+        """The Role with this name attached to the current session, or None"""
+        if self._roles is None:
+            with self._lock:
+                if self._roles is None:
+                    self._roles = self._load()
+        role = self._roles.get(name)
+        if role is None:
+            return None
+        # load=False attaches a copy without a SELECT
+        return db.session.merge(role, load=False)
+
+    def clear(self):
+        with self._lock:
+            self._roles = None
+
+
+role_registry = RoleRegistry()
+
+
+def seed_roles():
+    """
+    Create the missing roles
+
+    Returns:
+    list: Names of the roles that were created
+    """
+    existing = {name for name, in db.session.query(Role.name)}
+    created = [name for name in ROLE_NAMES if name not in existing]
+    for name in created:
+        db.session.add(Role(name=name))
+    db.session.commit()
+    role_registry.clear()
+    return created
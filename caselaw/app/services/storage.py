@@ -0,0 +1,185 @@
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, current_app
+
+
+class DocumentStorage:
+    """
+    Content-addressed storage for case documents.
+
+    Blobs are identified by the hex SHA-256 of their content, so storing the
+    same file twice keeps a single copy. Backends implement save/open/exists/
+    delete; local_path is optional and lets callers hand a real file to the
+    web server.
+    """
+
+    def __init__(self, chunk_size=64 * 1024):
+        self.chunk_size = chunk_size
+
+    def save(self, stream):
+        """
+        Store the content of a readable binary stream
+
+        Parameters:
+        stream: File-like object, read in chunk_size pieces
+
+        Returns:
+        tuple: (sha256 hex digest, size in bytes)
+        """
+        raise NotImplementedError
+
+    def save_many(self, streams):
+        """
+        Store several streams, e.g. the attachments of one submission.
+        Backends override this when storing a batch can be cheaper than
+        storing each stream on its own.
+
+        Returns:
+        list: (sha256 hex digest, size in bytes) per stream, in order
+        """
+        return [self.save(stream) for stream in streams]
+
+    def save_bytes(self, data):
+        return self.save(io.BytesIO(data))
+
+    def open(self, sha256):
+        """Open a stored blob for binary reading"""
+        raise NotImplementedError
+
+    def exists(self, sha256):
+        raise NotImplementedError
+
+    def delete(self, sha256):
+        raise NotImplementedError
+
+    def local_path(self, sha256):
+        """Filesystem path of a stored blob, or None if the backend has none"""
+        return None
+
+
+class LocalDocumentStorage(DocumentStorage):
+    """Stores blobs as files under root/<aa>/<bb>/<sha256>"""
+
+    def __init__(self, root, chunk_size=64 * 1024):
+        super().__init__(chunk_size)
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def _spool(self, stream):
+        """
+        Copy a stream into a temporary file next to the final location, so
+        the rename in _publish is atomic and a half-written upload is never
+        visible. The file is not fsynced yet.
+
+        Returns:
+        tuple: (temporary path, sha256 hex digest, size in bytes)
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, hasher.hexdigest(), size
+
+    @staticmethod
+    def _fsync(path):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _publish(self, tmp_path, sha256):
+        path = self._path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+    def save(self, stream):
+        tmp_path, sha256, size = self._spool(stream)
+        try:
+            self._fsync(tmp_path)
+            self._publish(tmp_path, sha256)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256, size
+
+    def save_many(self, streams):
+        # Write everything first, then flush all files at once: the fsyncs
+        # overlap instead of each attachment waiting for its own flush.
+        spooled = []
+        try:
+            for stream in streams:
+                spooled.append(self._spool(stream))
+            if len(spooled) > 1:
+                with ThreadPoolExecutor(max_workers=min(len(spooled), 8)) as pool:
+                    list(pool.map(self._fsync, [tmp_path for tmp_path, _, _ in spooled]))
+            elif spooled:
+                self._fsync(spooled[0][0])
+            for tmp_path, sha256, _ in spooled:
+                self._publish(tmp_path, sha256)
+        except BaseException:
+            for tmp_path, _, _ in spooled:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+        return [(sha256, size) for _, sha256, size in spooled]
+
+    def open(self, sha256):
+        return open(self._path(sha256), 'rb')
+
+    def exists(self, sha256):
+        return os.path.exists(self._path(sha256))
+
+    def delete(self, sha256):
+        if self.exists(sha256):
+            os.remove(self._path(sha256))
+
+    def local_path(self, sha256):
+        return self._path(sha256)
+
+
+# Backends selectable through DOCUMENT_STORAGE_BACKEND
+STORAGE_BACKENDS = {
+    'local': LocalDocumentStorage,
+}
+
+
+def init_storage(app: Flask):
+    """Create the configured document storage backend for an app"""
+    backend = app.config['DOCUMENT_STORAGE_BACKEND']
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f'Unknown document storage backend: {backend}')
+
+    root = app.config['DOCUMENT_STORAGE_PATH']
+    if not os.path.isabs(root):
+        root = os.path.join(app.instance_path, root)
+
+    storage = STORAGE_BACKENDS[backend](root, chunk_size=app.config['DOCUMENT_STORAGE_CHUNK_SIZE'])
+    app.extensions['document_storage'] = storage
+    return storage
+
+
+def get_storage():
+    """Document storage of the current app"""
+    return current_app.extensions['document_storage']
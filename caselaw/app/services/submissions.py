@@ -0,0 +1,61 @@
+import mimetypes
+import uuid
+from datetime import datetime
+from sqlalchemy import insert
+from app.db.models import Case, Document, db
+from app.services.document_processing import enqueue_document_processing
+from app.services.storage import get_storage
+
+
+def create_case_with_documents(client_id, fields, attachments):
+    """
+    Create a case together with all its documents in one transaction.
+
+    The attachment blobs are stored first, in one batch (see
+    DocumentStorage.save_many), then the case, every Document row and a
+    process_document job per document (see
+    app.services.document_processing) are written and committed once. If
+    the database write fails nothing is committed; blobs already stored
+    stay behind unreferenced, which is harmless as storage is
+    content-addressed.
+
+    Parameters:
+    client_id (str): ID of the submitting client
+    fields (dict): Case columns (title, description, urgency, ...)
+    attachments (list): (file name, readable binary stream, MIME type or None) tuples
+
+    Returns:
+    Case: The new case
+    """
+    stored = get_storage().save_many(stream for _, stream, _ in attachments)
+
+    case = Case(id=str(uuid.uuid4()), client_id=client_id, status='Pending', **fields)
+    try:
+        db.session.add(case)
+        # The case row goes first: the documents reference it
+        db.session.flush()
+        if attachments:
+            now = datetime.utcnow()
+            document_ids = [str(uuid.uuid4()) for _ in attachments]
+            db.session.execute(insert(Document.__table__), [
+                {
+                    'id': document_id,
+                    'file_name': file_name,
+                    'sha256': sha256,
+                    'size': size,
+                    'mime_type': mime_type or mimetypes.guess_type(file_name)[0] or 'application/octet-stream',
+                    'case_id': case.id,
+                    'uploaded_by': client_id,
+                    'uploaded_at': now,
+                    'processing_status': 'pending',
+                }
+                for document_id, (file_name, _, mime_type), (sha256, size)
+                in zip(document_ids, attachments, stored)
+            ])
+            # Text extraction and the like run later on a worker
+            enqueue_document_processing(document_ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return case
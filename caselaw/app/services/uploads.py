@@ -0,0 +1,49 @@
+from tempfile import SpooledTemporaryFile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Parts up to this size stay in memory while the form is parsed, bigger
+# ones are spooled to a temporary file
+SPOOL_MEMORY_SIZE = 512 * 1024
+
+
+class LimitedSpooledFile(SpooledTemporaryFile):
+    """Spooled temporary file that refuses to grow beyond max_size bytes"""
+
+    def __init__(self, max_size):
+        super().__init__(max_size=SPOOL_MEMORY_SIZE, mode='w+b')
+        self.limit = max_size
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        if self.limit is not None and self.written > self.limit:
+            raise RequestEntityTooLarge(f'Each file must be at most {self.limit} bytes')
+        return super().write(data)
+
+
+class UploadRequest(Request):
+    """
+    Request class enforcing the upload limits while multipart bodies are
+    parsed.
+
+    MAX_CONTENT_LENGTH already rejects an oversized body before any of it
+    is read. On top of that every file part is spooled to a temporary file
+    as it arrives, and parsing stops with a 413 as soon as one part exceeds
+    MAX_DOCUMENT_SIZE or there are more than MAX_DOCUMENTS_PER_REQUEST file
+    parts, instead of after the whole body has been received.
+    """
+
+    file_parts = 0
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        self.file_parts += 1
+        max_files = config['MAX_DOCUMENTS_PER_REQUEST']
+        if max_files is not None and self.file_parts > max_files:
+            raise RequestEntityTooLarge(f'At most {max_files} files can be uploaded at once')
+
+        max_size = config['MAX_DOCUMENT_SIZE']
+        if max_size is not None and content_length is not None and content_length > max_size:
+            raise RequestEntityTooLarge(f'Each file must be at most {max_size} bytes')
+        return LimitedSpooledFile(max_size)
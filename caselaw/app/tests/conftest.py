@@ -1,10 +1,40 @@
 import pytest
 
 from app.app import create_app
+from app.config.config import TestingConfig
+from app.tests.query_plans import QueryPlanAudit
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'allow_table_scan(*tables): do not fail on unindexed scans of these tables',
+    )
+
+
+@pytest.fixture(scope='session')
+def query_plan_audit():
+    audit = QueryPlanAudit()
+    audit.install()
+    yield audit
+    audit.uninstall()
+
+
+@pytest.fixture(autouse=True)
+def audit_query_plans(request, query_plan_audit):
+    """Fail a test whose queries scan a large table without an index"""
+    marker = request.node.get_closest_marker('allow_table_scan')
+    query_plan_audit.start(allowed=marker.args if marker else ())
+    yield
+    if query_plan_audit.violations:
+        pytest.fail(query_plan_audit.report(), pytrace=False)
 
 
 @pytest.fixture
-def app():
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(TestingConfig, 'DOCUMENT_STORAGE_PATH', str(tmp_path / 'documents'))
+    monkeypatch.setattr(TestingConfig, 'LAWYER_INDEX_PATH', str(tmp_path / 'lawyer_index'))
+    monkeypatch.setattr(TestingConfig, 'PROFILE_IMAGE_PATH', str(tmp_path / 'profile_images'))
     app = create_app('testing')
     app.config.update({"TESTING": True})
     yield app
@@ -12,4 +42,4 @@ def app():
 
 @pytest.fixture
 def client(app):
-    return app.test_client()
\ No newline at end of file
+    return app.test_client()
@@ -0,0 +1,118 @@
+"""
+Query plan audit for the test suite.
+
+Every SELECT, UPDATE and DELETE the suite sends to SQLite is explained
+with EXPLAIN QUERY PLAN, once per distinct statement. A plan that reads
+a whole large table without an index ("SCAN cases", as opposed to
+"SEARCH cases USING INDEX ..." or "SCAN cases USING INDEX ...") is a
+violation, and the test that issued it fails (see conftest.py).
+
+Only statements issued by application code are audited; the queries
+tests make to check their results are not. Tests that make the
+application scan on purpose opt out with
+@pytest.mark.allow_table_scan('cases'), and functions that read whole
+tables by design are listed in EXPECTED_SCANS.
+"""
+import os
+import re
+import sys
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Tables that grow with usage. Lookup tables (roles, alembic_version) are
+# small enough that a scan is the cheapest plan.
+LARGE_TABLES = frozenset({
+    'users', 'clients', 'lawyers', 'user_roles', 'cases', 'documents',
+    'token_revocations', 'case_status_counts', 'jobs',
+})
+
+# Application functions that read whole tables by design, with the reason
+EXPECTED_SCANS = {
+    ('app/services/lawyer_directory.py', '_rebuild'): 'the directory snapshot holds every lawyer',
+}
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_ROOT = os.path.join(APP_ROOT, 'tests')
+
+_AUDITED = re.compile(r'^\s*(SELECT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+# "SCAN cases", "SCAN TABLE cases" (SQLite < 3.36); an index scan has a
+# USING clause. Aliased tables are reported by their alias.
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+_TABLE_ALIAS = re.compile(r'(?:\bFROM|\bJOIN|\()\s*(\w+) AS (\w+)', re.IGNORECASE)
+
+
+class QueryPlanAudit:
+    """Records the unindexed scans of large tables made by each statement"""
+
+    def __init__(self, large_tables=LARGE_TABLES):
+        self.large_tables = large_tables
+        self.plans = {}
+        self.violations = {}
+        self.allowed = frozenset()
+
+    def install(self):
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def uninstall(self):
+        event.remove(Engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def start(self, allowed=()):
+        """Start collecting for a test, ignoring scans of the allowed tables"""
+        self.violations = {}
+        self.allowed = frozenset(allowed)
+
+    def scans(self, statement, plan):
+        """The large tables a plan reads without an index"""
+        aliases = {alias: table for table, alias in _TABLE_ALIAS.findall(statement)}
+        tables = []
+        for detail in plan:
+            match = _SCAN.match(detail)
+            if match:
+                table = aliases.get(match.group(1), match.group(1))
+                if table in self.large_tables:
+                    tables.append(table)
+        return tables
+
+    @staticmethod
+    def origin():
+        """
+        The innermost application frame issuing the current statement
+
+        Returns:
+        tuple: (path, function, line), None if a test issued the statement
+        """
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(TESTS_ROOT):
+                return None
+            if filename.startswith(APP_ROOT):
+                path = os.path.relpath(filename, os.path.dirname(APP_ROOT)).replace(os.sep, '/')
+                return path, frame.f_code.co_name, frame.f_lineno
+            frame = frame.f_back
+        return None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or conn.dialect.name != 'sqlite' or not _AUDITED.match(statement):
+            return
+        origin = self.origin()
+        if origin is None or origin[:2] in EXPECTED_SCANS:
+            return
+        if statement not in self.plans:
+            rows = cursor.connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+            # Rows are (id, parent, notused, detail)
+            plan = [row[3] for row in rows]
+            self.plans[statement] = (plan, self.scans(statement, plan))
+        plan, scans = self.plans[statement]
+        scanned = [table for table in scans if table not in self.allowed]
+        if scanned:
+            self.violations.setdefault(statement, (origin, plan, scanned))
+
+    def report(self):
+        lines = []
+        for statement, (origin, plan, scanned) in self.violations.items():
+            path, function, line = origin
+            lines.append(f"Unindexed scan of {', '.join(scanned)} in {function} ({path}:{line}):")
+            lines.append(f'  {statement}')
+            lines.extend(f'    {detail}' for detail in plan)
+        return '\n'.join(lines)
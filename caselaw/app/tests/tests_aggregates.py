@@ -0,0 +1,74 @@
+from app.cli import caselaw_cli
+from app.db.models import Case, Lawyer, db
+from app.services.aggregates import reconcile_counters
+from app.services.claims import claim_case
+from app.tests.tests_cases import make_cases, make_lawyer
+
+
+class TestAggregates():
+    def test_rating_is_average_of_ratings(self, app):
+        with app.app_context():
+            lawyer = make_lawyer()
+            db.session.commit()
+
+            assert lawyer.rate_lawyer(5) == 5
+            assert lawyer.rate_lawyer(3) == 4
+            assert lawyer.rate_lawyer(1) == 3
+
+            lawyer = Lawyer.query.get(lawyer.id)
+            assert (lawyer.rating_sum, lawyer.rating_count, lawyer.rating) == (9, 3, 3)
+
+    def test_closing_and_reopening_move_active_cases(self, app):
+        with app.app_context():
+            lawyer = make_lawyer()
+            make_cases(2)
+            lawyer_id = lawyer.id
+            case_ids = [case.id for case in Case.query.all()]
+            for case_id in case_ids:
+                assert claim_case(case_id, lawyer_id)
+            db.session.commit()
+            assert Lawyer.query.get(lawyer_id).active_cases == 2
+
+            case = Case.query.get(case_ids[0])
+            assert case.update_status('Closed')
+            assert case.status == 'Closed'
+            # Closing twice only counts once
+            assert Case.query.get(case_ids[0]).update_status('Closed')
+            assert Lawyer.query.get(lawyer_id).active_cases == 1
+
+            assert Case.query.get(case_ids[0]).update_status('In Progress')
+            assert Lawyer.query.get(lawyer_id).active_cases == 2
+            assert not Case.query.get(case_ids[0]).update_status('Archived')
+
+    def test_reconcile_reports_and_fixes_drift(self, app):
+        with app.app_context():
+            lawyer = make_lawyer()
+            make_cases(3, lawyer=lawyer)
+            lawyer_id = lawyer.id
+            Case.query.first().update_status('Closed')
+
+            db.session.execute(
+                Lawyer.__table__.update().values(active_cases=7, rating_sum=8.0, rating_count=2, rating=1.0)
+            )
+            db.session.commit()
+
+            report = reconcile_counters(chunk_size=1, dry_run=True)
+            assert report['checked'] == 1
+            assert {(drift['counter'], drift['actual']) for drift in report['drift']} == {
+                ('active_cases', 2), ('rating', 4.0)
+            }
+            assert Lawyer.query.get(lawyer_id).active_cases == 7
+
+            assert len(reconcile_counters()['drift']) == 2
+            lawyer = Lawyer.query.get(lawyer_id)
+            assert (lawyer.active_cases, lawyer.rating) == (2, 4.0)
+            assert reconcile_counters()['drift'] == []
+
+    def test_reconcile_command(self, app):
+        with app.app_context():
+            make_lawyer()
+            db.session.commit()
+
+        result = app.test_cli_runner().invoke(caselaw_cli, ['reconcile-counters', '--dry-run'])
+        assert result.exit_code == 0
+        assert 'Checked 1 lawyers, found 0 drifted counters' in result.output
@@ -0,0 +1,259 @@
+import base64
+import json
+import multiprocessing
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.cli import caselaw_cli
+from app.db.models import Role, User, db
+from app.services import passwords
+from app.services.passwords import PasswordHasherBusy, hash_cost, password_hasher
+from app.services.principals import Principal, principal_cache
+from app.services.revocation import BloomFilter
+
+
+def decode_token_claims(token):
+    payload = token.split('.')[1]
+    return json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+
+
+def register(client, email='ada@example.com', password='s3cret-pass'):
+    return client.post('/api/auth/register', json={
+        'firstName': 'Ada',
+        'lastName': 'Client',
+        'email': email,
+        'password': password,
+        'userType': 'client',
+    })
+
+
+class TestPasswordHashing():
+    def test_register_and_login(self, client):
+        assert register(client).status_code == 201
+
+        response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 's3cret-pass'})
+        assert response.status_code == 200
+
+        response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 'wrong'})
+        assert response.status_code == 401
+
+    def test_login_rehashes_outdated_cost(self, app, client, monkeypatch):
+        register(client)
+        monkeypatch.setattr(password_hasher, 'rounds', 5)
+
+        response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 's3cret-pass'})
+        assert response.status_code == 200
+        with app.app_context():
+            user = User.query.filter_by(email='ada@example.com').first()
+            assert hash_cost(user._password) == 5
+
+    def test_process_pool(self, app, monkeypatch):
+        monkeypatch.setattr(password_hasher, 'pool_size', 2)
+        try:
+            hashed = password_hasher.hash('s3cret-pass')
+            assert password_hasher.verify(hashed, 's3cret-pass')
+            assert not password_hasher.verify(hashed, 'wrong')
+        finally:
+            password_hasher._get_executor().shutdown()
+            password_hasher._executor = None
+
+    def test_full_queue_is_rejected(self, app, client, monkeypatch):
+        monkeypatch.setattr(password_hasher, '_slots', threading.BoundedSemaphore(1))
+        password_hasher._slots.acquire()
+
+        with pytest.raises(PasswordHasherBusy):
+            password_hasher.hash('s3cret-pass')
+        assert register(client).status_code == 503
+        assert password_hasher.metrics()['rejected_total'] >= 1
+
+    def test_bound_is_shared_by_forked_workers(self, app, client, monkeypatch):
+        app.config.update(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_MAX_QUEUE=2)
+        password_hasher.init_app(app)
+        release = multiprocessing.Event()
+
+        def slow_hash(password, rounds):
+            release.wait(10)
+            return 'hashed'
+
+        def wait_for(condition):
+            deadline = time.monotonic() + 10
+            while not condition():
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+
+        monkeypatch.setattr(passwords, 'hash_password', slow_hash)
+        # One hash running in another worker process, one waiting here
+        worker = multiprocessing.get_context('fork').Process(target=password_hasher.hash, args=('s3cret-pass',))
+        worker.start()
+        wait_for(lambda: password_hasher._running.get_value() == 0)
+        waiting = threading.Thread(target=password_hasher.hash, args=('s3cret-pass',))
+        waiting.start()
+        wait_for(lambda: password_hasher._slots.get_value() == 0)
+        try:
+            with pytest.raises(PasswordHasherBusy, match='full'):
+                password_hasher.hash('s3cret-pass')
+            assert register(client).status_code == 503
+            assert password_hasher.metrics()['rejected_total'] >= 2
+        finally:
+            release.set()
+            worker.join(10)
+            waiting.join(10)
+        assert worker.exitcode == 0
+        assert password_hasher._slots.get_value() == 2
+
+    def test_timeout_is_rejected(self, app, client, monkeypatch):
+        register(client)
+        monkeypatch.setattr(password_hasher, 'pool_size', 1)
+        monkeypatch.setattr(password_hasher, 'timeout', 0)
+        try:
+            response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 's3cret-pass'})
+            assert response.status_code == 503
+            assert password_hasher.metrics()['timeouts_total'] >= 1
+        finally:
+            password_hasher._get_executor().shutdown()
+            password_hasher._executor = None
+
+
+class TestPrincipalCache():
+    def test_warm_cache_costs_no_identity_queries(self, app, client):
+        token = register(client).json['data']['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        assert client.get('/api/auth/me', headers=headers).status_code == 200
+
+        with app.app_context():
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        response = client.get('/api/auth/me', headers=headers)
+        assert response.status_code == 200
+        assert response.json['data']['user']['email'] == 'ada@example.com'
+        assert statements == []
+
+    def test_profile_update_invalidates(self, app, client):
+        data = register(client).json['data']
+        headers = {'Authorization': f"Bearer {data['access_token']}"}
+        assert client.get('/api/auth/me', headers=headers).json['data']['user']['firstname'] == 'Ada'
+
+        with app.app_context():
+            User.query.get(data['user']['id']).update_profile({'firstname': 'Grace'})
+
+        assert client.get('/api/auth/me', headers=headers).json['data']['user']['firstname'] == 'Grace'
+
+    def test_role_change_invalidates(self, app, client):
+        data = register(client).json['data']
+        headers = {'Authorization': f"Bearer {data['access_token']}"}
+        assert client.get('/api/auth/me', headers=headers).json['data']['user']['roles'] == ['client']
+
+        with app.app_context():
+            user = User.query.get(data['user']['id'])
+            user.add_role(Role.query.filter_by(name='admin').first())
+            db.session.commit()
+
+        # The old access token is revoked by the role change, log in again
+        token = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 's3cret-pass'}).json['data']['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        assert sorted(client.get('/api/auth/me', headers=headers).json['data']['user']['roles']) == ['admin', 'client']
+
+
+class TestTokenClaims():
+    def test_claims_authorize_routes(self, client):
+        token = register(client).json['data']['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        assert decode_token_claims(token)['roles'] == ['client']
+        assert client.get('/api/lawyer/assigned-cases', headers=headers).status_code == 403
+
+    def test_logout_revokes_token(self, client):
+        token = register(client).json['data']['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        assert client.post('/api/auth/logout', headers=headers).status_code == 200
+        response = client.get('/api/auth/me', headers=headers)
+        assert response.status_code == 401
+        assert response.json['code'] == 'token_revoked'
+
+    def test_role_change_revokes_access_tokens(self, app, client):
+        data = register(client).json['data']
+        headers = {'Authorization': f"Bearer {data['access_token']}"}
+
+        with app.app_context():
+            user = User.query.get(data['user']['id'])
+            user.remove_role(Role.query.filter_by(name='client').first())
+            db.session.commit()
+
+        assert client.get('/api/auth/me', headers=headers).status_code == 401
+        refresh_headers = {'Authorization': f"Bearer {data['refresh_token']}"}
+        response = client.post('/api/auth/refresh', headers=refresh_headers)
+        assert response.status_code == 200
+        assert decode_token_claims(response.json['data']['access_token'])['roles'] == []
+
+
+    def test_refresh_ignores_stale_cached_roles(self, app, client):
+        data = register(client).json['data']
+        refresh_headers = {'Authorization': f"Bearer {data['refresh_token']}"}
+
+        with app.test_request_context():
+            user = User.query.get(data['user']['id'])
+            stale = Principal(user)
+            user.remove_role(Role.query.filter_by(name='client').first())
+            db.session.commit()
+            # Another worker still holds the snapshot from before the change
+            principal_cache._store(user.id, stale)
+
+        response = client.post('/api/auth/refresh', headers=refresh_headers)
+        assert response.status_code == 200
+        assert decode_token_claims(response.json['data']['access_token'])['roles'] == []
+
+    def test_password_change_revokes_every_token(self, app, client):
+        data = register(client).json['data']
+        headers = {'Authorization': f"Bearer {data['access_token']}"}
+        refresh_headers = {'Authorization': f"Bearer {data['refresh_token']}"}
+
+        with app.app_context():
+            User.query.get(data['user']['id']).password = 'n3w-pass'
+            db.session.commit()
+
+        assert client.get('/api/auth/me', headers=headers).status_code == 401
+        assert client.post('/api/auth/refresh', headers=refresh_headers).status_code == 401
+
+        response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 'n3w-pass'})
+        headers = {'Authorization': f"Bearer {response.json['data']['access_token']}"}
+        assert client.get('/api/auth/me', headers=headers).status_code == 200
+
+    def test_rehash_keeps_tokens(self, client, monkeypatch):
+        token = register(client).json['data']['access_token']
+        monkeypatch.setattr(password_hasher, 'rounds', 5)
+
+        client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 's3cret-pass'})
+        assert client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+    def test_revoke_tokens_command(self, app, client):
+        data = register(client).json['data']
+        headers = {'Authorization': f"Bearer {data['access_token']}"}
+        refresh_headers = {'Authorization': f"Bearer {data['refresh_token']}"}
+
+        with app.app_context():
+            result = app.test_cli_runner().invoke(caselaw_cli, ['revoke-tokens', 'ada@example.com', '--type', 'access'])
+        assert result.exit_code == 0, result.output
+        assert client.get('/api/auth/me', headers=headers).status_code == 401
+        assert client.post('/api/auth/refresh', headers=refresh_headers).status_code == 200
+
+        with app.app_context():
+            result = app.test_cli_runner().invoke(caselaw_cli, ['revoke-tokens', 'ada@example.com'])
+        assert result.exit_code == 0, result.output
+        assert client.post('/api/auth/refresh', headers=refresh_headers).status_code == 401
+
+
+class TestBloomFilter():
+    def test_membership(self):
+        bloom = BloomFilter(1000)
+        keys = [f'jti-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        assert false_positives < 50
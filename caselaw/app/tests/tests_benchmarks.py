@@ -0,0 +1,28 @@
+from app.services.aggregates import reconcile_counters
+from app.services.lawyer_directory import lawyer_directory
+from app.services.profile_images import store_profile_image
+from app.tests.tests_profile_images import make_image
+from benchmarks.datasets import seed_dataset
+from benchmarks.scenarios import SCENARIOS, load_fixtures, uncovered_endpoints
+
+
+class TestBenchmarkSuite():
+    def test_dataset_is_consistent(self, app):
+        with app.app_context():
+            counts = seed_dataset(200, seed=1)
+            assert counts == {'users': 201, 'lawyers': 20, 'cases': 200, 'documents': 200}
+            assert reconcile_counters(dry_run=True)['drift'] == []
+
+    def test_every_endpoint_has_a_working_scenario(self, app, client):
+        with app.app_context():
+            assert uncovered_endpoints(app) == []
+            profile_image = store_profile_image(make_image((64, 64)))
+            seed_dataset(200, seed=1, profile_image=profile_image)
+            lawyer_directory.rebuild()
+            fixtures = load_fixtures(profile_image, make_image((64, 64)).getvalue())
+
+        for i, scenario in enumerate(SCENARIOS):
+            with app.app_context():
+                kwargs = scenario.build(fixtures, i)
+            response = client.open(kwargs.pop('path'), **kwargs)
+            assert response.status_code in scenario.statuses, (scenario.endpoint, response.get_data(as_text=True))
@@ -0,0 +1,141 @@
+import uuid
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from werkzeug.datastructures import MultiDict
+
+from app.db.models import Case, Client, Lawyer, Role, db
+from app.db.pagination import InvalidPageRequest, paginate_cases
+from app.db.serializers import serialize_cases
+
+
+def make_client(email='client@example.com'):
+    client = Client(email=email, firstname='Ada', lastname='Client')
+    client._password = 'x'
+    client.add_role(Role.query.filter_by(name='client').first())
+    db.session.add(client)
+    return client
+
+
+def make_lawyer(email='lawyer@example.com', bar_number='BAR-1'):
+    lawyer = Lawyer(email=email, firstname='Lee', lastname='Lawyer', bar_number=bar_number, active_cases=0)
+    lawyer._password = 'x'
+    lawyer.add_role(Role.query.filter_by(name='lawyer').first())
+    db.session.add(lawyer)
+    return lawyer
+
+
+def make_cases(count, lawyer=None):
+    for i in range(count):
+        client = make_client(f'{uuid.uuid4()}@example.com')
+        db.session.add(Case(title=f'Case {i}', description='...', client=client, lawyer=lawyer))
+    db.session.commit()
+
+
+def count_queries(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
+@pytest.mark.allow_table_scan('cases')
+class TestCaseSerialization():
+    def serialize(self):
+        db.session.expire_all()
+        return count_queries(lambda: serialize_cases(Case.query.order_by(Case.created_at)))
+
+    def test_query_count_is_constant(self, app):
+        with app.app_context():
+            lawyer = make_lawyer()
+            make_cases(2, lawyer)
+            small, small_queries = self.serialize()
+
+            make_cases(25, lawyer)
+            large, large_queries = self.serialize()
+
+            assert len(small) == 2
+            assert len(large) == 27
+            assert small_queries == large_queries
+
+    def test_output_matches_to_summary_json(self, app):
+        with app.app_context():
+            lawyer = make_lawyer()
+            make_cases(3, lawyer)
+            make_cases(1)
+
+            serialized, _ = self.serialize()
+            expected = [case.to_summary_json() for case in Case.query.order_by(Case.created_at).all()]
+
+            assert serialized == expected
+            assert serialized[0]['client'] == 'Ada Client'
+            assert serialized[0]['lawyer'] == 'Lee Lawyer'
+            assert serialized[-1]['lawyer'] is None
+
+
+class TestCasePagination():
+    @pytest.mark.allow_table_scan('cases')
+    def test_pages_are_disjoint_and_complete(self, app):
+        with app.app_context():
+            make_cases(7)
+            seen = []
+            args = MultiDict({'limit': 3})
+            while True:
+                page, cursor = paginate_cases(Case.query, args)
+                seen.extend(case['id'] for case in page)
+                if not cursor:
+                    break
+                args = MultiDict({'limit': 3, 'cursor': cursor})
+
+            expected = [case.id for case in Case.query.order_by(Case.created_at.desc(), Case.id.desc())]
+            assert seen == expected
+
+    def test_filters_and_invalid_cursor(self, app):
+        with app.app_context():
+            make_cases(3)
+            Case.query.first().urgency = 'high'
+            db.session.commit()
+
+            page, cursor = paginate_cases(Case.query, MultiDict({'urgency': 'high'}))
+            assert len(page) == 1 and cursor is None
+
+            with pytest.raises(InvalidPageRequest):
+                paginate_cases(Case.query, MultiDict({'cursor': 'not-a-cursor'}))
+
+
+class TestCaseProjections():
+    @pytest.mark.allow_table_scan('cases')
+    def test_summary_skips_long_text(self, app):
+        with app.app_context():
+            make_cases(2)
+            db.session.expire_all()
+
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+            serialized = serialize_cases(Case.query)
+
+            assert 'description' not in serialized[0]
+            assert not any('cases.description' in statement for statement in statements)
+            assert not any('special_requirements' in statement for statement in statements)
+
+    def test_detail_endpoint(self, app, client):
+        with app.app_context():
+            make_cases(1)
+            case = Case.query.first()
+            case_id = case.id
+            headers = {'Authorization': f'Bearer {create_access_token(identity=case.client)}'}
+
+        response = client.get(f'/api/cases/{case_id}', headers=headers)
+        assert response.status_code == 200
+        details = response.json['case']
+        assert details['description'] == '...'
+        assert details['client']['firstname'] == 'Ada'
+        assert details['documents'] == []
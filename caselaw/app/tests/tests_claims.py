@@ -0,0 +1,98 @@
+import threading
+from collections import Counter
+
+from flask_jwt_extended import create_access_token
+
+from app.db.models import Case, Lawyer, db
+from app.services.claims import claim_case, claim_next_case
+from app.tests.tests_cases import make_cases, make_client, make_lawyer
+
+
+class TestCaseClaims():
+    def test_claim_next_takes_most_urgent_first(self, app, client):
+        with app.app_context():
+            lawyer = make_lawyer()
+            make_cases(2)
+            urgent = Case(title='Eviction', description='...', urgency='urgent', client=make_client())
+            db.session.add(urgent)
+            db.session.commit()
+            urgent_id = urgent.id
+            headers = {'Authorization': f'Bearer {create_access_token(identity=lawyer)}'}
+
+        response = client.post('/api/lawyer/claim-next', headers=headers)
+        assert response.status_code == 200
+        assert response.json['case']['id'] == urgent_id
+        assert response.json['case']['status'] == 'Under Review'
+
+    def test_claimed_case_cannot_be_claimed_again(self, app):
+        with app.app_context():
+            first = make_lawyer()
+            second = make_lawyer('second@example.com', 'BAR-2')
+            make_cases(1)
+            case_id = Case.query.first().id
+            assert first.id and second.id
+
+            assert claim_case(case_id, first.id)
+            db.session.commit()
+            assert not claim_case(case_id, second.id)
+            assert Case.query.get(case_id).lawyer_id == first.id
+            assert Lawyer.query.get(first.id).active_cases == 1
+            assert Lawyer.query.get(second.id).active_cases == 0
+
+    def test_lost_claim_keeps_pending_work(self, app):
+        with app.app_context():
+            first = make_lawyer()
+            second = make_lawyer('second@example.com', 'BAR-2')
+            make_cases(1)
+            case_id = Case.query.first().id
+            second_id = second.id
+            assert first.accept_case(case_id)
+
+            second.specialization = 'Tax'
+            db.session.add(Case(title='Unrelated', description='...', client=make_client('other@example.com')))
+            assert not second.accept_case(case_id)
+            db.session.commit()
+
+            assert Lawyer.query.get(second_id).specialization == 'Tax'
+            assert Case.query.filter_by(title='Unrelated').count() == 1
+
+    def test_concurrent_claims_never_double_assign(self, app):
+        case_count, thread_count = 60, 12
+        with app.app_context():
+            lawyers = [make_lawyer(f'lawyer{i}@example.com', f'BAR-{i}') for i in range(thread_count)]
+            make_cases(case_count)
+            lawyer_ids = [lawyer.id for lawyer in lawyers]
+
+        claimed = {lawyer_id: [] for lawyer_id in lawyer_ids}
+        errors = []
+        start = threading.Barrier(thread_count)
+
+        def worker(lawyer_id):
+            try:
+                with app.app_context():
+                    start.wait()
+                    while True:
+                        case_id = claim_next_case(lawyer_id)
+                        if not case_id:
+                            break
+                        db.session.commit()
+                        claimed[lawyer_id].append(case_id)
+                    db.session.remove()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(lawyer_id,)) for lawyer_id in lawyer_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        all_claims = [case_id for case_ids in claimed.values() for case_id in case_ids]
+        assert len(all_claims) == case_count
+        assert Counter(all_claims).most_common(1)[0][1] == 1
+
+        with app.app_context():
+            for lawyer_id, case_ids in claimed.items():
+                assert Lawyer.query.get(lawyer_id).active_cases == len(case_ids)
+                assert {case.id for case in Case.query.filter_by(lawyer_id=lawyer_id)} == set(case_ids)
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+from werkzeug.http import http_date
+
+from app.db.models import Case, Client, Lawyer, db
+from app.services.aggregates import change_case_status
+from app.services.claims import claim_case
+from app.tests.tests_cases import count_queries, make_client, make_lawyer
+
+
+def auth(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=user)}'}
+
+
+class TestConditionalGet():
+    def setup_cases(self):
+        client, lawyer = make_client(), make_lawyer()
+        db.session.add_all([Case(title=f'Case {i}', description='...', client=client) for i in range(3)])
+        db.session.commit()
+        for case in Case.query.limit(2):
+            claim_case(case.id, lawyer.id)
+        db.session.commit()
+        return client.id, auth(client), lawyer.id, auth(lawyer)
+
+    def test_client_cases_revalidate(self, app, client):
+        with app.app_context():
+            client_id, headers, _, _ = self.setup_cases()
+        url = f'/api/client/cases/{client_id}'
+
+        first = client.get(url, headers=headers)
+        assert first.status_code == 200
+        etag = first.headers['ETag']
+        assert etag.startswith('W/"')
+        assert first.headers['Cache-Control'] == 'private, no-cache'
+
+        again = client.get(url, headers={**headers, 'If-None-Match': etag})
+        assert again.status_code == 304
+        assert again.data == b''
+        assert again.headers['ETag'] == etag
+
+        # Other arguments are another representation
+        assert client.get(f'{url}?limit=1', headers={**headers, 'If-None-Match': etag}).status_code == 200
+
+        with app.app_context():
+            change_case_status(Case.query.filter(Case.lawyer_id.isnot(None)).first().id, 'In Progress')
+            db.session.commit()
+        changed = client.get(url, headers={**headers, 'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+
+    def test_party_rename_changes_the_version(self, app, client):
+        with app.app_context():
+            client_id, headers, lawyer_id, _ = self.setup_cases()
+        url = f'/api/client/cases/{client_id}'
+        etag = client.get(url, headers=headers).headers['ETag']
+
+        with app.app_context():
+            lawyer = Lawyer.query.get(lawyer_id)
+            lawyer.firstname = 'Renamed'
+            db.session.commit()
+        assert client.get(url, headers={**headers, 'If-None-Match': etag}).status_code == 200
+
+    def test_not_modified_skips_serialization(self, app):
+        with app.app_context():
+            _, _, _, headers = self.setup_cases()
+
+        test_client = app.test_client()
+        etag = test_client.get('/api/lawyer/assigned-cases', headers=headers).headers['ETag']
+        with app.app_context():
+            response, queries = count_queries(lambda: test_client.get(
+                '/api/lawyer/assigned-cases', headers={**headers, 'If-None-Match': etag}
+            ))
+        assert response.status_code == 304
+        assert queries == 1
+
+    def test_removed_case_is_not_hidden_by_if_modified_since(self, app, client):
+        with app.app_context():
+            client_id, headers, _, _ = self.setup_cases()
+        url = f'/api/client/cases/{client_id}'
+
+        first = client.get(url, headers=headers)
+        assert 'Last-Modified' not in first.headers
+        etag = first.headers['ETag']
+
+        with app.app_context():
+            db.session.delete(Case.query.filter_by(lawyer_id=None).one())
+            db.session.commit()
+
+        later = http_date(datetime.utcnow() + timedelta(days=1))
+        response = client.get(url, headers={**headers, 'If-Modified-Since': later})
+        assert response.status_code == 200
+        assert len(response.json['data']) == 2
+        # If-None-Match decides when both are sent
+        response = client.get(url, headers={**headers, 'If-None-Match': etag, 'If-Modified-Since': later})
+        assert response.status_code == 200
+        assert client.get(url, headers={**headers, 'If-None-Match': response.headers['ETag'],
+                                         'If-Modified-Since': http_date(datetime(2000, 1, 1))}).status_code == 304
+
+    def test_me_revalidates(self, app, client):
+        with app.app_context():
+            user = make_client()
+            db.session.commit()
+            headers = auth(user)
+            user_id = user.id
+
+        etag = client.get('/api/auth/me', headers=headers).headers['ETag']
+        assert client.get('/api/auth/me', headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+        with app.app_context():
+            user = Client.query.get(user_id)
+            user.firstname = 'Grace'
+            db.session.commit()
+        response = client.get('/api/auth/me', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.json['data']['user']['firstname'] == 'Grace'
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy.dialects import mysql
+
+from app.db.models import Case, CaseStatusCount, db
+from app.services.claims import claim_case
+from app.services.dashboard import apply_status_changes, get_status_counts, rebuild_status_counts
+from app.tests.tests_cases import count_queries, make_client, make_lawyer
+
+
+def stored_counts():
+    return sorted((row.user_id, row.status, row.count) for row in CaseStatusCount.query if row.count)
+
+
+class TestDashboard():
+    def test_counts_follow_case_lifecycle(self, app):
+        with app.app_context():
+            client, lawyer = make_client(), make_lawyer()
+            cases = [Case(title=f'Case {i}', description='...', client=client) for i in range(3)]
+            db.session.add_all(cases)
+            db.session.commit()
+            case_ids = [case.id for case in cases]
+            assert get_status_counts(client.id) == {'Pending': 3}
+
+            assert claim_case(case_ids[0], lawyer.id)
+            assert claim_case(case_ids[1], lawyer.id)
+            db.session.commit()
+            Case.query.get(case_ids[1]).update_status('Closed')
+            assert get_status_counts(client.id) == {'Pending': 1, 'Under Review': 1, 'Closed': 1}
+            assert get_status_counts(lawyer.id) == {'Under Review': 1, 'Closed': 1}
+
+            case = Case.query.get(case_ids[0])
+            case.status = 'In Progress'
+            db.session.commit()
+            db.session.delete(Case.query.get(case_ids[2]))
+            db.session.commit()
+            assert get_status_counts(client.id) == {'In Progress': 1, 'Closed': 1}
+            assert get_status_counts(lawyer.id) == {'In Progress': 1, 'Closed': 1}
+
+            incremental = stored_counts()
+            rebuild_status_counts()
+            assert stored_counts() == incremental
+
+    def test_dashboard_endpoints(self, app, client):
+        with app.app_context():
+            owner, lawyer = make_client(), make_lawyer()
+            db.session.add_all([Case(title=f'Case {i}', description='...', client=owner) for i in range(2)])
+            db.session.commit()
+            claim_case(Case.query.first().id, lawyer.id)
+            db.session.commit()
+            client_headers = {'Authorization': f'Bearer {create_access_token(identity=owner)}'}
+            lawyer_headers = {'Authorization': f'Bearer {create_access_token(identity=lawyer)}'}
+            lawyer_id = lawyer.id
+
+        response = client.get('/api/client/dashboard', headers=client_headers)
+        assert response.status_code == 200
+        assert response.json['status_counts'] == {'Pending': 1, 'Under Review': 1}
+        assert response.json['total_cases'] == 2
+
+        response = client.get('/api/lawyer/dashboard', headers=lawyer_headers)
+        assert response.status_code == 200
+        assert response.json['status_counts'] == {'Under Review': 1}
+
+        assert client.get('/api/lawyer/dashboard', headers=client_headers).status_code == 403
+
+        with app.app_context():
+            _, queries = count_queries(lambda: get_status_counts(lawyer_id))
+            assert queries == 1
+
+    def test_unsupported_dialect_is_refused(self):
+        connection = SimpleNamespace(dialect=mysql.dialect())
+        with pytest.raises(NotImplementedError, match='mysql'):
+            apply_status_changes(connection, [(None, ('client-1', None, 'Pending'))])
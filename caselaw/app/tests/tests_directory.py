@@ -0,0 +1,131 @@
+import fcntl
+import os
+
+from flask_jwt_extended import create_access_token
+
+from app.db.models import Job, Lawyer, db
+from app.services.aggregates import adjust_active_cases
+from app.services.jobs import run_worker
+from app.services.lawyer_directory import PATCH_JOB, LawyerDirectory, lawyer_directory
+from app.tests.tests_cases import make_client, make_lawyer
+
+
+def add_lawyer(index, specialization, rating=0.0, active_cases=0):
+    lawyer = make_lawyer(f'lawyer{index}@example.com', f'BAR-{index}')
+    lawyer.specialization = specialization
+    lawyer.rating = rating
+    lawyer.active_cases = active_cases
+    return lawyer
+
+
+class TestLawyerDirectory():
+    def test_ranking(self, app):
+        with app.app_context():
+            exact = add_lawyer(1, 'Family Law', rating=3.0)
+            prefix = add_lawyer(2, 'Family Law - Custody', rating=4.0)
+            busy = add_lawyer(3, 'family law', rating=3.0, active_cases=20)
+            add_lawyer(4, 'Criminal Defense', rating=5.0)
+            db.session.commit()
+            lawyer_directory.rebuild()
+
+            results = lawyer_directory.search('family law')
+            assert [result['id'] for result in results] == [exact.id, busy.id, prefix.id]
+
+            results = lawyer_directory.search('custody')
+            assert [result['id'] for result in results] == [prefix.id]
+
+            assert lawyer_directory.search('tax') == []
+
+    def test_changes_are_patched_in_and_shared(self, app):
+        app.config['LAWYER_INDEX_PATCH_DELAY'] = 0
+        with app.app_context():
+            lawyer = add_lawyer(1, 'Tax')
+            db.session.commit()
+            lawyer_directory.rebuild()
+            version = lawyer_directory._version
+
+            lawyer.specialization = 'Immigration'
+            newcomer = add_lawyer(2, 'Immigration', rating=4.0)
+            db.session.commit()
+            lawyer_id, newcomer_id = lawyer.id, newcomer.id
+            # Committing only queues the patch
+            assert lawyer_directory._current_version() == version
+            assert run_worker(burst=True) == 1
+
+            # A second process sees the new snapshot without a database query
+            other = LawyerDirectory()
+            other.path = lawyer_directory.path
+            results = other.search('immigration')
+            assert [result['id'] for result in results] == [newcomer_id, lawyer_id]
+            assert other.search('tax') == []
+
+            db.session.delete(Lawyer.query.get(newcomer_id))
+            db.session.commit()
+            run_worker(burst=True)
+            assert [result['id'] for result in lawyer_directory.search('immigration')] == [lawyer_id]
+
+    def test_queued_patches_are_coalesced(self, app):
+        app.config['LAWYER_INDEX_PATCH_DELAY'] = 0
+        with app.app_context():
+            lawyers = [add_lawyer(i, 'Tax') for i in range(3)]
+            db.session.commit()
+            lawyer_ids = [lawyer.id for lawyer in lawyers]
+            run_worker(burst=True)
+
+            for active_cases, lawyer_id in enumerate(lawyer_ids, 1):
+                adjust_active_cases(lawyer_id, active_cases)
+                db.session.commit()
+            assert Job.query.filter_by(kind=PATCH_JOB, status='queued').count() == 3
+
+            assert run_worker(burst=True) == 1
+            assert Job.query.filter_by(kind=PATCH_JOB, status='queued').count() == 0
+            results = lawyer_directory.search('tax')
+            assert {result['id']: result['active_cases'] for result in results} == {
+                lawyer_id: active_cases for active_cases, lawyer_id in enumerate(lawyer_ids, 1)
+            }
+
+    def test_rows_are_read_under_the_lock(self, app, monkeypatch):
+        with app.app_context():
+            lawyer_id = add_lawyer(1, 'Tax').id
+            db.session.commit()
+            query = lawyer_directory._query
+            locked = []
+
+            def checking_query():
+                with open(os.path.join(lawyer_directory.path, '.lock'), 'w') as probe:
+                    try:
+                        fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        locked.append(False)
+                    except BlockingIOError:
+                        locked.append(True)
+                return query()
+
+            monkeypatch.setattr(lawyer_directory, '_query', checking_query)
+            lawyer_directory.rebuild()
+            lawyer_directory.patch([lawyer_id])
+            assert locked == [True, True]
+
+    def test_get_lawyers_endpoint(self, app, client):
+        with app.app_context():
+            lawyer = add_lawyer(1, 'Employment')
+            user = make_client()
+            db.session.commit()
+            lawyer_id = lawyer.id
+            headers = {'Authorization': f'Bearer {create_access_token(identity=user)}'}
+
+        response = client.post('/api/client/get-lawyers', json={'specialization': 'employ'}, headers=headers)
+        assert response.status_code == 200
+        assert response.json['data']['lawyers'][0]['id'] == lawyer_id
+
+        response = client.post('/api/client/get-lawyers', json={'specialization': 'maritime'}, headers=headers)
+        assert response.status_code == 404
+
+        response = client.post('/api/client/get-lawyers', json={'specialization': 'employ', 'limit': 'ten'},
+                               headers=headers)
+        assert response.status_code == 400
+
+        for limit in (0, -5):
+            response = client.post('/api/client/get-lawyers', json={'specialization': 'employ', 'limit': limit},
+                                   headers=headers)
+            assert response.status_code == 200
+            assert [result['id'] for result in response.json['data']['lawyers']] == [lawyer_id]
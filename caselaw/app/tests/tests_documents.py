@@ -0,0 +1,138 @@
+import hashlib
+import io
+
+from flask_jwt_extended import create_access_token
+
+from app.cli import caselaw_cli
+from app.db.models import Case, Document, db
+from app.services.document_blobs import documents
+from app.services.storage import get_storage
+from app.tests.tests_cases import make_client
+
+
+class TestDocumentStorage():
+    def test_save_is_content_addressed(self, app):
+        with app.app_context():
+            storage = get_storage()
+            data = b'x' * (storage.chunk_size * 3 + 17)
+
+            sha256, size = storage.save(io.BytesIO(data))
+            again, _ = storage.save(io.BytesIO(data))
+
+            assert sha256 == again == hashlib.sha256(data).hexdigest()
+            assert size == len(data)
+            with storage.open(sha256) as blob:
+                assert blob.read() == data
+
+    def test_add_document_keeps_only_metadata(self, app):
+        with app.app_context():
+            client = make_client()
+            case = Case(title='Lease', description='...', client=client)
+            db.session.add(case)
+            db.session.flush()
+
+            document = case.add_document('lease.pdf', io.BytesIO(b'%PDF-1.4'), client.id)
+
+            stored = db.session.get(Document, document.id)
+            assert stored.sha256 == hashlib.sha256(b'%PDF-1.4').hexdigest()
+            assert stored.size == 8
+            assert stored.mime_type == 'application/pdf'
+            assert get_storage().exists(stored.sha256)
+
+
+class TestDocumentDownload():
+    def setup_document(self, data):
+        client = make_client()
+        case = Case(title='Lease', description='...', client=client)
+        db.session.add(case)
+        db.session.flush()
+        document = case.add_document('lease.pdf', io.BytesIO(data), client.id)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=client)}'}
+        return f'/api/cases/{case.id}/documents/{document.id}', headers
+
+    def test_range_and_etag(self, app, client):
+        data = bytes(range(256)) * 64
+        with app.app_context():
+            url, headers = self.setup_document(data)
+
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.data == data
+        etag = response.headers['ETag']
+        assert etag == f'"{hashlib.sha256(data).hexdigest()}"'
+
+        response = client.get(url, headers={**headers, 'Range': 'bytes=100-199'})
+        assert response.status_code == 206
+        assert response.data == data[100:200]
+
+        response = client.get(url, headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+
+    def test_other_users_are_refused(self, app, client):
+        with app.app_context():
+            url, _ = self.setup_document(b'secret')
+            other = make_client('other@example.com')
+            db.session.commit()
+            headers = {'Authorization': f'Bearer {create_access_token(identity=other)}'}
+
+        assert client.get(url, headers=headers).status_code == 403
+
+
+class TestInlineBlobMove():
+    def setup_inline_documents(self, blobs):
+        """Documents as they were before the storage: content in documents.file_data"""
+        db.session.execute(db.text('ALTER TABLE documents ADD COLUMN file_data BLOB'))
+        client = make_client()
+        case = Case(title='Lease', description='...', client=client)
+        db.session.add(case)
+        db.session.flush()
+        ids = []
+        for name, data in blobs:
+            document = Document(file_name=name, case_id=case.id, uploaded_by=client.id)
+            db.session.add(document)
+            db.session.flush()
+            db.session.execute(documents.update().where(documents.c.id == document.id).values(file_data=data))
+            ids.append(document.id)
+        db.session.commit()
+        return ids
+
+    def test_move_and_restore(self, app):
+        blobs = [('lease.pdf', b'%PDF-1.4 lease'), ('notes.txt', b'notes'), ('scan.bin', b'\x00\x01')]
+        with app.app_context():
+            ids = self.setup_inline_documents(blobs)
+            runner = app.test_cli_runner()
+
+            result = runner.invoke(caselaw_cli, ['move-document-blobs', '--batch-size', '2'])
+            assert result.exit_code == 0, result.output
+            assert 'Moved 3 documents' in result.output
+
+            db.session.expire_all()
+            for document_id, (name, data) in zip(ids, blobs):
+                document = db.session.get(Document, document_id)
+                assert document.sha256 == hashlib.sha256(data).hexdigest()
+                assert document.size == len(data)
+                with get_storage().open(document.sha256) as blob:
+                    assert blob.read() == data
+            assert db.session.get(Document, ids[0]).mime_type == 'application/pdf'
+            assert db.session.get(Document, ids[2]).mime_type == 'application/octet-stream'
+            assert db.session.execute(
+                db.select(db.func.count()).where(documents.c.file_data.isnot(None))
+            ).scalar() == 0
+
+            result = runner.invoke(caselaw_cli, ['move-document-blobs'])
+            assert 'Moved 0 documents' in result.output
+
+            result = runner.invoke(caselaw_cli, ['move-document-blobs', '--restore'])
+            assert result.exit_code == 0, result.output
+            assert 'Restored 3 documents' in result.output
+            restored = dict(db.session.execute(db.select(documents.c.id, documents.c.file_data)).all())
+            assert [restored[document_id] for document_id in ids] == [data for _, data in blobs]
+
+    def test_nothing_to_move_without_file_data(self, app):
+        with app.app_context():
+            result = app.test_cli_runner().invoke(caselaw_cli, ['move-document-blobs'])
+            assert 'Moved 0 documents' in result.output
+
+            result = app.test_cli_runner().invoke(caselaw_cli, ['move-document-blobs', '--restore'])
+            assert result.exit_code != 0
+            assert 'file_data does not exist' in result.output
@@ -0,0 +1,92 @@
+import gzip
+import io
+import json
+
+from flask_jwt_extended import create_access_token
+
+from app.cli import caselaw_cli
+from app.db.models import Case, Role, db
+from app.services.export import export_criteria, iter_ndjson
+from app.tests.tests_cases import count_queries, make_client, make_lawyer
+
+
+def make_export_data():
+    first, second = make_client('first@example.com'), make_client('second@example.com')
+    lawyer = make_lawyer()
+    cases = [Case(title=f'Case {i}', description=f'Details {i}', client=first if i % 2 else second,
+                  lawyer=lawyer if i < 2 else None) for i in range(5)]
+    db.session.add_all(cases)
+    db.session.commit()
+    cases[1].add_document('lease.pdf', io.BytesIO(b'%PDF-1.4'), first.id)
+    cases[1].add_document('notes.txt', io.BytesIO(b'notes'), first.id)
+    return first.id, second.id, lawyer.id
+
+
+def admin_headers():
+    admin = make_client('admin@example.com')
+    admin.add_role(Role.query.filter_by(name='admin').first())
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=admin)}'}
+
+
+def parse(body):
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+class TestExport():
+    def test_firm_wide_export(self, app, client):
+        with app.app_context():
+            make_export_data()
+            headers = admin_headers()
+
+        response = client.get('/api/cases/export', headers=headers)
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert 'cases-all.ndjson' in response.headers['Content-Disposition']
+
+        records = parse(response.data)
+        assert len(records) == 5
+        assert [record['id'] for record in records] == sorted(record['id'] for record in records)
+        with_documents = next(record for record in records if record['title'] == 'Case 1')
+        assert with_documents['description'] == 'Details 1'
+        assert [document['file_name'] for document in with_documents['documents']] == ['lease.pdf', 'notes.txt']
+
+    def test_filtered_and_gzipped_export(self, app, client):
+        with app.app_context():
+            first_id, _, lawyer_id = make_export_data()
+            headers = admin_headers()
+
+        response = client.get(f'/api/cases/export?client_id={first_id}&gzip=1', headers=headers)
+        assert response.mimetype == 'application/gzip'
+        records = parse(gzip.decompress(response.data))
+        assert {record['client_id'] for record in records} == {first_id}
+        assert len(records) == 2
+
+        response = client.get(f'/api/cases/export?lawyer_id={lawyer_id}', headers=headers)
+        assert {record['title'] for record in parse(response.data)} == {'Case 0', 'Case 1'}
+
+    def test_export_requires_admin(self, app, client):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=make_lawyer())}'}
+
+        assert client.get('/api/cases/export', headers=headers).status_code == 403
+
+    def test_queries_per_batch_are_constant(self, app):
+        with app.app_context():
+            make_export_data()
+            body, queries = count_queries(lambda: b''.join(iter_ndjson(export_criteria(), batch_size=2)))
+            assert len(parse(body)) == 5
+            # Three batches of cases, clients, lawyers (skipped when no case
+            # in the batch has one) and documents, then one empty read
+            assert 3 * 3 + 1 <= queries <= 3 * 4 + 1
+
+    def test_export_command(self, app, tmp_path):
+        with app.app_context():
+            first_id, _, _ = make_export_data()
+
+        output = tmp_path / 'export.ndjson.gz'
+        result = app.test_cli_runner().invoke(
+            caselaw_cli, ['export', '--client-id', first_id, '--gzip', '-o', str(output)]
+        )
+        assert result.exit_code == 0, result.output
+        assert len(parse(gzip.decompress(output.read_bytes()))) == 2
@@ -0,0 +1,147 @@
+import json
+
+import pytest
+
+from app.cli import caselaw_cli
+from app.db.models import Case, Client, ImportProgress, Lawyer, User, db
+from app.services import bulk_import
+from app.services.bulk_import import run_import
+from app.services.dashboard import get_status_counts
+
+
+def write_csv(path, header, rows):
+    path.write_text('\n'.join([','.join(header)] + [','.join(row) for row in rows]) + '\n')
+    return str(path)
+
+
+def write_jsonl(path, rows):
+    path.write_text('\n'.join(json.dumps(row) for row in rows) + '\n')
+    return str(path)
+
+
+class TestBulkImport():
+    def test_import_clients_from_csv(self, app, tmp_path):
+        path = write_csv(tmp_path / 'clients.csv', ['email', 'password', 'firstname', 'lastname', 'phone'], [
+            ['ada@example.com', 'secret1', 'Ada', 'Lovelace', '555-0100'],
+            ['bob@example.com', 'secret2', 'Bob', 'Builder', ''],
+            ['ada@example.com', 'secret3', 'Ada', 'Again', ''],
+            ['not-an-email', 'secret4', 'No', 'Email', ''],
+            ['cy@example.com', '', 'Cy', 'Nopass', ''],
+        ])
+
+        result = app.test_cli_runner().invoke(caselaw_cli, ['import', 'clients', path, '--chunk-size', '2'])
+        assert result.exit_code == 0, result.output
+        assert 'Done: 2 clients imported, 3 rejected' in result.output
+        assert 'line 4: Email ada@example.com is already registered' in result.output
+        assert 'rows/s' in result.output
+
+        with app.app_context():
+            ada = Client.query.filter_by(email='ada@example.com').one()
+            assert ada.phone == '555-0100'
+            assert ada.get_role() == ['client']
+            assert ada.verify_password('secret1')
+
+    def test_import_cases_maintains_counters(self, app, tmp_path):
+        lawyers = write_jsonl(tmp_path / 'lawyers.jsonl', [
+            {'email': 'lee@example.com', 'password': 'pw', 'firstname': 'Lee', 'lastname': 'Law',
+             'bar_number': 'BAR-9', 'specialization': 'Family Law'},
+        ])
+        clients = write_jsonl(tmp_path / 'clients.jsonl', [
+            {'email': 'ada@example.com', 'password': 'pw', 'firstname': 'Ada', 'lastname': 'Client'},
+        ])
+        cases = write_jsonl(tmp_path / 'cases.jsonl', [
+            {'client_email': 'ada@example.com', 'title': 'Custody', 'description': '...'},
+            {'client_email': 'ada@example.com', 'lawyer_email': 'lee@example.com', 'title': 'Divorce',
+             'description': '...', 'status': 'In Progress', 'urgency': 'High'},
+            {'client_email': 'ada@example.com', 'lawyer_email': 'lee@example.com', 'title': 'Will',
+             'description': '...', 'status': 'Closed'},
+            {'client_email': 'nobody@example.com', 'title': 'Orphan', 'description': '...'},
+            {'client_email': 'ada@example.com', 'title': 'Bad', 'description': '...', 'urgency': 'someday'},
+        ])
+
+        with app.app_context():
+            for kind, path in (('lawyers', lawyers), ('clients', clients)):
+                assert list(run_import(kind, path))[-1]['imported'] == 1
+            progress = list(run_import('cases', cases))[-1]
+            assert (progress['imported'], progress['rejected']) == (3, 2)
+
+            lawyer = Lawyer.query.filter_by(email='lee@example.com').one()
+            client = Client.query.filter_by(email='ada@example.com').one()
+            assert lawyer.active_cases == 1
+            assert get_status_counts(client.id) == {'Pending': 1, 'In Progress': 1, 'Closed': 1}
+            assert get_status_counts(lawyer.id) == {'In Progress': 1, 'Closed': 1}
+            assert Case.query.filter_by(title='Divorce').one().urgency == 'high'
+
+    def test_resume_after_failure(self, app, tmp_path, monkeypatch):
+        path = write_jsonl(tmp_path / 'clients.jsonl', [
+            {'email': f'client{i}@example.com', 'password': 'pw', 'firstname': 'C', 'lastname': str(i)}
+            for i in range(5)
+        ])
+        import_chunk = bulk_import.import_chunk
+        calls = []
+
+        def failing_import_chunk(kind, rows, progress=None):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return import_chunk(kind, rows, progress)
+
+        with app.app_context():
+            monkeypatch.setattr(bulk_import, 'import_chunk', failing_import_chunk)
+            with pytest.raises(RuntimeError):
+                list(run_import('clients', path, chunk_size=2))
+            assert User.query.count() == 2
+            assert db.session.get(ImportProgress, path).rows == 2
+
+            monkeypatch.setattr(bulk_import, 'import_chunk', import_chunk)
+            progress = list(run_import('clients', path, chunk_size=2))
+            assert progress[-1]['resumed_from'] == 2
+            assert (progress[-1]['imported'], progress[-1]['rejected']) == (5, 0)
+            assert User.query.count() == 5
+            assert db.session.get(ImportProgress, path) is None
+
+    def test_crash_after_commit_does_not_duplicate_cases(self, app, tmp_path, monkeypatch):
+        clients = write_jsonl(tmp_path / 'clients.jsonl', [
+            {'email': 'ada@example.com', 'password': 'pw', 'firstname': 'Ada', 'lastname': 'Client'},
+        ])
+        cases = write_jsonl(tmp_path / 'cases.jsonl', [
+            {'client_email': 'ada@example.com', 'title': f'Case {i}', 'description': '...'}
+            for i in range(6)
+        ])
+        import_chunk = bulk_import.import_chunk
+        calls = []
+
+        def crashing_import_chunk(kind, rows, progress=None):
+            # The chunk commits, then the process dies before reporting it
+            result = import_chunk(kind, rows, progress)
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError('killed')
+            return result
+
+        with app.app_context():
+            list(run_import('clients', clients))
+            monkeypatch.setattr(bulk_import, 'import_chunk', crashing_import_chunk)
+            with pytest.raises(RuntimeError):
+                list(run_import('cases', cases, chunk_size=2))
+            assert Case.query.count() == 4
+
+            monkeypatch.setattr(bulk_import, 'import_chunk', import_chunk)
+            progress = list(run_import('cases', cases, chunk_size=2))
+            assert progress[-1]['resumed_from'] == 4
+            assert progress[-1]['imported'] == 6
+            assert sorted(case.title for case in Case.query) == [f'Case {i}' for i in range(6)]
+            assert get_status_counts(Client.query.one().id) == {'Pending': 6}
+
+    def test_restart_and_kind_mismatch(self, app, tmp_path):
+        path = write_jsonl(tmp_path / 'people.jsonl', [
+            {'email': 'ada@example.com', 'password': 'pw', 'firstname': 'Ada', 'lastname': 'Client'},
+        ])
+        with app.app_context():
+            db.session.add(ImportProgress(key=path, kind='lawyers', rows=1, imported=1, rejected=0))
+            db.session.commit()
+            with pytest.raises(bulk_import.BulkImportError):
+                list(run_import('clients', path))
+
+            progress = list(run_import('clients', path, restart=True))
+            assert (progress[-1]['resumed_from'], progress[-1]['imported']) == (0, 1)
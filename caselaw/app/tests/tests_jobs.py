@@ -0,0 +1,205 @@
+import io
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.cli import caselaw_cli
+from app.db.models import Document, Job, db
+from app.services import jobs
+from app.services.jobs import PermanentJobError, claim_job, enqueue, run_job, run_worker
+from app.services.storage import get_storage
+from app.services.submissions import create_case_with_documents
+from app.tests.tests_cases import make_client
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    calls = []
+    registry = dict(jobs.JOB_HANDLERS)
+
+    def record(payload):
+        calls.append(payload)
+
+    def explode(payload):
+        raise RuntimeError('boom')
+
+    def give_up(payload):
+        raise PermanentJobError('not retryable')
+
+    registry.update({'record': record, 'explode': explode, 'give_up': give_up})
+    monkeypatch.setattr(jobs, 'JOB_HANDLERS', registry)
+    return calls
+
+
+def make_docx(paragraphs):
+    namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{namespace}"><w:body>{body}</w:body></w:document>')
+        archive.writestr('docProps/app.xml', '<Properties><Pages>3</Pages></Properties>')
+    return data.getvalue()
+
+
+class TestJobQueue():
+    def test_job_runs_once(self, app, handlers):
+        with app.app_context():
+            enqueue('record', {'n': 1})
+            db.session.commit()
+
+            assert run_worker(burst=True) == 1
+            assert handlers == [{'n': 1}]
+            job = Job.query.one()
+            assert job.status == 'done'
+            assert job.attempts == 1
+            assert job.locked_by is None
+            assert run_worker(burst=True) == 0
+
+    def test_enqueue_is_part_of_the_callers_transaction(self, app, handlers):
+        with app.app_context():
+            enqueue('record', {'n': 1})
+            db.session.rollback()
+            assert Job.query.count() == 0
+
+    def test_failed_job_is_retried_with_backoff(self, app, handlers):
+        with app.app_context():
+            app.config['JOB_MAX_ATTEMPTS'] = 2
+            enqueue('explode', {})
+            db.session.commit()
+
+            before = datetime.utcnow()
+            assert run_worker(burst=True) == 1
+            job = Job.query.one()
+            assert job.status == 'queued'
+            assert 'boom' in job.last_error
+            # Backoff of JOB_RETRY_BACKOFF (30s) with jitter
+            assert job.run_at >= before + timedelta(seconds=20)
+            assert claim_job('worker') is None
+
+            job.run_at = datetime.utcnow()
+            db.session.commit()
+            assert run_worker(burst=True) == 1
+            job = Job.query.one()
+            assert job.status == 'failed'
+            assert job.attempts == 2
+
+    def test_permanent_errors_and_unknown_kinds_are_not_retried(self, app, handlers):
+        with app.app_context():
+            enqueue('give_up', {})
+            enqueue('no_such_kind', {})
+            db.session.commit()
+
+            run_worker(burst=True)
+            assert [job.status for job in Job.query.order_by(Job.id)] == ['failed', 'failed']
+            assert 'No handler for job kind no_such_kind' in Job.query.order_by(Job.id.desc()).first().last_error
+
+    def test_expired_lease_is_handed_to_another_worker(self, app, handlers):
+        with app.app_context():
+            enqueue('record', {'n': 1})
+            db.session.commit()
+
+            stale = claim_job('first', visibility_timeout=60)
+            assert claim_job('second') is None
+
+            Job.query.one().locked_until = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+            fresh = claim_job('second')
+            assert fresh.id == stale.id
+            assert fresh.attempts == 2
+
+            # The first worker finishing late does not overwrite the new lease
+            assert run_job(stale, 'first') is False
+            assert Job.query.one().status == 'running'
+            assert run_job(fresh, 'second') is True
+            assert Job.query.one().status == 'done'
+
+
+    def test_job_that_kills_its_worker_is_not_retried_forever(self, app, handlers):
+        with app.app_context():
+            enqueue('record', {'n': 1}, max_attempts=2)
+            db.session.commit()
+
+            for worker in ('first', 'second'):
+                # The worker dies before it can record the outcome
+                assert claim_job(worker, visibility_timeout=60) is not None
+                Job.query.one().locked_until = datetime.utcnow() - timedelta(seconds=1)
+                db.session.commit()
+
+            assert claim_job('third') is None
+            job = Job.query.one()
+            assert (job.status, job.attempts, job.locked_by) == ('failed', 2, None)
+            assert job.last_error == 'Lease expired on the last attempt'
+            assert handlers == []
+
+    def test_idle_worker_purges_old_finished_jobs(self, app, handlers):
+        with app.app_context():
+            for n in range(3):
+                enqueue('record', {'n': n})
+            db.session.commit()
+            assert run_worker(burst=True) == 3
+            old, recent, failed = Job.query.order_by(Job.id).all()
+            week_ago = datetime.utcnow() - timedelta(days=8)
+            old.run_at = old.finished_at = week_ago
+            failed.run_at = failed.finished_at = week_ago
+            failed.status = 'failed'
+            db.session.commit()
+            recent_id, failed_id = recent.id, failed.id
+
+            assert run_worker(burst=True) == 0
+            assert sorted(job.id for job in Job.query) == [recent_id, failed_id]
+
+class TestDocumentProcessing():
+    def submit(self, attachments):
+        client = make_client()
+        db.session.commit()
+        return create_case_with_documents(client.id, {'title': 'Lease', 'description': '...'}, [
+            (name, io.BytesIO(data), None) for name, data in attachments
+        ])
+
+    def test_submission_queues_processing(self, app):
+        with app.app_context():
+            pdf = b'%PDF-1.4\n1 0 obj << /Type /Pages /Kids [2 0 R 3 0 R] >>\n' \
+                  b'2 0 obj << /Type /Page >>\n3 0 obj << /Type/Page >>\n%%EOF'
+            case = self.submit([
+                ('notes.txt', 'Deposit withheld'.encode('utf-8')),
+                ('lease.docx', make_docx(['First clause', 'Second clause'])),
+                ('scan.pdf', pdf),
+            ])
+            case_id = case.id
+            assert Job.query.filter_by(kind='process_document').count() == 3
+            assert {document.processing_status for document in case.documents} == {'pending'}
+
+            assert run_worker(burst=True) == 3
+            documents = {document.file_name: document for document in Document.query.filter_by(case_id=case_id)}
+            storage = get_storage()
+            assert all(document.processing_status == 'processed' for document in documents.values())
+
+            with storage.open(documents['notes.txt'].text_sha256) as text:
+                assert text.read() == b'Deposit withheld'
+            with storage.open(documents['lease.docx'].text_sha256) as text:
+                assert text.read() == b'First clause\nSecond clause'
+            assert documents['lease.docx'].page_count == 3
+            assert documents['scan.pdf'].page_count == 2
+
+    def test_corrupt_blob_is_flagged(self, app):
+        with app.app_context():
+            case = self.submit([('notes.txt', b'original')])
+            document_id, sha256 = case.documents.with_entities(Document.id, Document.sha256).one()
+            with open(get_storage().local_path(sha256), 'wb') as blob:
+                blob.write(b'tampered')
+
+            run_worker(burst=True)
+            assert db.session.get(Document, document_id).processing_status == 'corrupt'
+
+    def test_worker_command(self, app):
+        with app.app_context():
+            case = self.submit([('notes.txt', b'text')])
+            document_id = case.documents.one().id
+
+        result = app.test_cli_runner().invoke(caselaw_cli, ['worker', '--burst'])
+        assert result.exit_code == 0, result.output
+        assert 'Ran 1 jobs' in result.output
+
+        with app.app_context():
+            assert db.session.get(Document, document_id).processing_status == 'processed'
@@ -0,0 +1,95 @@
+import decimal
+import gzip
+import json
+import uuid
+from datetime import datetime
+
+import brotli
+import pytest
+from flask import jsonify
+
+from app.services.json_provider import OrjsonProvider
+
+
+class TestJsonProvider():
+    def test_native_types(self, app):
+        assert isinstance(app.json, OrjsonProvider)
+        key = uuid.uuid4()
+        with app.app_context():
+            encoded = app.json.dumps({
+                'updated': datetime(2026, 10, 17, 9, 30, 5, 120000),
+                'id': key,
+                'fee': decimal.Decimal('12.50'),
+                1: 'non-string key',
+            })
+        assert json.loads(encoded) == {
+            'updated': '2026-10-17T09:30:05.120000',
+            'id': str(key),
+            'fee': '12.50',
+            '1': 'non-string key',
+        }
+        assert app.json.loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+
+    def test_dumps_arguments(self, app):
+        data = {'b': 1, 'a': {'d': 2, 'c': 3}}
+        assert app.json.dumps(data) == '{"a":{"c":3,"d":2},"b":1}'
+        assert app.json.dumps(data, sort_keys=False) == '{"b":1,"a":{"d":2,"c":3}}'
+        assert app.json.dumps(data, separators=(',', ':')) == '{"a":{"c":3,"d":2},"b":1}'
+        assert app.json.dumps(data, indent=2) == json.dumps(data, indent=2, sort_keys=True)
+        assert app.json.dumps({'at': decimal.Decimal('1.5')}, default=float) == '{"at":1.5}'
+        for kwargs in ({'indent': 4}, {'ensure_ascii': True}, {'separators': (', ', ': ')}, {'cls': json.JSONEncoder}):
+            with pytest.raises(TypeError):
+                app.json.dumps(data, **kwargs)
+
+        app.json.sort_keys = False
+        assert app.json.dumps(data) == '{"b":1,"a":{"d":2,"c":3}}'
+        with app.test_request_context():
+            assert list(json.loads(jsonify(data).data)) == ['b', 'a']
+
+    def test_jsonify_response(self, app):
+        with app.test_request_context():
+            response = jsonify(status='success', data=[1, 2])
+        assert response.mimetype == 'application/json'
+        assert json.loads(response.data) == {'status': 'success', 'data': [1, 2]}
+
+
+class TestCompression():
+    def setup_routes(self, app):
+        @app.route('/test/large')
+        def large():
+            return jsonify(items=[{'id': i, 'title': f'Case {i}'} for i in range(500)])
+
+        @app.route('/test/small')
+        def small():
+            return jsonify(ok=True)
+
+    def test_negotiated_encoding(self, app, client):
+        self.setup_routes(app)
+
+        plain = client.get('/test/large')
+        assert 'Content-Encoding' not in plain.headers
+        assert 'Accept-Encoding' in plain.vary
+
+        response = client.get('/test/large', headers={'Accept-Encoding': 'gzip, deflate, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == plain.data
+        assert len(response.data) < len(plain.data) / 5
+
+        response = client.get('/test/large', headers={'Accept-Encoding': 'gzip, br;q=0.5'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == plain.data
+
+        response = client.get('/test/large', headers={'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in response.headers
+
+    def test_small_bodies_are_sent_as_is(self, app, client):
+        self.setup_routes(app)
+        response = client.get('/test/small', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert response.json == {'ok': True}
+
+    def test_compression_can_be_disabled(self, app, client):
+        self.setup_routes(app)
+        app.config['COMPRESS_ENABLED'] = False
+        response = client.get('/test/large', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
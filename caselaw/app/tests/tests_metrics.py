@@ -0,0 +1,85 @@
+import logging
+import re
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app.app import create_app
+from app.config.config import TestingConfig
+from app.db.models import Case, db
+from app.services.metrics import REGISTRY, _before_cursor_execute
+from app.tests.tests_cases import make_client
+
+
+def sample(name, blueprint, method='GET'):
+    return REGISTRY.get_sample_value(name, {'blueprint': blueprint, 'method': method}) or 0
+
+
+def setup_client():
+    client = make_client()
+    db.session.add_all([Case(title=f'Case {i}', description='...', client=client) for i in range(3)])
+    db.session.commit()
+    return client.id, {'Authorization': f'Bearer {create_access_token(identity=client)}'}
+
+
+class TestRequestMetrics():
+    def test_server_timing_counts_queries(self, app, client):
+        with app.app_context():
+            client_id, headers = setup_client()
+
+        requests_before = sample('caselaw_request_duration_seconds_count', 'client_bp')
+        queries_before = sample('caselaw_request_queries_sum', 'client_bp')
+
+        response = client.get(f'/api/client/cases/{client_id}', headers=headers)
+        assert response.status_code == 200
+        timing = re.fullmatch(r'db;desc="(\d+) queries";dur=([\d.]+), total;dur=([\d.]+)',
+                              response.headers['Server-Timing'])
+        queries, db_ms, total_ms = int(timing[1]), float(timing[2]), float(timing[3])
+        assert queries >= 1
+        assert 0 < db_ms <= total_ms
+
+        assert sample('caselaw_request_duration_seconds_count', 'client_bp') == requests_before + 1
+        assert sample('caselaw_request_queries_sum', 'client_bp') == queries_before + queries
+
+    def test_metrics_endpoint(self, app, client):
+        client.post('/api/auth/login', json={'email': 'nobody@example.com', 'password': 'wrong'})
+        scrapes_before = sample('caselaw_request_duration_seconds_count', 'none')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+        assert 'caselaw_request_duration_seconds_bucket{blueprint="auth_bp",le="0.005",method="POST"}' in body
+        assert 'caselaw_request_queries_bucket{blueprint="auth_bp"' in body
+        assert 'caselaw_password_hashes_total{pid=' in body
+        # Scrapes are not recorded
+        assert sample('caselaw_request_duration_seconds_count', 'none') == scrapes_before
+
+    def test_slow_queries_are_logged_with_their_route(self, app, client, caplog):
+        with app.app_context():
+            client_id, headers = setup_client()
+        app.config['SLOW_QUERY_THRESHOLD'] = 0
+        slow_before = REGISTRY.get_sample_value(
+            'caselaw_slow_queries_total', {'blueprint': 'client_bp', 'method': 'GET'}) or 0
+
+        with caplog.at_level(logging.WARNING, logger='app.services.metrics'):
+            client.get(f'/api/client/cases/{client_id}', headers=headers)
+        assert any('GET /api/client/cases/<string:user_id>' in record.getMessage() for record in caplog.records)
+        assert REGISTRY.get_sample_value(
+            'caselaw_slow_queries_total', {'blueprint': 'client_bp', 'method': 'GET'}) > slow_before
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+        monkeypatch.setattr(TestingConfig, 'DOCUMENT_STORAGE_PATH', str(tmp_path / 'documents'))
+        monkeypatch.setattr(TestingConfig, 'LAWYER_INDEX_PATH', str(tmp_path / 'lawyer_index'))
+        monkeypatch.setattr(TestingConfig, 'PROFILE_IMAGE_PATH', str(tmp_path / 'profile_images'))
+        monkeypatch.setattr(TestingConfig, 'METRICS_ENABLED', False)
+        app = create_app('testing')
+
+        with app.app_context():
+            assert not event.contains(db.engine, 'before_cursor_execute', _before_cursor_execute)
+            client_id, headers = setup_client()
+        http = app.test_client()
+        response = http.get(f'/api/client/cases/{client_id}', headers=headers)
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response.headers
+        assert http.get('/metrics').status_code == 404
@@ -0,0 +1,108 @@
+import io
+
+from flask_jwt_extended import create_access_token
+from PIL import Image
+
+from app.db.models import User, db
+from app.services.profile_images import profile_image_store
+from app.tests.tests_cases import make_client
+
+
+def make_image(size, format='JPEG', mode='RGB'):
+    data = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128)[:len(mode)]).save(data, format=format)
+    data.seek(0)
+    return data
+
+
+class TestProfileImages():
+    def setup_user(self):
+        user = make_client()
+        db.session.commit()
+        return user.id, {'Authorization': f'Bearer {create_access_token(identity=user)}'}
+
+    def upload(self, client, headers, image, name='photo.jpg'):
+        return client.put('/api/auth/me/profile-image', headers=headers,
+                          data={'image': (image, name)}, content_type='multipart/form-data')
+
+    def test_upload_stores_resized_variants(self, app, client):
+        with app.app_context():
+            user_id, headers = self.setup_user()
+
+        photo = make_image((3000, 2000))
+        response = self.upload(client, headers, photo)
+        assert response.status_code == 200, response.json
+        urls = response.json['data']['profile_images']
+        assert set(urls) == {'thumb', 'small', 'large'}
+
+        with app.app_context():
+            key = db.session.get(User, user_id).profile_image
+            for variant, edge in app.config['PROFILE_IMAGE_SIZES'].items():
+                assert urls[variant].endswith(f'/api/media/profile-images/{key}/{variant}.webp')
+                with Image.open(profile_image_store.path(key, variant)) as stored:
+                    assert stored.format == 'WEBP'
+                    assert stored.size == (edge, edge)
+                    assert stored.getexif() == {}
+
+        # Listings point at the small variant
+        me = client.get('/api/auth/me', headers=headers).json['data']['user']
+        assert me['profile_image'] == urls['small']
+
+    def test_variants_are_cached_forever(self, app, client):
+        with app.app_context():
+            _, headers = self.setup_user()
+        url = self.upload(client, headers, make_image((800, 600))).json['data']['profile_images']['thumb']
+        path = url.split('://', 1)[1].split('/', 1)[1]
+
+        response = client.get(f'/{path}')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/webp'
+        assert response.cache_control.immutable
+        assert response.cache_control.public
+        assert response.cache_control.max_age == 365 * 24 * 3600
+
+        again = client.get(f'/{path}', headers={'If-None-Match': response.headers['ETag']})
+        assert again.status_code == 304
+
+        assert client.get(f'/{path}'.replace('thumb', 'huge')).status_code == 404
+
+    def test_small_and_transparent_images(self, app, client):
+        with app.app_context():
+            user_id, headers = self.setup_user()
+
+        response = self.upload(client, headers, make_image((100, 120), 'PNG', 'RGBA'), 'logo.png')
+        assert response.status_code == 200
+        with app.app_context():
+            key = db.session.get(User, user_id).profile_image
+            with Image.open(profile_image_store.path(key, 'large')) as stored:
+                # Not upscaled beyond the source
+                assert stored.size == (100, 100)
+                assert stored.mode == 'RGBA'
+
+    def test_same_image_same_key(self, app):
+        with app.app_context():
+            first = make_client('first@example.com')
+            second = make_client('second@example.com')
+            db.session.commit()
+
+            class Upload:
+                def __init__(self, stream):
+                    self.stream = stream
+
+            first.update_profile_image(Upload(make_image((300, 300))))
+            second.update_profile_image(Upload(make_image((300, 300))))
+            assert first.profile_image == second.profile_image
+
+    def test_invalid_image_is_rejected(self, app, client):
+        with app.app_context():
+            user_id, headers = self.setup_user()
+
+        response = self.upload(client, headers, io.BytesIO(b'not an image'))
+        assert response.status_code == 400
+        assert response.json['message'] == 'The file is not a supported image'
+
+        app.config['PROFILE_IMAGE_MAX_PIXELS'] = 1000
+        assert self.upload(client, headers, make_image((100, 100))).status_code == 400
+
+        with app.app_context():
+            assert db.session.get(User, user_id).profile_image == app.config['DEFAULT_PROFILE_IMAGE']
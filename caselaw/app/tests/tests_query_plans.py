@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+from app.db.models import Case, db
+from app.tests.query_plans import QueryPlanAudit
+from app.tests.tests_cases import make_client
+
+
+def make_case_with_document():
+    client = make_client()
+    case = Case(title='Lease', description='...', client=client)
+    db.session.add(case)
+    db.session.commit()
+    case.add_document('lease.pdf', io.BytesIO(b'%PDF-1.4'), client.id)
+    return case
+
+
+class TestQueryPlanAudit():
+    def test_scans_resolve_aliases_and_ignore_index_scans(self):
+        audit = QueryPlanAudit()
+        statement = 'SELECT * FROM cases LEFT OUTER JOIN (users AS users_1 JOIN clients AS clients_1 ON ...)'
+        plan = ['MATERIALIZE (join-1)', 'SCAN users_1', 'SEARCH clients_1 USING INDEX sqlite_autoindex_clients_1 (id=?)',
+                'SCAN cases USING INDEX ix_cases_status_created_at_id', 'SCAN roles']
+        assert audit.scans(statement, plan) == ['users']
+
+    @pytest.mark.allow_table_scan('documents')
+    def test_application_scans_are_reported(self, app):
+        audit = QueryPlanAudit()
+        with app.test_request_context():
+            case = make_case_with_document()
+            db.session.execute(db.text('DROP INDEX ix_documents_case_id_uploaded_at_id'))
+            audit.install()
+            try:
+                audit.start()
+                case.get_case_details()
+            finally:
+                audit.uninstall()
+
+        [(origin, plan, scanned)] = audit.violations.values()
+        assert scanned == ['documents']
+        assert origin[0] == 'app/db/models.py'
+        assert 'documents' in audit.report()
+
+    def test_queries_made_by_tests_are_not_audited(self, app):
+        audit = QueryPlanAudit()
+        with app.app_context():
+            make_case_with_document()
+            audit.install()
+            try:
+                audit.start()
+                Case.query.filter_by(title='Lease').all()
+            finally:
+                audit.uninstall()
+        assert audit.violations == {}
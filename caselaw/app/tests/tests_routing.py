@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.app import create_app
+from app.config.config import ProductionConfig, TestingConfig, engine_options
+from app.db.models import Case, db
+from app.db.routing import REPLICA_KEY, STICKY_COOKIE
+from app.tests.tests_cases import make_client
+
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    """An app with a primary and a replica SQLite file; replicate() copies one to the other"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{primary}')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica': f'sqlite:///{replica}'})
+    monkeypatch.setattr(TestingConfig, 'DOCUMENT_STORAGE_PATH', str(tmp_path / 'documents'))
+    monkeypatch.setattr(TestingConfig, 'LAWYER_INDEX_PATH', str(tmp_path / 'lawyer_index'))
+    monkeypatch.setattr(TestingConfig, 'PROFILE_IMAGE_PATH', str(tmp_path / 'profile_images'))
+    app = create_app('testing')
+
+    def replicate():
+        with app.app_context():
+            db.engines['replica'].dispose()
+        source, target = sqlite3.connect(primary), sqlite3.connect(replica)
+        source.backup(target)
+        source.close()
+        target.close()
+
+    yield app, replicate
+    # init_app registers a metadata per bind on the shared db object
+    db.metadatas.pop('replica', None)
+
+
+class TestReadReplicaRouting():
+    def test_get_reads_from_replica_until_the_client_writes(self, replicated):
+        app, replicate = replicated
+        with app.app_context():
+            client = make_client()
+            db.session.add(Case(title='Replicated', description='...', client=client))
+            db.session.commit()
+            client_id = client.id
+            headers = {'Authorization': f'Bearer {create_access_token(identity=client)}'}
+        replicate()
+
+        with app.app_context():
+            db.session.add(Case(title='Not replicated yet', description='...', client_id=client_id))
+            db.session.commit()
+
+        http = app.test_client()
+        url = f'/api/client/cases/{client_id}'
+        assert [case['title'] for case in http.get(url, headers=headers).json['data']] == ['Replicated']
+
+        response = http.post(f'/api/client/case-submit/{client_id}', headers=headers, data={
+            'title': 'New', 'description': '...', 'urgencyLevel': 'low', 'communicationMethod': 'Email',
+        }, content_type='multipart/form-data')
+        assert response.status_code == 201
+        assert http.get_cookie(STICKY_COOKIE) is not None
+
+        # Read-after-write: the client now reads from the primary
+        titles = {case['title'] for case in http.get(url, headers=headers).json['data']}
+        assert titles == {'Replicated', 'Not replicated yet', 'New'}
+
+    def test_session_switches_to_primary_once_it_writes(self, replicated):
+        app, replicate = replicated
+        with app.app_context():
+            client = make_client()
+            db.session.commit()
+            client_id = client.id
+        replicate()
+
+        with app.test_request_context():
+            db.session.info[REPLICA_KEY] = 'replica'
+            assert db.session.get_bind(clause=db.select(Case)) is db.engines['replica']
+            assert db.session.get_bind(clause=db.update(Case)) is db.engine
+
+            db.session.add(Case(title='Mine', description='...', client_id=client_id))
+            db.session.flush()
+            assert db.session.get_bind(clause=db.select(Case)) is db.engine
+            assert Case.query.filter_by(title='Mine').count() == 1
+            db.session.rollback()
+
+    def test_no_routing_without_replica(self, app):
+        with app.test_request_context():
+            assert REPLICA_KEY not in db.session.info
+            assert db.session.get_bind(clause=db.select(Case)) is db.engine
+
+
+class TestEngineOptions():
+    def test_environment_overrides_defaults(self, monkeypatch):
+        monkeypatch.setenv('DB_POOL_SIZE', '3')
+        monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+        assert engine_options(pool_size=10, pool_pre_ping=True, pool_recycle=1800) == {
+            'pool_size': 3, 'pool_pre_ping': False, 'pool_recycle': 1800,
+        }
+
+    def test_production_pool(self):
+        options = ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+        assert options['pool_pre_ping'] is True
+        assert options['pool_size'] > 0 and options['max_overflow'] >= 0
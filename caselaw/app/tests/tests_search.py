@@ -0,0 +1,115 @@
+from flask_jwt_extended import create_access_token
+
+from app.db.models import Case, Lawyer, db
+from app.tests.tests_cases import make_client, make_lawyer
+
+
+def add_case(title, description='...', category=None, lawyer=None, status='Pending'):
+    case = Case(title=title, description=description, category=category,
+                status=status, client=make_client(f'{title.lower().replace(" ", ".")}@example.com'))
+    case.lawyer = lawyer
+    db.session.add(case)
+    db.session.commit()
+    return case.id
+
+
+def lawyer_headers(app):
+    with app.app_context():
+        lawyer = make_lawyer()
+        db.session.commit()
+        return lawyer.id, {'Authorization': f'Bearer {create_access_token(identity=lawyer)}'}
+
+
+def search(client, headers, **params):
+    return client.get('/api/lawyer/cases/search', query_string=params, headers=headers)
+
+
+class TestCaseSearch():
+    def test_title_matches_rank_above_description_matches(self, app, client):
+        _, headers = lawyer_headers(app)
+        with app.app_context():
+            in_description = add_case('Unpaid wages', 'My landlord refuses to return the deposit')
+            in_title = add_case('Landlord dispute', 'Repairs were never made')
+            add_case('Divorce', 'Custody of two children')
+
+        response = search(client, headers, q='landlord')
+        assert response.status_code == 200
+        assert [case['id'] for case in response.json['results']] == [in_title, in_description]
+        assert '<mark>' in response.json['results'][0]['snippet']
+
+    def test_snippet_escapes_case_text(self, app, client):
+        _, headers = lawyer_headers(app)
+        with app.app_context():
+            add_case('Eviction', 'Landlord wrote <script>alert(1)</script> and <img src=x onerror=alert(2)>')
+
+        response = search(client, headers, q='landlord')
+        snippet = response.json['results'][0]['snippet']
+        assert '<mark>Landlord</mark>' in snippet
+        assert '&lt;script&gt;alert(1)&lt;/script&gt;' in snippet
+        assert '<script>' not in snippet and '<img' not in snippet
+
+    def test_words_match_by_stem(self, app, client):
+        _, headers = lawyer_headers(app)
+        with app.app_context():
+            case_id = add_case('Evicted tenants', 'Landlord changed the locks')
+
+        assert [case['id'] for case in search(client, headers, q='evicting tenant').json['results']] == [case_id]
+        assert search(client, headers, q='tenant "OR" fraud').json['results'] == []
+
+    def test_index_follows_updates_and_deletes(self, app, client):
+        _, headers = lawyer_headers(app)
+        with app.app_context():
+            case_id = add_case('Contract breach')
+
+        assert len(search(client, headers, q='contract').json['results']) == 1
+
+        with app.app_context():
+            case = Case.query.get(case_id)
+            case.title = 'Insurance claim'
+            db.session.commit()
+
+        assert search(client, headers, q='contract').json['results'] == []
+        assert len(search(client, headers, q='insurance').json['results']) == 1
+
+        with app.app_context():
+            db.session.delete(Case.query.get(case_id))
+            db.session.commit()
+
+        assert search(client, headers, q='insurance').json['results'] == []
+
+    def test_only_open_and_own_cases_are_visible(self, app, client):
+        lawyer_id, headers = lawyer_headers(app)
+        with app.app_context():
+            other = make_lawyer('other@example.com', 'BAR-2')
+            open_case = add_case('Fraud open')
+            own_case = add_case('Fraud own', lawyer=Lawyer.query.get(lawyer_id), status='Under Review')
+            add_case('Fraud taken', lawyer=other, status='Under Review')
+
+        results = search(client, headers, q='fraud').json['results']
+        assert {case['id'] for case in results} == {open_case, own_case}
+
+    def test_cursor_pagination(self, app, client):
+        _, headers = lawyer_headers(app)
+        with app.app_context():
+            case_ids = {add_case(f'Patent case {i}') for i in range(5)}
+
+        seen, cursor = [], None
+        while True:
+            params = {'q': 'patent', 'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = search(client, headers, **params)
+            assert response.status_code == 200
+            seen.extend(case['id'] for case in response.json['results'])
+            cursor = response.json['next_cursor']
+            if not cursor:
+                break
+
+        assert len(seen) == 5 and set(seen) == case_ids
+
+    def test_invalid_requests(self, app, client):
+        _, headers = lawyer_headers(app)
+
+        assert search(client, headers).status_code == 400
+        assert search(client, headers, q='!!!').status_code == 400
+        assert search(client, headers, q='fraud', cursor='not-a-cursor').status_code == 400
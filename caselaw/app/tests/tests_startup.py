@@ -0,0 +1,68 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.app import create_app
+from app.cli import caselaw_cli
+from app.config.config import TestingConfig
+from app.db.models import Role, db
+from app.initialize_functions import _dispose_engines_after_fork
+from app.services.roles import role_registry
+from app.tests.tests_cases import count_queries
+
+
+class TestStartup():
+    def test_boot_without_schema_creation_runs_no_sql(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'boot.db'}")
+        monkeypatch.setattr(TestingConfig, 'DOCUMENT_STORAGE_PATH', str(tmp_path / 'documents'))
+        monkeypatch.setattr(TestingConfig, 'LAWYER_INDEX_PATH', str(tmp_path / 'lawyer_index'))
+        monkeypatch.setattr(TestingConfig, 'PROFILE_IMAGE_PATH', str(tmp_path / 'profile_images'))
+        monkeypatch.setattr(TestingConfig, 'AUTO_CREATE_SCHEMA', False)
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            app = create_app('testing')
+        finally:
+            event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+        assert statements == []
+
+        with app.app_context():
+            db.create_all()
+            result = app.test_cli_runner().invoke(caselaw_cli, ['seed-roles'])
+            assert result.exit_code == 0
+            assert 'Created roles: admin, lawyer, client' in result.output
+            assert sorted(role.name for role in Role.query) == ['admin', 'client', 'lawyer']
+
+            result = app.test_cli_runner().invoke(caselaw_cli, ['seed-roles'])
+            assert 'Roles already seeded' in result.output
+
+    def test_role_registry_reads_roles_once(self, app):
+        with app.app_context():
+            assert role_registry.get('lawyer').name == 'lawyer'
+            db.session.remove()
+
+            role, queries = count_queries(lambda: role_registry.get('client'))
+            assert queries == 0
+            assert role.id == Role.query.filter_by(name='client').one().id
+            assert role_registry.get('judge') is None
+
+    def test_engines_are_reset_after_fork(self, app):
+        with app.app_context():
+            pool = db.engine.pool
+            _dispose_engines_after_fork()
+            assert db.engine.pool is not pool
+            assert Role.query.count() == 3
+
+    def test_swagger_can_be_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'boot.db'}")
+        monkeypatch.setattr(TestingConfig, 'DOCUMENT_STORAGE_PATH', str(tmp_path / 'documents'))
+        monkeypatch.setattr(TestingConfig, 'LAWYER_INDEX_PATH', str(tmp_path / 'lawyer_index'))
+        monkeypatch.setattr(TestingConfig, 'PROFILE_IMAGE_PATH', str(tmp_path / 'profile_images'))
+        monkeypatch.setattr(TestingConfig, 'SWAGGER_ENABLED', False)
+
+        app = create_app('testing')
+        assert app.test_client().get('/apispec_1.json').status_code == 404
@@ -0,0 +1,106 @@
+import hashlib
+import io
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.models import Case, Document, db
+from app.services.storage import get_storage
+from app.tests.tests_cases import make_client
+
+
+def submission(files):
+    return {
+        'title': 'Lease dispute',
+        'description': 'Landlord kept the deposit',
+        'urgencyLevel': 'high',
+        'communicationMethod': 'Email',
+        'documents': [(io.BytesIO(data), name) for name, data in files],
+    }
+
+
+class TestCaseSubmission():
+    def setup_client(self):
+        client = make_client()
+        db.session.commit()
+        return client.id, {'Authorization': f'Bearer {create_access_token(identity=client)}'}
+
+    def test_case_and_documents_are_committed_once(self, app, client):
+        with app.app_context():
+            client_id, headers = self.setup_client()
+
+        files = [(f'exhibit-{i}.pdf', b'%PDF-1.4 ' + bytes([i]) * 1000) for i in range(5)]
+        files.append(('malware.exe', b'MZ'))
+
+        commits = []
+
+        def after_commit(session):
+            commits.append(session)
+
+        event.listen(Session, 'after_commit', after_commit)
+        try:
+            response = client.post(f'/api/client/case-submit/{client_id}', headers=headers,
+                                   data=submission(files), content_type='multipart/form-data')
+        finally:
+            event.remove(Session, 'after_commit', after_commit)
+        assert response.status_code == 201, response.json
+        assert len(commits) == 1
+
+        with app.app_context():
+            case = db.session.get(Case, response.json['case_id'])
+            assert case.client_id == client_id
+            assert case.urgency == 'high'
+            documents = case.documents.order_by(Document.file_name).all()
+            assert [document.file_name for document in documents] == [name for name, _ in files[:5]]
+            for document, (_, data) in zip(documents, files):
+                assert document.sha256 == hashlib.sha256(data).hexdigest()
+                assert document.size == len(data)
+                assert document.mime_type == 'application/pdf'
+                with get_storage().open(document.sha256) as blob:
+                    assert blob.read() == data
+
+    def test_oversized_file_is_rejected(self, app, client):
+        app.config['MAX_DOCUMENT_SIZE'] = 1024
+        with app.app_context():
+            client_id, headers = self.setup_client()
+
+        response = client.post(f'/api/client/case-submit/{client_id}', headers=headers,
+                               data=submission([('small.pdf', b'x' * 10), ('big.pdf', b'x' * 2048)]),
+                               content_type='multipart/form-data')
+        assert response.status_code == 413
+        assert '1024 bytes' in response.json['message']
+        with app.app_context():
+            assert Case.query.count() == 0
+
+    def test_limits_on_the_whole_submission(self, app, client):
+        with app.app_context():
+            client_id, headers = self.setup_client()
+
+        app.config['MAX_DOCUMENTS_PER_REQUEST'] = 2
+        response = client.post(f'/api/client/case-submit/{client_id}', headers=headers,
+                               data=submission([(f'{i}.txt', b'notes') for i in range(3)]),
+                               content_type='multipart/form-data')
+        assert response.status_code == 413
+        assert 'At most 2 files' in response.json['message']
+
+        app.config['MAX_CONTENT_LENGTH'] = 4096
+        response = client.post(f'/api/client/case-submit/{client_id}', headers=headers,
+                               data=submission([('big.pdf', b'x' * 8192)]),
+                               content_type='multipart/form-data')
+        assert response.status_code == 413
+
+        with app.app_context():
+            assert Case.query.count() == 0
+
+    def test_save_many_stores_every_stream(self, app):
+        with app.app_context():
+            storage = get_storage()
+            data = [b'first', b'second' * 50000, b'first']
+
+            stored = storage.save_many(io.BytesIO(item) for item in data)
+
+            assert stored == [(hashlib.sha256(item).hexdigest(), len(item)) for item in data]
+            for (sha256, _), item in zip(stored, data):
+                with storage.open(sha256) as blob:
+                    assert blob.read() == item
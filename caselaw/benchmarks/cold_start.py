@@ -0,0 +1,72 @@
+"""
+Cold-start benchmark for wsgi:app.
+
+Each run starts a fresh interpreter and imports wsgi, timing the module
+imports and the create_app call that wsgi makes separately. Modes differ
+in AUTO_CREATE_SCHEMA and SWAGGER_ENABLED; the database is created up
+front so every mode boots against the same schema.
+
+    python benchmarks/cold_start.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT = (
+    'import time; start = time.perf_counter(); import app.app; '
+    'imported = time.perf_counter(); import wsgi; '
+    'print(imported - start, time.perf_counter() - imported)'
+)
+
+PREPARE = (
+    'from app.app import create_app; '
+    "create_app('development')"
+)
+
+
+def run(code, env):
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env=env,
+        check=True, capture_output=True, text=True
+    ).stdout
+    return [float(value) * 1000 for value in output.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'cold_start.db')}"
+        env = {
+            **os.environ,
+            'DATABASE_URL': database_url,
+            'SQLALCHEMY_DATABASE_URI': database_url,
+            'DOCUMENT_STORAGE_PATH': os.path.join(tmp, 'documents'),
+            'LAWYER_INDEX_PATH': os.path.join(tmp, 'lawyer_index'),
+        }
+        run(PREPARE, env)
+
+        modes = {
+            'migrations only (production)': {'AUTO_CREATE_SCHEMA': 'false'},
+            'create_all + seed roles': {'AUTO_CREATE_SCHEMA': 'true'},
+            'migrations only, no swagger': {'AUTO_CREATE_SCHEMA': 'false', 'SWAGGER_ENABLED': 'false'},
+        }
+        print(f'median of {args.runs} runs, ms')
+        print(f'{"mode":<32} {"imports":>8} {"create_app":>11} {"total":>8}')
+        for name, overrides in modes.items():
+            timings = [run(BOOT, {**env, **overrides}) for _ in range(args.runs)]
+            imports = statistics.median(timing[0] for timing in timings)
+            factory = statistics.median(timing[1] for timing in timings)
+            total = statistics.median(sum(timing) for timing in timings)
+            print(f'{name:<32} {imports:>8.1f} {factory:>11.1f} {total:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
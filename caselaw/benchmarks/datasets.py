@@ -0,0 +1,208 @@
+"""
+Synthetic datasets for the benchmark suite.
+
+seed_dataset(scale, seed) fills an empty database with scale users (one in
+ten a lawyer, the rest clients, plus one admin), scale cases and scale
+documents. The same scale and seed always produce the same rows, ids
+included. Rows go in with bulk Core inserts, and the derived state is
+then brought in line the way the maintenance commands do it: lawyer
+counters, per-user status counts and the case search index (kept by its
+triggers). The lawyer directory snapshot is rebuilt by the suite for each
+run.
+
+Every user's password is PASSWORD; emails are client<n>@example.com,
+lawyer<n>@example.com and admin@example.com.
+"""
+import hashlib
+import io
+import random
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+from app.db.models import Case, Client, Document, Lawyer, User, db, user_roles
+from app.services.aggregates import CLOSED_STATUS
+from app.services.claims import URGENCY_PRIORITY
+from app.services.dashboard import rebuild_status_counts
+from app.services.passwords import password_hasher
+from app.services.roles import role_registry
+from app.services.storage import get_storage
+
+# Bump when the generated data changes, so cached databases are rebuilt
+GENERATOR_VERSION = 1
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+PASSWORD = 'benchmark-password'
+ADMIN_EMAIL = 'admin@example.com'
+
+CHUNK_SIZE = 5000
+
+FIRST_NAMES = ('Ada', 'Ben', 'Chloe', 'Dev', 'Esi', 'Farid', 'Grace', 'Hugo', 'Ines', 'Jun', 'Kofi', 'Lena')
+LAST_NAMES = ('Okafor', 'Smith', 'Nguyen', 'Garcia', 'Mensah', 'Kowalski', 'Haddad', 'Ito', 'Silva', 'Brown')
+CITIES = ('Accra', 'Lagos', 'Nairobi', 'London', 'Lisbon', 'Toronto', 'Manila', 'Berlin')
+SPECIALIZATIONS = ('Family Law', 'Employment Law', 'Immigration', 'Housing', 'Criminal Defense',
+                   'Intellectual Property', 'Personal Injury', 'Tax Law', 'Corporate Law', 'Consumer Protection')
+CATEGORIES = ('Family', 'Employment', 'Immigration', 'Housing', 'Criminal', 'Intellectual Property',
+              'Personal Injury', 'Tax', 'Business', 'Consumer')
+SUBJECTS = ('deposit', 'dismissal', 'visa', 'eviction', 'custody', 'contract', 'trademark', 'injury',
+            'refund', 'inheritance', 'overtime', 'harassment', 'lease', 'permit', 'invoice', 'warranty')
+WORDS = ('landlord', 'employer', 'agreement', 'notice', 'payment', 'court', 'hearing', 'evidence', 'claim',
+         'letter', 'witness', 'damages', 'appeal', 'deadline', 'settlement', 'records', 'tenant', 'policy')
+COMMUNICATION_METHODS = ('Email', 'Phone', 'Video Call', 'In Person')
+# Status of assigned cases; unassigned cases are Pending
+ASSIGNED_STATUSES = (('Under Review', 2), ('In Progress', 4), ('Resolved', 2), (CLOSED_STATUS, 2))
+ASSIGNED_SHARE = 0.7
+DOCUMENT_BLOBS = 16
+
+
+def schema_fingerprint():
+    """Hash of the current schema DDL, part of the dataset cache key"""
+    dialect = db.engine.dialect
+    ddl = []
+    for table in db.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(sorted(str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes))
+    return hashlib.sha1('\n'.join(ddl).encode('utf-8')).hexdigest()[:12]
+
+
+def parse_scale(size):
+    """Scale from a SIZES name or a plain number"""
+    if size in SIZES:
+        return SIZES[size]
+    return int(size)
+
+
+class Generator:
+    """Deterministic ids, names and dates from one random.Random"""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.epoch = datetime(2024, 1, 1)
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def moment(self, days=730):
+        return self.epoch + timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+
+def _insert(table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(table), rows[start:start + CHUNK_SIZE])
+
+
+def _users(gen, kind, count, password_hash, profile_image):
+    users = []
+    for n in range(count):
+        created = gen.moment()
+        users.append({
+            'id': gen.uuid(), 'email': f'{kind}{n}@example.com',
+            'firstname': gen.rng.choice(FIRST_NAMES), 'lastname': gen.rng.choice(LAST_NAMES),
+            'profile_image': profile_image, '_password': password_hash,
+            'created_at': created, 'updated_at': created, 'type': kind,
+        })
+    return users
+
+
+def seed_dataset(scale, seed=0, profile_image=None):
+    """
+    Fill the empty database of the current app context with a synthetic
+    dataset of the given scale
+
+    Parameters:
+    scale (int): Number of users, of cases and of documents
+    seed (int): Random seed; equal seeds give identical datasets
+    profile_image (str): Image key set on every user, default image if None
+
+    Returns:
+    dict: Row counts per table
+    """
+    gen = Generator(seed)
+    password_hash = password_hasher.hash(PASSWORD)
+    profile_image = profile_image or current_app.config['DEFAULT_PROFILE_IMAGE']
+    lawyer_count = max(scale // 10, 1)
+    client_count = max(scale - lawyer_count, 1)
+
+    client_rows = _users(gen, 'client', client_count, password_hash, profile_image)
+    lawyer_rows = _users(gen, 'lawyer', lawyer_count, password_hash, profile_image)
+    admin_row = _users(gen, 'admin', 1, password_hash, profile_image)[0]
+    admin_row.update(email=ADMIN_EMAIL, type='client')
+    _insert(User.__table__, client_rows + lawyer_rows + [admin_row])
+
+    _insert(Client.__table__, [{
+        'id': row['id'], 'phone': f'+1555{gen.rng.randrange(10 ** 7):07d}',
+        'address': f'{gen.rng.randrange(1, 400)} Main Street', 'location': gen.rng.choice(CITIES),
+    } for row in client_rows + [admin_row]])
+
+    client_role, lawyer_role, admin_role = (role_registry.get(name).id for name in ('client', 'lawyer', 'admin'))
+    _insert(user_roles, [{'user_id': row['id'], 'role_id': client_role} for row in client_rows + [admin_row]]
+            + [{'user_id': row['id'], 'role_id': lawyer_role} for row in lawyer_rows]
+            + [{'user_id': admin_row['id'], 'role_id': admin_role}])
+
+    statuses, weights = zip(*ASSIGNED_STATUSES)
+    active_cases = [0] * lawyer_count
+    case_rows = []
+    for _ in range(scale):
+        created = gen.moment()
+        client = gen.rng.randrange(client_count)
+        lawyer = gen.rng.randrange(lawyer_count) if gen.rng.random() < ASSIGNED_SHARE else None
+        status = gen.rng.choices(statuses, weights)[0] if lawyer is not None else 'Pending'
+        if lawyer is not None and status != CLOSED_STATUS:
+            active_cases[lawyer] += 1
+        category = gen.rng.randrange(len(CATEGORIES))
+        case_rows.append({
+            'id': gen.uuid(),
+            'title': f'{CATEGORIES[category]} {gen.rng.choice(SUBJECTS)} {gen.rng.choice(SUBJECTS)}',
+            'description': gen.sentence(gen.rng.randrange(20, 80)),
+            'category': CATEGORIES[category], 'status': status,
+            'urgency': gen.rng.choice(URGENCY_PRIORITY),
+            'communication_method': gen.rng.choice(COMMUNICATION_METHODS),
+            'special_requirements': gen.sentence(8) if gen.rng.random() < 0.2 else None,
+            'created_at': created, 'updated_at': created + timedelta(hours=gen.rng.randrange(0, 500)),
+            'client_id': client_rows[client]['id'],
+            'lawyer_id': lawyer_rows[lawyer]['id'] if lawyer is not None else None,
+        })
+
+    _insert(Lawyer.__table__, [{
+        'id': row['id'], 'specialization': gen.rng.choice(SPECIALIZATIONS), 'bar_number': f'BAR-{n:07d}',
+        'active_cases': active_cases[n], **_rating(gen),
+    } for n, row in enumerate(lawyer_rows)])
+    _insert(Case.__table__, case_rows)
+
+    storage = get_storage()
+    blobs = []
+    for n in range(DOCUMENT_BLOBS):
+        content = f'%PDF-1.4 benchmark document {n}\n'.encode('ascii') * gen.rng.randrange(100, 2000)
+        blobs.append(storage.save(io.BytesIO(content)))
+    document_rows = []
+    for _ in range(scale):
+        case = gen.rng.choice(case_rows)
+        sha256, size = gen.rng.choice(blobs)
+        uploaded = case['created_at'] + timedelta(minutes=gen.rng.randrange(0, 600))
+        document_rows.append({
+            'id': gen.uuid(), 'file_name': f'{gen.rng.choice(SUBJECTS)}-{gen.rng.randrange(1000)}.pdf',
+            'sha256': sha256, 'size': size, 'mime_type': 'application/pdf',
+            'case_id': case['id'], 'uploaded_by': case['client_id'], 'uploaded_at': uploaded,
+            'processing_status': 'processed', 'page_count': 1, 'processed_at': uploaded,
+        })
+    _insert(Document.__table__, document_rows)
+    db.session.commit()
+
+    rebuild_status_counts()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return {
+        'users': len(client_rows) + len(lawyer_rows) + 1, 'lawyers': len(lawyer_rows),
+        'cases': len(case_rows), 'documents': len(document_rows),
+    }
+
+
+def _rating(gen):
+    count = gen.rng.randrange(0, 40)
+    total = sum(gen.rng.randint(1, 5) for _ in range(count))
+    return {'rating_sum': float(total), 'rating_count': count, 'rating': total / count if count else 0.0}
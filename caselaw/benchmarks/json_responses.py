@@ -0,0 +1,124 @@
+"""
+Serialization CPU and bytes on the wire for the case list endpoints.
+
+Seeds a temporary SQLite database with one client and one lawyer owning
+--cases cases, then requests a page of --limit cases from
+/api/client/cases/<id> and /api/lawyer/assigned-cases under three setups:
+
+    before   Flask's default JSON provider, no compression
+    orjson   orjson provider, no compression
+    after    orjson provider, compressed (br if installed, else gzip)
+
+For each it reports the time spent encoding the page alone, the time of
+the whole request, and the response size.
+
+    python benchmarks/json_responses.py [--cases 5000] [--limit 2000] [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.app import create_app  # noqa: E402
+from app.config.config import TestingConfig  # noqa: E402
+from app.db.models import Case, Client, Lawyer, Role, db  # noqa: E402
+from app.db.pagination import paginate_cases  # noqa: E402
+
+SETUPS = {
+    'before': {'JSON_ENCODER': 'default', 'COMPRESS_ENABLED': False},
+    'orjson': {'JSON_ENCODER': 'orjson', 'COMPRESS_ENABLED': False},
+    'after': {'JSON_ENCODER': 'orjson', 'COMPRESS_ENABLED': True},
+}
+
+
+def seed(cases):
+    client = Client(email='client@example.com', firstname='Ada', lastname='Client', _password='x')
+    lawyer = Lawyer(email='lawyer@example.com', firstname='Lee', lastname='Lawyer', _password='x', active_cases=0)
+    client.add_role(Role.query.filter_by(name='client').one())
+    lawyer.add_role(Role.query.filter_by(name='lawyer').one())
+    db.session.add_all([client, lawyer])
+    db.session.commit()
+
+    now = datetime.utcnow()
+    db.session.execute(insert(Case.__table__), [{
+        'id': str(uuid.uuid4()), 'client_id': client.id, 'lawyer_id': lawyer.id,
+        'title': f'Tenancy deposit dispute {i}', 'description': 'Landlord kept the deposit',
+        'category': 'Housing', 'status': 'In Progress', 'urgency': 'medium',
+        'communication_method': 'Email', 'created_at': now, 'updated_at': now,
+    } for i in range(cases)])
+    db.session.commit()
+    return client, lawyer
+
+
+def measure(fn, runs):
+    fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='caselaw-json-')
+    TestingConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    TestingConfig.DOCUMENT_STORAGE_PATH = os.path.join(workdir, 'documents')
+    TestingConfig.LAWYER_INDEX_PATH = os.path.join(workdir, 'lawyer_index')
+    TestingConfig.PROFILE_IMAGE_PATH = os.path.join(workdir, 'profile_images')
+    TestingConfig.CASES_MAX_PAGE_SIZE = args.limit
+    TestingConfig.DEBUG = False
+
+    print(f'{args.cases} cases, pages of {args.limit}, median of {args.runs} runs')
+    print(f"{'setup':8} {'endpoint':16} {'encode ms':>10} {'request ms':>11} {'bytes':>10} {'encoding':>9}")
+
+    seeded = None
+    for name, overrides in SETUPS.items():
+        for key, value in overrides.items():
+            setattr(TestingConfig, key, value)
+        app = create_app('testing')
+        with app.app_context():
+            if seeded is None:
+                client, lawyer = seed(args.cases)
+                seeded = (client.id, lawyer.id)
+            client = db.session.get(Client, seeded[0])
+            lawyer = db.session.get(Lawyer, seeded[1])
+            endpoints = {
+                'client cases': (f'/api/client/cases/{client.id}', create_access_token(identity=client),
+                                 Case.query.filter_by(client_id=client.id)),
+                'assigned cases': ('/api/lawyer/assigned-cases', create_access_token(identity=lawyer),
+                                   Case.query.filter_by(lawyer_id=lawyer.id)),
+            }
+
+            http = app.test_client()
+            for label, (url, token, query) in endpoints.items():
+                page, _ = paginate_cases(query, {'limit': args.limit})
+                with app.test_request_context():
+                    encode = measure(lambda: app.json.response({'status': 'success', 'data': page}), args.runs)
+
+                headers = {'Authorization': f'Bearer {token}', 'Accept-Encoding': 'br, gzip'}
+                target = f'{url}?limit={args.limit}'
+                request = measure(lambda: http.get(target, headers=headers), args.runs)
+                response = http.get(target, headers=headers)
+                print(f"{name:8} {label:16} {encode:10.2f} {request:11.2f} {len(response.data):10d} "
+                      f"{response.headers.get('Content-Encoding', 'identity'):>9}")
+
+
+if __name__ == '__main__':
+    main()
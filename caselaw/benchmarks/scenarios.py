@@ -0,0 +1,227 @@
+"""
+One request scenario per blueprint endpoint for the benchmark suite.
+
+A scenario builds the i-th request of its run (method, URL and the other
+test client arguments) from Fixtures: users, tokens and ids picked from
+the seeded dataset. Requests rotate through FIXTURE_USERS users and their
+cases, so a run is not served by one hot row. Scenarios that write
+(claims, submissions, logouts) use a fresh target for every request.
+"""
+import io
+from dataclasses import dataclass, field
+from typing import Callable
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import func, select
+from app.db.models import Case, Document, User, db
+from benchmarks.datasets import ADMIN_EMAIL, PASSWORD, SPECIALIZATIONS, SUBJECTS
+
+# Users (clients, lawyers) the requests rotate through
+FIXTURE_USERS = 50
+
+
+@dataclass
+class Fixtures:
+    clients: list
+    lawyers: list
+    admin: str
+    tokens: dict
+    refresh_tokens: dict
+    emails: dict
+    # (case id, owning client id) of cases with a document, and (document id, case id, client id)
+    cases: list
+    documents: list
+    # Unassigned cases, handed out one per claim
+    open_cases: list
+    profile_image: str
+    image: bytes
+    counter: dict = field(default_factory=lambda: {'register': 0})
+
+    def auth(self, user_id):
+        return {'Authorization': f'Bearer {self.tokens[user_id]}'}
+
+
+@dataclass
+class Scenario:
+    endpoint: str
+    build: Callable
+    statuses: tuple = (200,)
+    # Share of the run's request count, for endpoints that are slow by design
+    weight: float = 1.0
+
+
+def load_fixtures(profile_image, image):
+    """Pick the users and ids the scenarios rotate through, and sign their tokens"""
+    clients = db.session.scalars(
+        select(Case.client_id).group_by(Case.client_id).order_by(func.count().desc(), Case.client_id)
+        .limit(FIXTURE_USERS)
+    ).all()
+    lawyers = db.session.scalars(
+        select(Case.lawyer_id).where(Case.lawyer_id.isnot(None)).group_by(Case.lawyer_id)
+        .order_by(func.count().desc(), Case.lawyer_id).limit(FIXTURE_USERS)
+    ).all()
+    admin = db.session.scalar(select(User.id).where(User.email == ADMIN_EMAIL))
+
+    users = {user.id: user for user in User.query.filter(User.id.in_([*clients, *lawyers, admin]))}
+    tokens = {user_id: create_access_token(identity=user) for user_id, user in users.items()}
+    refresh_tokens = {user_id: create_refresh_token(identity=user) for user_id, user in users.items()}
+
+    documents = db.session.execute(
+        select(Document.id, Document.case_id, Case.client_id)
+        .join(Case, Case.id == Document.case_id)
+        .where(Case.client_id.in_(clients))
+        .order_by(Document.id)
+    ).all()
+    open_cases = db.session.scalars(
+        select(Case.id).where(Case.lawyer_id.is_(None), Case.status == 'Pending').order_by(Case.id)
+    ).all()
+    return Fixtures(
+        clients=clients, lawyers=lawyers, admin=admin, tokens=tokens, refresh_tokens=refresh_tokens,
+        emails={user_id: user.email for user_id, user in users.items()},
+        cases=[(case_id, client_id) for _, case_id, client_id in documents],
+        documents=[tuple(row) for row in documents], open_cases=open_cases,
+        profile_image=profile_image, image=image,
+    )
+
+
+def _pick(items, i):
+    return items[i % len(items)]
+
+
+def _login(fx, i):
+    client_id = _pick(fx.clients, i)
+    return {'method': 'POST', 'path': '/api/auth/login', 'json': {'email': fx.emails[client_id], 'password': PASSWORD}}
+
+
+def _register(fx, i):
+    fx.counter['register'] += 1
+    return {'method': 'POST', 'path': '/api/auth/register', 'json': {
+        'email': f"bench-{fx.counter['register']}@example.com", 'password': PASSWORD,
+        'firstName': 'Bench', 'lastName': 'Mark', 'userType': 'client',
+    }}
+
+
+def _refresh(fx, i):
+    client_id = _pick(fx.clients, i)
+    return {'method': 'POST', 'path': '/api/auth/refresh',
+            'headers': {'Authorization': f'Bearer {fx.refresh_tokens[client_id]}'}}
+
+
+def _me(fx, i):
+    return {'method': 'GET', 'path': '/api/auth/me', 'headers': fx.auth(_pick(fx.clients, i))}
+
+
+def _profile_image(fx, i):
+    return {'method': 'PUT', 'path': '/api/auth/me/profile-image', 'headers': fx.auth(_pick(fx.clients, i)),
+            'data': {'image': (io.BytesIO(fx.image), 'portrait.jpg')}, 'content_type': 'multipart/form-data'}
+
+
+def _logout(fx, i):
+    # Each request revokes a token of its own
+    user = User.query.get(_pick(fx.clients, i))
+    return {'method': 'POST', 'path': '/api/auth/logout',
+            'headers': {'Authorization': f'Bearer {create_access_token(identity=user)}'}}
+
+
+def _case_detail(fx, i):
+    case_id, client_id = _pick(fx.cases, i)
+    return {'method': 'GET', 'path': f'/api/cases/{case_id}', 'headers': fx.auth(client_id)}
+
+
+def _download(fx, i):
+    document_id, case_id, client_id = _pick(fx.documents, i)
+    return {'method': 'GET', 'path': f'/api/cases/{case_id}/documents/{document_id}', 'headers': fx.auth(client_id)}
+
+
+def _export(fx, i):
+    return {'method': 'GET', 'path': f'/api/cases/export?client_id={_pick(fx.clients, i)}', 'headers': fx.auth(fx.admin)}
+
+
+def _submit(fx, i):
+    client_id = _pick(fx.clients, i)
+    return {'method': 'POST', 'path': f'/api/client/case-submit/{client_id}', 'headers': fx.auth(client_id),
+            'content_type': 'multipart/form-data', 'data': {
+                'title': f'Benchmark {_pick(SUBJECTS, i)}', 'description': 'Submitted by the benchmark suite',
+                'urgencyLevel': 'medium', 'communicationMethod': 'Email',
+                'documents': (io.BytesIO(f'%PDF-1.4 benchmark upload {i}'.encode('ascii')), 'upload.pdf'),
+            }}
+
+
+def _client_cases(fx, i):
+    client_id = _pick(fx.clients, i)
+    return {'method': 'GET', 'path': f'/api/client/cases/{client_id}?limit=20', 'headers': fx.auth(client_id)}
+
+
+def _client_dashboard(fx, i):
+    return {'method': 'GET', 'path': '/api/client/dashboard', 'headers': fx.auth(_pick(fx.clients, i))}
+
+
+def _find_lawyers(fx, i):
+    specialization = _pick(SPECIALIZATIONS, i).split()[0].lower()
+    return {'method': 'POST', 'path': '/api/client/get-lawyers', 'headers': fx.auth(_pick(fx.clients, i)),
+            'json': {'specialization': specialization}}
+
+
+def _handle_case(fx, i):
+    return {'method': 'GET', 'path': f'/api/lawyer/handle-cases/{fx.open_cases[i]}',
+            'headers': fx.auth(_pick(fx.lawyers, i))}
+
+
+def _claim_next(fx, i):
+    return {'method': 'POST', 'path': '/api/lawyer/claim-next', 'headers': fx.auth(_pick(fx.lawyers, i))}
+
+
+def _available(fx, i):
+    return {'method': 'GET', 'path': '/api/lawyer/available-case?limit=20', 'headers': fx.auth(_pick(fx.lawyers, i))}
+
+
+def _assigned(fx, i):
+    return {'method': 'GET', 'path': '/api/lawyer/assigned-cases?limit=20', 'headers': fx.auth(_pick(fx.lawyers, i))}
+
+
+def _search(fx, i):
+    return {'method': 'GET', 'path': f'/api/lawyer/cases/search?q={_pick(SUBJECTS, i)}&limit=20',
+            'headers': fx.auth(_pick(fx.lawyers, i))}
+
+
+def _lawyer_dashboard(fx, i):
+    return {'method': 'GET', 'path': '/api/lawyer/dashboard', 'headers': fx.auth(_pick(fx.lawyers, i))}
+
+
+def _media(fx, i):
+    variant = _pick(('thumb', 'small', 'large'), i)
+    return {'method': 'GET', 'path': f'/api/media/profile-images/{fx.profile_image}/{variant}.webp'}
+
+
+SCENARIOS = (
+    Scenario('auth_bp.login', _login),
+    Scenario('auth_bp.register', _register, statuses=(201,)),
+    Scenario('auth_bp.refresh', _refresh),
+    Scenario('auth_bp.get_user_profile', _me),
+    Scenario('auth_bp.upload_profile_image', _profile_image, weight=0.25),
+    Scenario('auth_bp.logout', _logout),
+    Scenario('cases_bp.get_case', _case_detail),
+    Scenario('cases_bp.download_document', _download),
+    Scenario('cases_bp.export_cases', _export, weight=0.5),
+    Scenario('client_bp.handle_submitted_case', _submit, statuses=(201,)),
+    Scenario('client_bp.get_client_cases', _client_cases),
+    Scenario('client_bp.client_dashboard', _client_dashboard),
+    Scenario('client_bp.find_lawyer_by_specialization', _find_lawyers),
+    Scenario('lawyer_bp.handle_case', _handle_case),
+    Scenario('lawyer_bp.claim_next', _claim_next),
+    Scenario('lawyer_bp.get_available_cases', _available),
+    Scenario('lawyer_bp.get_assigned_cases', _assigned),
+    Scenario('lawyer_bp.search_lawyer_cases', _search),
+    Scenario('lawyer_bp.lawyer_dashboard', _lawyer_dashboard),
+    Scenario('media_bp.get_profile_image', _media),
+)
+
+
+def uncovered_endpoints(app):
+    """Blueprint endpoints of the app that no scenario exercises"""
+    covered = {scenario.endpoint for scenario in SCENARIOS}
+    return sorted(
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if '.' in rule.endpoint and rule.endpoint.split('.')[0] in app.blueprints
+        and app.blueprints[rule.endpoint.split('.')[0]].import_name.startswith('app.')
+        and rule.endpoint not in covered
+    )
@@ -0,0 +1,257 @@
+"""
+Endpoint benchmark suite.
+
+Seeds a synthetic dataset (see benchmarks/datasets.py) and drives every
+blueprint endpoint in-process through app.test_client(), one scenario per
+endpoint (see benchmarks/scenarios.py). For each it reports p50/p95/p99
+latency, throughput and SQL statements per request, and compares them
+with the stored baseline for the dataset size:
+
+    latency      p95 above baseline by more than --threshold (and 1 ms)
+    queries      median statements per request above baseline
+
+Any regression makes the run exit with status 1. Datasets are cached in
+benchmarks/.cache per size, seed and schema, and every run works on a
+fresh copy, so runs that write (claims, submissions) start from the same
+state. The app runs under TestingConfig with DEBUG off.
+
+    python benchmarks/suite.py [--size 10k|100k|1m|<n>] [--requests 200] [--only lawyer_bp]
+    python benchmarks/suite.py --size 10k --update-baseline
+
+Latency baselines belong to the machine that recorded them; record them
+again with --update-baseline when the reference machine changes. Query
+counts hold anywhere.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import event  # noqa: E402
+
+from app.app import create_app  # noqa: E402
+from app.config.config import TestingConfig  # noqa: E402
+from app.db.models import db  # noqa: E402
+from app.services.lawyer_directory import lawyer_directory  # noqa: E402
+from app.services.profile_images import store_profile_image  # noqa: E402
+from benchmarks.datasets import GENERATOR_VERSION, parse_scale, schema_fingerprint, seed_dataset  # noqa: E402
+from benchmarks.scenarios import SCENARIOS, load_fixtures, uncovered_endpoints  # noqa: E402
+
+CACHE_DIR = os.path.join(ROOT, 'benchmarks', '.cache')
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baselines')
+# Latency differences below this are noise, whatever the ratio
+MIN_REGRESSION_MS = 1.0
+
+
+def configure(workdir):
+    TestingConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    TestingConfig.DOCUMENT_STORAGE_PATH = os.path.join(workdir, 'documents')
+    TestingConfig.LAWYER_INDEX_PATH = os.path.join(workdir, 'lawyer_index')
+    TestingConfig.PROFILE_IMAGE_PATH = os.path.join(workdir, 'profile_images')
+    TestingConfig.DEBUG = False
+
+
+def portrait():
+    """A JPEG to upload as a profile image"""
+    from PIL import Image
+    image = Image.radial_gradient('L').resize((640, 480)).convert('RGB')
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+
+def build_dataset(scale, seed):
+    """
+    Seed the dataset into the cache unless it is there already
+
+    Returns:
+    str: Cache directory holding the database, document blobs and images
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    probe = tempfile.mkdtemp(prefix='caselaw-bench-')
+    configure(probe)
+    app = create_app('testing')
+    with app.app_context():
+        key = f'{scale}-{seed}-{schema_fingerprint()}-v{GENERATOR_VERSION}'
+        db.engine.dispose()
+    shutil.rmtree(probe, ignore_errors=True)
+
+    path = os.path.join(CACHE_DIR, key)
+    if os.path.exists(os.path.join(path, 'dataset.json')):
+        return path
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    configure(path)
+    app = create_app('testing')
+    started = time.perf_counter()
+    with app.app_context():
+        profile_image = store_profile_image(io.BytesIO(portrait()))
+        counts = seed_dataset(scale, seed, profile_image=profile_image)
+        db.engine.dispose()
+    counts['profile_image'] = profile_image
+    with open(os.path.join(path, 'dataset.json'), 'w') as f:
+        json.dump(counts, f)
+    print(f'Seeded {counts} in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+    return path
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_scenario(app, http, fixtures, scenario, requests, warmup, offset, statements):
+    """
+    Time `requests` requests of one scenario after `warmup` untimed ones
+
+    Returns:
+    dict: p50/p95/p99 latency in ms, requests per second, median queries
+    """
+    latencies, queries = [], []
+    for i in range(warmup + requests):
+        with app.app_context():
+            kwargs = scenario.build(fixtures, offset + i)
+        path = kwargs.pop('path')
+        statements.clear()
+        started = time.perf_counter()
+        response = http.open(path, **kwargs)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        if response.status_code not in scenario.statuses:
+            raise RuntimeError(f'{scenario.endpoint}: {kwargs["method"]} {path} answered '
+                               f'{response.status_code}: {response.get_data(as_text=True)[:200]}')
+        if i >= warmup:
+            latencies.append(elapsed)
+            queries.append(len(statements))
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'rps': round(len(latencies) / sum(latencies), 1),
+        'queries': statistics.median(queries),
+    }
+
+
+def run_suite(dataset, requests, warmup, only=None):
+    """Run every scenario against a fresh copy of the dataset"""
+    with open(os.path.join(dataset, 'dataset.json')) as f:
+        info = json.load(f)
+    workdir = tempfile.mkdtemp(prefix='caselaw-bench-')
+    try:
+        shutil.copytree(dataset, workdir, dirs_exist_ok=True)
+        configure(workdir)
+        app = create_app('testing')
+        with app.app_context():
+            missing = uncovered_endpoints(app)
+            if missing:
+                print(f"No scenario for: {', '.join(missing)}", file=sys.stderr)
+            lawyer_directory.rebuild()
+            fixtures = load_fixtures(info['profile_image'], portrait())
+
+            statements = []
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        http = app.test_client()
+        results, offset = {}, 0
+        for scenario in SCENARIOS:
+            if only and not scenario.endpoint.startswith(only):
+                continue
+            count = max(1, int(requests * scenario.weight))
+            results[scenario.endpoint] = run_scenario(
+                app, http, fixtures, scenario, count, warmup, offset, statements)
+            offset += warmup + count
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, threshold):
+    """
+    Regressions of results against a baseline
+
+    Returns:
+    dict: endpoint -> list of regression descriptions
+    """
+    regressions = {}
+    for endpoint, result in results.items():
+        base = baseline.get(endpoint)
+        if not base:
+            continue
+        found = []
+        if result['p95_ms'] > base['p95_ms'] * (1 + threshold) and result['p95_ms'] - base['p95_ms'] > MIN_REGRESSION_MS:
+            found.append(f"p95 {base['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+        if result['queries'] > base['queries']:
+            found.append(f"queries {base['queries']:g} -> {result['queries']:g}")
+        if found:
+            regressions[endpoint] = found
+    return regressions
+
+
+def report(results, baseline, regressions):
+    print(f"{'endpoint':42} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8} {'base p95':>9}")
+    for endpoint, result in results.items():
+        base = baseline.get(endpoint, {})
+        flag = '  REGRESSION' if endpoint in regressions else ''
+        print(f"{endpoint:42} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f} "
+              f"{result['rps']:8.1f} {result['queries']:8g} {base.get('p95_ms', float('nan')):9.2f}{flag}")
+    for endpoint, found in regressions.items():
+        print(f"Regression in {endpoint}: {'; '.join(found)}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='10k', help='10k, 100k, 1m or a number of users/cases/documents')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--only', help='Run the endpoints starting with this prefix, e.g. lawyer_bp')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed p95 slowdown, 0.25 = 25%%')
+    parser.add_argument('--baseline', help='Baseline file, default benchmarks/baselines/<size>.json')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    scale = parse_scale(args.size)
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f'{args.size}.json')
+    baseline = {}
+    if os.path.exists(baseline_path) and not args.update_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)['endpoints']
+
+    dataset = build_dataset(scale, args.seed)
+    print(f'{scale} users/cases/documents, seed {args.seed}, {args.requests} requests per endpoint')
+    results = run_suite(dataset, args.requests, args.warmup, args.only)
+    regressions = compare(results, baseline, args.threshold)
+    report(results, baseline, regressions)
+
+    record = {
+        'size': args.size, 'seed': args.seed, 'requests': args.requests,
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count()},
+        'endpoints': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(record, f, indent=2)
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(record, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline written to {baseline_path}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
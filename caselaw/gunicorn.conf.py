@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Threaded workers: while one thread waits for a password hash (which is
+# bounded host-wide, see app.services.passwords) the others keep serving
+# cheap requests
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Import wsgi:app once in the master and fork the workers from it. Database
+# pools are reset in each child, see app.initialize_functions; the password
+# hashing semaphores are created here and shared by every worker.
+preload_app = True
+
+
+def on_starting(server):
+    # Prometheus multiprocess mode (see app.services.metrics) keeps one file
+    # per worker; files left by a previous run would be merged into /metrics
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
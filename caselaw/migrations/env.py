@@ -51,6 +51,23 @@ def get_metadata():
     return target_db.metadata
 
 
+# Schema objects created by raw DDL outside the models (see
+# app.services.case_search): the FTS5 table with its shadow tables on
+# SQLite and the GIN expression index on PostgreSQL. Autogenerate would
+# otherwise emit drops for them.
+UNMODELED_TABLE_PREFIXES = ('cases_fts',)
+UNMODELED_INDEXES = ('ix_cases_search',)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if reflected and compare_to is None:
+        if type_ == 'table' and name.startswith(UNMODELED_TABLE_PREFIXES):
+            return False
+        if type_ == 'index' and name in UNMODELED_INDEXES:
+            return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +82,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +111,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
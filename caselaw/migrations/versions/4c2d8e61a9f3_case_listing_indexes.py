@@ -0,0 +1,30 @@
+"""case listing indexes
+
+Revision ID: 4c2d8e61a9f3
+Revises: 108a50c8c861
+Create Date: 2026-10-17 09:12:04.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c2d8e61a9f3'
+down_revision = '108a50c8c861'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.create_index('ix_cases_status_created_at_id', ['status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_cases_client_id_created_at_id', ['client_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_cases_lawyer_id_created_at_id', ['lawyer_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.drop_index('ix_cases_lawyer_id_created_at_id')
+        batch_op.drop_index('ix_cases_client_id_created_at_id')
+        batch_op.drop_index('ix_cases_status_created_at_id')
@@ -0,0 +1,73 @@
+"""case search index
+
+Revision ID: 7d1f0c93e5a4
+Revises: e3b9d4f6a712
+Create Date: 2026-10-17 14:02:51.337120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# The DDL as of this revision; app.services.case_search creates the same
+# objects for fresh databases and may change after this migration.
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5("
+    "title, description, category, content='cases', content_rowid='rowid', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ai AFTER INSERT ON cases BEGIN "
+    "INSERT INTO cases_fts(rowid, title, description, category) "
+    "VALUES (new.rowid, new.title, new.description, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ad AFTER DELETE ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.rowid, old.title, old.description, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_au AFTER UPDATE OF title, description, category ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.rowid, old.title, old.description, old.category); "
+    "INSERT INTO cases_fts(rowid, title, description, category) "
+    "VALUES (new.rowid, new.title, new.description, new.category); END",
+)
+SQLITE_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS cases_fts_au",
+    "DROP TRIGGER IF EXISTS cases_fts_ad",
+    "DROP TRIGGER IF EXISTS cases_fts_ai",
+    "DROP TABLE IF EXISTS cases_fts",
+)
+POSTGRES_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_cases_search ON cases USING gin (("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')))",
+)
+POSTGRES_DROP_DDL = (
+    "DROP INDEX IF EXISTS ix_cases_search",
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '7d1f0c93e5a4'
+down_revision = 'e3b9d4f6a712'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        # Index the cases that already exist
+        op.execute("INSERT INTO cases_fts(cases_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DROP_DDL:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DROP_DDL:
+            op.execute(statement)
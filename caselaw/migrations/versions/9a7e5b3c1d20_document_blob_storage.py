@@ -0,0 +1,43 @@
+"""add content-addressed storage columns to documents
+
+Revision ID: 9a7e5b3c1d20
+Revises: 4c2d8e61a9f3
+Create Date: 2026-10-17 10:03:51.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a7e5b3c1d20'
+down_revision = '4c2d8e61a9f3'
+branch_labels = None
+depends_on = None
+
+# Schema only: the blobs in documents.file_data are moved to the document
+# storage with `flask caselaw move-document-blobs`, and migration
+# e8b3f5a2c6d1 drops file_data once that is done.
+
+
+def upgrade():
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('size', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('mime_type', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    stored_only = op.get_bind().execute(sa.text(
+        'SELECT count(*) FROM documents WHERE file_data IS NULL AND sha256 IS NOT NULL'
+    )).scalar()
+    if stored_only:
+        raise RuntimeError(
+            f'{stored_only} documents only exist in the document storage; '
+            'run `flask caselaw move-document-blobs --restore` before downgrading'
+        )
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_column('mime_type')
+        batch_op.drop_column('size')
+        batch_op.drop_column('sha256')
@@ -0,0 +1,35 @@
+"""lawyer rating aggregates
+
+Revision ID: b6e2a9d4c318
+Revises: 7d1f0c93e5a4
+Create Date: 2026-10-17 15:21:08.412655
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2a9d4c318'
+down_revision = '7d1f0c93e5a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('lawyers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Individual ratings were never stored, so carry an existing average
+    # forward as a single rating
+    op.execute(
+        "UPDATE lawyers SET rating_sum = rating, rating_count = 1 "
+        "WHERE rating IS NOT NULL AND rating <> 0"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('lawyers', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
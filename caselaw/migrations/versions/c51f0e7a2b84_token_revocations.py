@@ -0,0 +1,42 @@
+"""token revocations
+
+Revision ID: c51f0e7a2b84
+Revises: 9a7e5b3c1d20
+Create Date: 2026-10-17 11:26:40.553910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51f0e7a2b84'
+down_revision = '9a7e5b3c1d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('token_revocations',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('jti', sa.String(length=36), nullable=True),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('token_type', sa.String(length=20), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('token_revocations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_revocations_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_token_revocations_jti'), ['jti'], unique=False)
+        batch_op.create_index(batch_op.f('ix_token_revocations_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_revocations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_revocations_user_id'))
+        batch_op.drop_index(batch_op.f('ix_token_revocations_jti'))
+        batch_op.drop_index(batch_op.f('ix_token_revocations_expires_at'))
+
+    op.drop_table('token_revocations')
@@ -0,0 +1,26 @@
+"""document case index
+
+Revision ID: d2f6b8a1c7e4
+Revises: a4d7e2c9b613
+Create Date: 2026-10-17 19:40:51.236817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6b8a1c7e4'
+down_revision = 'a4d7e2c9b613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.create_index('ix_documents_case_id_uploaded_at_id', ['case_id', 'uploaded_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_documents_case_id_uploaded_at_id')
@@ -0,0 +1,26 @@
+"""claim queue index
+
+Revision ID: e3b9d4f6a712
+Revises: c51f0e7a2b84
+Create Date: 2026-10-17 12:48:17.904261
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9d4f6a712'
+down_revision = 'c51f0e7a2b84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.create_index('ix_cases_status_urgency_created_at', ['status', 'urgency', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cases', schema=None) as batch_op:
+        batch_op.drop_index('ix_cases_status_urgency_created_at')
@@ -0,0 +1,38 @@
+"""drop inline document blobs
+
+Revision ID: e8b3f5a2c6d1
+Revises: d2f6b8a1c7e4
+Create Date: 2026-10-17 21:12:07.580243
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f5a2c6d1'
+down_revision = 'd2f6b8a1c7e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inline = op.get_bind().execute(sa.text(
+        'SELECT count(*) FROM documents WHERE file_data IS NOT NULL AND sha256 IS NULL'
+    )).scalar()
+    if inline:
+        raise RuntimeError(
+            f'{inline} documents still keep their content in documents.file_data; '
+            'upgrade to d2f6b8a1c7e4, run `flask caselaw move-document-blobs`, then upgrade again'
+        )
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_column('file_data')
+
+
+def downgrade():
+    # The content stays in the document storage; copy it back with
+    # `flask caselaw move-document-blobs --restore` before downgrading
+    # past 9a7e5b3c1d20
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_data', sa.LargeBinary(), nullable=True))
@@ -0,0 +1,40 @@
+"""case status counts
+
+Revision ID: f8a3c7e1d925
+Revises: b6e2a9d4c318
+Create Date: 2026-10-17 16:05:43.190274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8a3c7e1d925'
+down_revision = 'b6e2a9d4c318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('case_status_counts',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'status')
+    )
+
+    # Count the existing cases for their clients and lawyers
+    op.execute(
+        "INSERT INTO case_status_counts (user_id, status, count) "
+        "SELECT user_id, status, COUNT(*) FROM ("
+        "SELECT client_id AS user_id, status FROM cases "
+        "UNION ALL "
+        "SELECT lawyer_id AS user_id, status FROM cases WHERE lawyer_id IS NOT NULL"
+        ") AS per_user GROUP BY user_id, status"
+    )
+
+
+def downgrade():
+    op.drop_table('case_status_counts')